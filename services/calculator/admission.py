@@ -0,0 +1,130 @@
+"""
+Admission control and priority lanes for /compute and /compute/stream.
+
+At most CALC_MAX_CONCURRENT batches (by default two per CPU the pod may use,
+as serve.available_cpus counts them) are evaluated at once. The rest wait in
+one FIFO per lane, chosen with the X-Calc-Priority header: urgent is served
+first, then routine, then bulk. Bulk requests are shed with 429 and
+Retry-After as soon as CALC_SHED_QUEUE_DEPTH requests are already waiting or
+the estimated wait passes CALC_SHED_WAIT_MS, so backfills back off before
+urgent cases time out.
+"""
+import asyncio
+import math
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from time import monotonic
+
+import metrics
+from serve import available_cpus
+
+URGENT, ROUTINE, BULK = "urgent", "routine", "bulk"
+LANES = (URGENT, ROUTINE, BULK)
+
+MAX_CONCURRENT = int(os.getenv("CALC_MAX_CONCURRENT", str(2 * available_cpus())))
+SHED_QUEUE_DEPTH = int(os.getenv("CALC_SHED_QUEUE_DEPTH", "8"))
+SHED_WAIT_MS = float(os.getenv("CALC_SHED_WAIT_MS", "500"))
+
+# Weight of the latest batch in the moving average of slot hold times.
+_SMOOTHING = 0.2
+
+
+class Shed(Exception):
+    """A bulk request turned away; retry_after is in whole seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"bulk request shed ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Admission:
+    """Concurrency slots handed out in lane order. Used from the event loop only."""
+
+    def __init__(self, limit: int, shed_depth: int, shed_wait_ms: float):
+        self.limit = limit
+        self.shed_depth = shed_depth
+        self.shed_wait = shed_wait_ms / 1000
+        self.active = 0
+        self.queues: dict[str, deque] = {lane: deque() for lane in LANES}
+        # Moving average of the seconds a batch holds its slot.
+        self.hold = 0.0
+
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def estimated_wait(self) -> float:
+        """Seconds a request joining the back of the queue would wait."""
+        if self.active < self.limit:
+            return 0.0
+        return (self.depth() // self.limit + 1) * self.hold
+
+    def _shed(self, lane: str):
+        if lane != BULK:
+            return
+        wait = self.estimated_wait()
+        if self.depth() >= self.shed_depth:
+            reason = "queue_depth"
+        elif wait > self.shed_wait:
+            reason = "estimated_wait"
+        else:
+            return
+        metrics.SHED.inc(lane, reason)
+        raise Shed(reason, max(1, math.ceil(wait)))
+
+    async def acquire(self, lane: str):
+        if self.active < self.limit and not self.depth():
+            self.active += 1
+            self._report()
+            return
+        self._shed(lane)
+        waiter = asyncio.get_running_loop().create_future()
+        queue = self.queues[lane]
+        queue.append(waiter)
+        metrics.ADMISSION_QUEUE.inc(lane)
+        start = monotonic()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the client went away: pass the slot on.
+                self._hand_over()
+            else:
+                queue.remove(waiter)
+            raise
+        finally:
+            metrics.ADMISSION_QUEUE.dec(lane)
+            metrics.ADMISSION_WAIT.observe(lane, value=monotonic() - start)
+
+    def release(self, held: float):
+        self.hold += _SMOOTHING * (held - self.hold)
+        self._hand_over()
+
+    def _hand_over(self):
+        for queue in self.queues.values():
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    self._report()
+                    return
+        self.active -= 1
+        self._report()
+
+    def _report(self):
+        metrics.ADMISSION_ACTIVE.set(value=self.active)
+        metrics.ADMISSION_ESTIMATED_WAIT.set(value=self.estimated_wait())
+
+    @asynccontextmanager
+    async def slot(self, lane: str):
+        """Hold a slot for the body of the block; raises Shed for bulk under load."""
+        await self.acquire(lane)
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.release(monotonic() - start)
+
+
+CONTROLLER = Admission(MAX_CONCURRENT, SHED_QUEUE_DEPTH, SHED_WAIT_MS)
@@ -0,0 +1,55 @@
+"""
+In-process calculator API for Python callers on the same host.
+
+    from api import compute_batch
+    rows = compute_batch([{"formula": "calculate_resistive_index", "inputs": {"psv": 100, "edv": 40}}])
+
+Requests go through the same dispatch as /compute: validation, dedup, the
+result cache, the process pool for large batches, $ref graphs and deadlines.
+The rows that come back are the CalcResult dicts /compute would have encoded,
+without HTTP or JSON. A malformed request list raises
+pydantic.ValidationError where /compute answers 422. Admission control does
+not apply; the caller owns its own concurrency.
+"""
+import asyncio
+from time import monotonic
+from typing import Optional
+
+from pydantic import TypeAdapter
+
+import graph
+import metrics
+import pool
+from engine import Outcome, evaluate_batch
+from fastpath import RequestRow, result_row
+
+_REQUESTS = TypeAdapter(list[RequestRow])
+
+
+async def dispatch(
+    requests: list[dict], sample: metrics.Sample, deadline: Optional[float] = None, has_refs: Optional[bool] = None,
+) -> list[Outcome]:
+    """Evaluate validated CalcRequest dicts the way /compute does.
+
+    `has_refs` lets a caller that has already scanned the raw body skip the
+    per-row check for $ref inputs.
+    """
+    if has_refs is None:
+        has_refs = any(graph.refs(req["inputs"]) for req in requests)
+    if has_refs:
+        return await graph.evaluate(requests, sample, deadline)
+    return await pool.evaluate_batch_async([(req["formula"], req["inputs"]) for req in requests], sample, deadline)
+
+
+def compute_batch(requests: list[dict], deadline_ms: Optional[float] = None) -> list[dict]:
+    """CalcResult dicts for CalcRequest dicts, in request order."""
+    deadline = None if deadline_ms is None else monotonic() + deadline_ms / 1000
+    requests = _REQUESTS.validate_python(requests)
+    metrics.BATCH_ROWS.observe("inprocess", value=len(requests))
+    has_refs = any(graph.refs(req["inputs"]) for req in requests)
+    if has_refs or (pool.enabled() and len(requests) >= pool.POOL_MIN_ROWS):
+        outcomes = asyncio.run(dispatch(requests, metrics.Sample(), deadline, has_refs))
+    else:
+        # Small batches skip the event loop; evaluate_batch records its own metrics.
+        outcomes = evaluate_batch([(req["formula"], req["inputs"]) for req in requests], deadline=deadline)
+    return [result_row(req, outcome) for req, outcome in zip(requests, outcomes)]
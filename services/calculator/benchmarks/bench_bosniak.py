@@ -0,0 +1,126 @@
+"""
+Bosniak 2019 decision table: rule order tuned by frequency vs chain order, scalar vs columnar.
+
+    python benchmarks/bench_bosniak.py [--lesions 20000] [--repeat 5] [--seed 0] [--weights]
+
+Lesions are drawn from a reporting mix rather than the compendium ranges
+(workload.py draws every flag at random, which makes almost every lesion a
+Bosniak IV): mostly simple and minimally complex cysts, CT more often than
+MRI, and callers that leave out what they did not assess. Times the formula
+called directly with the table in its tuned order and in the chain's order,
+and columnar.evaluate over the whole batch; results are checked to be
+identical. --weights prints the hits per rule, for
+formulas/_decisions.py's BOSNIAK_WEIGHTS.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import columnar  # noqa: E402
+from formulas import FORMULAS, abdomen, _decisions  # noqa: E402
+from formulas._decisions import DecisionTable  # noqa: E402
+
+FORMULA = "classify_renal_cyst_bosniak_2019"
+
+# Share of lesions per kind, roughly as incidental renal cysts are reported.
+MIX = {"simple": 0.55, "minimal": 0.25, "iif": 0.08, "iii": 0.04, "iv": 0.04, "incomplete": 0.04}
+
+
+def lesion(rng: random.Random) -> dict:
+    mri = rng.random() < 0.3
+    kind = rng.choices(list(MIX), weights=list(MIX.values()))[0]
+    inputs = {"modalidade": rng.choice(["RM", "ressonância"] if mri else ["TC", "tc", "CT"])}
+    inputs["tamanho_lesao_mm"] = round(rng.uniform(5, 80), 1)
+    if kind == "simple":
+        if rng.random() < 0.3:
+            inputs["fluido_simples"] = True
+        elif mri:
+            inputs.update(hiperintenso_t2_csf=True, septos=False, calcificacao=False)
+        else:
+            inputs.update(homogeneo=True, atenuacao_hu_pre=round(rng.uniform(-5, 18), 1), realce_hu=rng.randint(0, 9))
+    elif kind == "minimal":
+        inputs.update(septos=rng.random() < 0.5, calcificacao=rng.random() < 0.3)
+        inputs.update(parede_espessura_mm=rng.choice([1, 2]), septos_espessura_mm=rng.choice([None, 1, 2]))
+        if mri:
+            inputs["hiperintenso_t1_marcado" if rng.random() < 0.5 else "hiperintenso_t2_csf"] = True
+        elif rng.random() < 0.3:
+            inputs["muito_pequeno_caracterizar"] = True
+        else:
+            inputs.update(homogeneo=True, atenuacao_hu_pre=rng.randint(21, 90))
+    elif kind == "iif":
+        inputs.update(septos=True, numero_septos=rng.randint(4, 8), septos_realce=True)
+        inputs["parede_espessura_mm" if rng.random() < 0.5 else "septos_espessura_mm"] = 3
+        if mri:
+            inputs["hiperintenso_t1_heterogeneo_fs"] = rng.random() < 0.3
+    elif kind == "iii":
+        inputs.update(parede_realce=True, parede_irregular=rng.random() < 0.5, parede_espessura_mm=rng.randint(4, 7))
+        inputs["realce_hu"] = rng.randint(20, 40)
+    elif kind == "iv":
+        inputs.update(nodulo_realce=True, nodulo_tamanho_mm=rng.choice([0, 3, 6, 12]))
+        inputs["nodulo_margem"] = rng.choice(["aguda", "obtusa"])
+        inputs["componentes_solidos"] = rng.random() < 0.5
+    else:
+        inputs["septos"] = rng.random() < 0.5
+    return {name: value for name, value in inputs.items() if value is not None}
+
+
+def run(calls: list[dict], repeat: int) -> tuple[float, list]:
+    """Best ns per call over `repeat` passes, and the results of the last one."""
+    formula = FORMULAS[FORMULA]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        results = [formula(**kwargs) for kwargs in calls]
+        best = min(best, (time.perf_counter_ns() - start) / len(calls))
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lesions", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--weights", action="store_true", help="print hits per rule and exit")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    calls = [lesion(rng) for _ in range(args.lesions)]
+    tuned = _decisions.BOSNIAK_2019
+    masks = [_decisions.BOSNIAK_FEATURES.mask(**kwargs) for kwargs in calls]
+    hits = [0] * len(tuned.rules)
+    for mask in masks:
+        for i, (required, forbidden, _) in enumerate(tuned.rules):
+            if mask & (required | forbidden) == required:
+                hits[i] += 1
+                break
+    if args.weights:
+        print(f"BOSNIAK_WEIGHTS = {tuple(hits)}")
+        return
+
+    abdomen.BOSNIAK_2019 = DecisionTable(*tuned.rules, default=tuned.default)
+    chained, expected = run(calls, args.repeat)
+    abdomen.BOSNIAK_2019 = tuned
+    quick, results = run(calls, args.repeat)
+    assert results == expected, "rule order changed a result"
+
+    columnar.available()
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter_ns()
+        batch = columnar.evaluate(FORMULA, calls)
+        best = min(best, (time.perf_counter_ns() - start) / len(calls))
+    assert batch == results, "columnar changed a result"
+
+    print(f"{args.lesions} lesions (ns per lesion, best of {args.repeat})")
+    print(f"chain order     : {chained:8.0f}")
+    print(f"tuned order     : {quick:8.0f}")
+    print(f"columnar        : {best:8.0f}")
+    print(f"rules by hits   : {sorted(range(len(hits)), key=hits.__getitem__, reverse=True)}")
+
+
+if __name__ == "__main__":
+    main()
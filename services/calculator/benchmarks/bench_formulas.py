@@ -0,0 +1,212 @@
+"""
+Per-formula microbenchmarks and /compute throughput, with stored baselines.
+
+    python benchmarks/bench_formulas.py run [--output results.json] [--compare baseline.json]
+    python benchmarks/bench_formulas.py compare baseline.json results.json [--threshold 0.10]
+
+`run` times every FORMULAS entry called directly (ns per call, best of
+--repeat) and counts, with tracemalloc, the memory blocks each call leaves
+allocated (retained blocks: what a call allocates and frees again does not
+show up), then posts /compute batches of 1, 100, 10k and 100k rows through an
+in-process client (rows per second). Inputs come from the compendium ranges (workload.py); the
+result cache is off unless --cache is given. `compare` flags formulas that got
+slower by more than --threshold or retain more blocks, and endpoint sizes whose
+rows/sec dropped by more than --threshold; it exits with status 1 if any did.
+
+benchmarks/baseline.json is the committed baseline, recorded with the default
+options. Block counts carry over between machines on the same Python; timings
+do not, so before comparing on another machine re-record it there with
+`run --output benchmarks/baseline.json` from the commit being compared against.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import workload  # noqa: E402
+
+ENDPOINT_SIZES = (1, 100, 10_000, 100_000)
+BLOCK_SLACK = 0.5  # blocks per call; allocator noise stays well below this
+
+
+def time_formula(fn, inputs: list[dict], repeat: int) -> float:
+    """Best ns per call over `repeat` passes through `inputs`, after one warm-up pass."""
+    for kwargs in inputs:
+        fn(**kwargs)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for kwargs in inputs:
+            fn(**kwargs)
+        best = min(best, (time.perf_counter_ns() - start) / len(inputs))
+    return best
+
+
+def retained_blocks_per_call(fn, inputs: list[dict]) -> float:
+    """Memory blocks still allocated per call, results kept alive.
+
+    Counted by tracemalloc, leaving out blocks allocated in this file (the
+    list holding the results) and by tracemalloc itself. This is not an
+    allocation count: blocks a call frees before it returns are gone by the
+    second snapshot and count as zero.
+    """
+    ignore = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+    results = []
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot().filter_traces(ignore)
+        for kwargs in inputs:
+            results.append(fn(**kwargs))
+        after = tracemalloc.take_snapshot().filter_traces(ignore)
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return blocks / len(inputs)
+
+
+def bench_formulas(names: list[str], calls: int, repeat: int, seed: int) -> dict:
+    from formulas import FORMULAS
+
+    generators = workload.input_generators()
+    rng = random.Random(seed)
+    results = {}
+    for name in names:
+        fn = FORMULAS[name]
+        inputs = workload.sample_inputs(generators[name], rng, calls)
+        results[name] = {
+            "ns_per_call": round(time_formula(fn, inputs, repeat), 1),
+            "retained_blocks_per_call": round(retained_blocks_per_call(fn, inputs), 2),
+        }
+    return results
+
+
+def bench_endpoint(sizes: list[int], repeat: int, seed: int) -> dict:
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    client = TestClient(app)
+    results = {}
+    for size in sizes:
+        body = json.dumps({"requests": workload.mixed_requests(size, seed)}).encode()
+        passes = max(1, min(repeat, 1_000_000 // (size * 10)))
+        best = float("inf")
+        for _ in range(passes):
+            start = time.perf_counter()
+            response = client.post("/compute", content=body, headers={"Content-Type": "application/json"})
+            best = min(best, time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+        results[str(size)] = {"rows_per_sec": round(size / best, 1), "seconds": round(best, 6)}
+    return results
+
+
+def run(args) -> dict:
+    import cache
+    from formulas import FORMULAS
+
+    if not args.cache:
+        cache.RESULTS.max_entries = 0
+
+    names = args.formulas or list(FORMULAS)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "calls": args.calls,
+            "repeat": args.repeat,
+            "cache": args.cache,
+        },
+        "formulas": bench_formulas(names, args.calls, args.repeat, args.seed),
+        "endpoint": bench_endpoint(args.sizes, args.repeat, args.seed) if args.sizes else {},
+    }
+    width = max(len(name) for name in names)
+    for name, row in report["formulas"].items():
+        blocks = row["retained_blocks_per_call"]
+        print(f"{name:<{width}}  {row['ns_per_call']:>10.1f} ns  {blocks:>6.2f} retained blocks")
+    for size, row in report["endpoint"].items():
+        print(f"/compute x{size:<7} {row['rows_per_sec']:>14,.0f} rows/s")
+    return report
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, now in current.get("formulas", {}).items():
+        then = baseline.get("formulas", {}).get(name)
+        if then is None:
+            continue
+        if now["ns_per_call"] > then["ns_per_call"] * (1 + threshold):
+            regressions.append(
+                f"{name}: {then['ns_per_call']:.0f} -> {now['ns_per_call']:.0f} ns/call "
+                f"(+{now['ns_per_call'] / then['ns_per_call'] - 1:.0%})"
+            )
+        blocks_then, blocks_now = then["retained_blocks_per_call"], now["retained_blocks_per_call"]
+        if blocks_now > blocks_then + BLOCK_SLACK:
+            regressions.append(f"{name}: {blocks_then:.2f} -> {blocks_now:.2f} retained blocks/call")
+    for size, now in current.get("endpoint", {}).items():
+        then = baseline.get("endpoint", {}).get(size)
+        if then is not None and now["rows_per_sec"] < then["rows_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"/compute x{size}: {then['rows_per_sec']:,.0f} -> {now['rows_per_sec']:,.0f} rows/s "
+                f"({now['rows_per_sec'] / then['rows_per_sec'] - 1:.0%})"
+            )
+    return regressions
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _report(regressions: list[str]) -> int:
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark and optionally save / compare")
+    run_parser.add_argument("--output", help="write the results JSON here")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved baseline")
+    run_parser.add_argument("--threshold", type=float, default=0.10)
+    run_parser.add_argument("--formulas", nargs="*", help="only these formulas")
+    run_parser.add_argument("--sizes", type=int, nargs="*", default=list(ENDPOINT_SIZES))
+    run_parser.add_argument("--calls", type=int, default=2000, help="inputs per formula")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--cache", action="store_true", help="keep the result cache on")
+
+    compare_parser = commands.add_parser("compare", help="compare two saved results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        sys.exit(_report(compare(_load(args.baseline), _load(args.current), args.threshold)))
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        sys.exit(_report(compare(_load(args.compare), report, args.threshold)))
+
+
+if __name__ == "__main__":
+    main()
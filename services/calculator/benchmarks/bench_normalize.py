@@ -0,0 +1,88 @@
+"""
+Categorical text normalization: memoized translate table vs per-call NFKD.
+
+    python benchmarks/bench_normalize.py [--calls 20000] [--repeat 5] [--seed 0]
+
+Times every formula that normalizes a text input (the classifier-heavy mix),
+called directly with compendium inputs (workload.py), once with the
+memoized _normalize_text and once with the previous NFKD-per-call version
+patched into the formula modules. Outputs are checked to be identical.
+"""
+import argparse
+import importlib
+import inspect
+import os
+import random
+import sys
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import workload  # noqa: E402
+from formulas import AREAS, FORMULAS, load_all  # noqa: E402
+from formulas import _common  # noqa: E402
+
+
+def nfkd_per_call(value):
+    if value is None:
+        return ""
+    normalized = unicodedata.normalize("NFKD", str(value))
+    return "".join(ch for ch in normalized if not unicodedata.combining(ch)).lower().strip()
+
+
+def classifiers() -> list[str]:
+    """Formulas whose source normalizes text, directly or through _as_bool."""
+    sources = {name: inspect.getsource(FORMULAS[name]) for name in FORMULAS}
+    return [name for name, source in sources.items() if "_normalize_text(" in source or "_as_bool(" in source]
+
+
+def patched(normalize):
+    modules = [_common] + [importlib.import_module(f"formulas.{area}") for area in AREAS]
+    for module in modules:
+        if hasattr(module, "_normalize_text"):
+            module._normalize_text = normalize
+
+
+def run(calls: list, repeat: int) -> tuple[float, list]:
+    """Best ns per call over `repeat` passes, and the results of the last one."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        results = [fn(**kwargs) for fn, kwargs in calls]
+        best = min(best, (time.perf_counter_ns() - start) / len(calls))
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    load_all()
+    names = classifiers()
+    generators = workload.input_generators()
+    rng = random.Random(args.seed)
+    calls = [
+        (FORMULAS[name], workload.sample_inputs(generators[name], rng, 1)[0])
+        for name in (names[i % len(names)] for i in range(args.calls))
+    ]
+
+    memoized = _common._normalize_text
+    patched(nfkd_per_call)
+    slow, expected = run(calls, args.repeat)
+    patched(memoized)
+    quick, results = run(calls, args.repeat)
+    assert results == expected, "normalization changed a formula result"
+
+    print(f"{len(names)} formulas, {args.calls} calls (ns per call, best of {args.repeat})")
+    print(f"NFKD per call   : {slow:8.0f}")
+    print(f"memoized table  : {quick:8.0f}")
+    print(f"speedup         : {slow / quick:8.2f}x")
+    print(f"cache           : {_common._fold.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
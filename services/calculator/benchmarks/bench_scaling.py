@@ -0,0 +1,68 @@
+"""
+Throughput scaling of the prefork launcher (serve.py) with its worker count.
+
+    python benchmarks/bench_scaling.py [--workers 1 2 4] [--duration 10] [--clients-per-worker 4]
+
+For each worker count a fresh serve.py is started and driven by loadgen's
+closed loop with --clients-per-worker clients per worker, using the same
+synthetic batches every time. Reports rows/sec, p99 and the efficiency
+against perfect linear scaling from one worker. Worker counts default to
+powers of two up to the CPU count. The load generator runs on the same host,
+so leave it a core when measuring the last step.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import loadgen  # noqa: E402
+
+
+def _default_workers() -> list[int]:
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def measure(workers: int, batches: list[bytes], clients: int, duration: float) -> dict:
+    server, url = loadgen.start_server(["--workers", str(workers)], serve=True)
+    try:
+        # Warm every worker before measuring.
+        asyncio.run(loadgen.closed_loop(url, batches, clients, min(duration, 2.0)))
+        return asyncio.run(loadgen.closed_loop(url, batches, clients, duration)).summary()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="*", default=_default_workers())
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients-per-worker", type=int, default=4)
+    parser.add_argument("--sizes", default=loadgen.DEFAULT_SIZES)
+    parser.add_argument("--batches", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    batches = loadgen.synthetic_batches(args.sizes, args.batches, args.seed)
+    base = None
+    print(f"{'workers':>7}  {'rows/s':>12}  {'p99 ms':>8}  {'speed-up':>8}  {'efficiency':>10}")
+    for workers in args.workers:
+        summary = measure(workers, batches, workers * args.clients_per_worker, args.duration)
+        base = base or summary["rows_per_sec"] / workers
+        speedup = summary["rows_per_sec"] / base
+        print(
+            f"{workers:>7}  {summary['rows_per_sec']:>12,.0f}  {summary['p99_ms']:>8.1f}  "
+            f"{speedup:>8.2f}  {speedup / workers:>10.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
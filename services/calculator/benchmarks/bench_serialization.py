@@ -0,0 +1,90 @@
+"""
+Parse + serialize cost per 10k rows: per-row Pydantic models vs fastpath.
+
+    python benchmarks/bench_serialization.py [--rows 10000] [--repeat 5]
+
+Formula evaluation is done once up front and excluded from both timings.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+import fastpath  # noqa: E402
+from engine import evaluate_batch  # noqa: E402
+from schemas import CalcBatch, CalcResult  # noqa: E402
+
+ROW_TEMPLATES = [
+    ("calculate_resistive_index", lambda i: {"psv": 100 + i % 40, "edv": i % 50}),
+    ("calculate_nascet_stenosis", lambda i: {"d_stenosis": i % 9, "d_distal": 10}),
+    ("calculate_rv_lv_ratio", lambda i: {"d_rv": 30 + i % 20, "d_lv": 40}),
+    ("classify_thyroid_nodule_tirads", lambda i: {
+        "composicao": "solida", "ecogenicidade": "hipoecoica", "forma": "mais_larga_que_alta",
+        "margens": "lobuladas", "focos_ecogenicos": "ausentes",
+    }),
+    ("measure_aortic_diameter", lambda i: {"d_aorta": 30 + i % 30, "localizacao": "Raiz"}),
+]
+
+_RESULTS = TypeAdapter(list[CalcResult])
+
+
+def build_body(rows: int) -> bytes:
+    requests = []
+    for i in range(rows):
+        formula, inputs = ROW_TEMPLATES[i % len(ROW_TEMPLATES)]
+        requests.append({"formula": formula, "inputs": inputs(i), "ref_id": f"finding-{i:06d}"})
+    return json.dumps({"requests": requests}).encode()
+
+
+def pydantic_models(body: bytes, outcomes) -> bytes:
+    batch = CalcBatch.model_validate_json(body)
+    results = [
+        CalcResult(ref_id=req.ref_id, formula=req.formula, result=result, error=error, error_code=code)
+        for req, (result, error, code) in zip(batch.requests, outcomes)
+    ]
+    # What FastAPI does with response_model=list[CalcResult].
+    validated = _RESULTS.validate_python(results)
+    return fastpath.dumps(_RESULTS.dump_python(validated, mode="json"))
+
+
+def fast(body: bytes, outcomes) -> bytes:
+    requests = fastpath.parse_batch(body)
+    return fastpath.render(requests, outcomes)
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    body = build_body(args.rows)
+    outcomes = evaluate_batch([(req["formula"], req["inputs"]) for req in json.loads(body)["requests"]])
+    fastpath.FAST_PATH = True
+    assert pydantic_models(body, outcomes) == fast(body, outcomes), "wire format drifted"
+
+    per_10k = 10_000 / args.rows
+    slow = best_of(lambda: pydantic_models(body, outcomes), args.repeat) * per_10k
+    quick = best_of(lambda: fast(body, outcomes), args.repeat) * per_10k
+    print(f"rows={args.rows}  (times are per 10k rows, best of {args.repeat})")
+    print(f"pydantic models : {slow * 1000:8.2f} ms")
+    print(f"fastpath        : {quick * 1000:8.2f} ms")
+    print(f"speedup         : {slow / quick:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Cold-start cost: module import time and time to the first /health answer.
+
+    python benchmarks/bench_startup.py [--runs 5] [--top 15] [--target-ms 1200]
+
+Each run starts a fresh `python -m uvicorn main:app` and polls /health until it
+answers; the reported figure is the median over the runs. The process exits
+with status 1 when that median misses --target-ms, so CI can hold the line.
+The import table comes from `python -X importtime -c "import main"`.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(top: int) -> tuple[float, list[tuple[float, str]]]:
+    """(total seconds for `import main`, heaviest (cumulative seconds, module) entries)."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=SERVICE_DIR, capture_output=True, text=True, check=True,
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        entries.append((int(cumulative) / 1e6, name.rstrip()))
+    total = next(seconds for seconds, name in entries if name.strip() == "main")
+    return total, sorted(entries, reverse=True)[:top]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_health(timeout: float = 30.0) -> float:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVICE_DIR,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        raise RuntimeError(f"/health did not answer within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target-ms", type=float, default=1200.0)
+    args = parser.parse_args()
+
+    total, heaviest = import_times(args.top)
+    print(f"import main      : {total * 1000:8.1f} ms")
+    for seconds, name in heaviest:
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    runs = [time_to_health() for _ in range(args.runs)]
+    median = statistics.median(runs)
+    print(f"first /health    : {median * 1000:8.1f} ms  (median of {args.runs}, target {args.target_ms:.0f} ms)")
+    if median * 1000 > args.target_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
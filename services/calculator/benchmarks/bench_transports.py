@@ -0,0 +1,114 @@
+"""
+The same /compute batches over TCP loopback, a Unix domain socket, and the
+in-process API (api.compute_batch).
+
+    python benchmarks/bench_transports.py [--sizes 1 100 10000] [--repeat 200]
+
+Both servers are serve.py with one worker, so only the transport differs.
+Batches are sent one at a time; the report gives the median and p99 time per
+batch and rows/sec for each transport and batch size. The in-process figure
+includes building the result rows but no JSON, which is the point.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import loadgen  # noqa: E402
+import workload  # noqa: E402
+
+
+def _wait(client: httpx.Client, server: subprocess.Popen):
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline:
+        try:
+            if client.get("/health").status_code == 200:
+                return
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError("server did not come up within 30s")
+
+
+def _timings(send, repeat: int) -> list[float]:
+    send()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        send()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def over_http(client: httpx.Client, body: bytes, repeat: int) -> list[float]:
+    def send():
+        response = client.post("/compute", content=body, headers={"Content-Type": "application/json"})
+        response.raise_for_status()
+        response.json()
+    return _timings(send, repeat)
+
+
+def in_process(requests: list[dict], repeat: int) -> list[float]:
+    from api import compute_batch
+
+    return _timings(lambda: compute_batch(requests), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1, 100, 10_000])
+    parser.add_argument("--repeat", type=int, default=200, help="batches per size (fewer for big batches)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results JSON here")
+    args = parser.parse_args()
+
+    uds = os.path.join(tempfile.mkdtemp(), "calc.sock")
+    tcp_server, url = loadgen.start_server(["--workers", "1"], serve=True)
+    uds_server = subprocess.Popen(
+        [sys.executable, "serve.py", "--uds", uds, "--workers", "1", "--log-level", "warning"],
+        cwd=loadgen.SERVICE_DIR,
+    )
+    clients = {
+        "tcp": httpx.Client(base_url=url, timeout=60),
+        "uds": httpx.Client(base_url="http://calc", transport=httpx.HTTPTransport(uds=uds), timeout=60),
+    }
+    report = {}
+    try:
+        _wait(clients["uds"], uds_server)
+        print(f"{'rows':>7}  {'transport':<10} {'median ms':>10} {'p99 ms':>10} {'rows/s':>12}")
+        for size in args.sizes:
+            requests = workload.mixed_requests(size, args.seed)
+            body = json.dumps({"requests": requests}).encode()
+            repeat = max(5, min(args.repeat, 200_000 // size))
+            runs = {name: over_http(client, body, repeat) for name, client in clients.items()}
+            runs["in-process"] = in_process(requests, repeat)
+            for name, timings in runs.items():
+                median = statistics.median(timings)
+                p99 = sorted(timings)[int(0.99 * (len(timings) - 1))]
+                report.setdefault(str(size), {})[name] = {
+                    "median_ms": round(median * 1000, 3), "p99_ms": round(p99 * 1000, 3),
+                    "rows_per_sec": round(size / median, 1),
+                }
+                print(f"{size:>7}  {name:<10} {median * 1000:>10.3f} {p99 * 1000:>10.3f} {size / median:>12,.0f}")
+    finally:
+        for client in clients.values():
+            client.close()
+        for server in (tcp_server, uds_server):
+            server.terminate()
+            server.wait()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Load generator and traffic replay for the calculator service.
+
+    python benchmarks/loadgen.py [--replay traffic.jsonl] [--concurrency 8 | --rps 50] [--duration 10]
+    python benchmarks/loadgen.py --sweep [--max-p99-ms 500]
+
+Starts `uvicorn main:app` (serve.py with --serve) on a free port, or targets
+--url, and posts /compute batches. With --replay, batches come from a
+JSON-lines file: a line holding a CalcBatch is replayed as is, single
+CalcRequest lines are grouped into batches of --batch-size, anything else is
+skipped. Without it, batches are synthetic: sizes drawn from --sizes
+(size:weight pairs) and rows drawn from every formula with inputs from the
+compendium ranges.
+
+--concurrency runs a closed loop (each client sends its next batch when the
+previous one answers); --rps runs an open loop at a fixed arrival rate.
+Reports p50/p95/p99 latency, requests and rows per second, and the HTTP and
+per-row error rates. --sweep doubles the concurrency until throughput stops
+growing by --min-gain or p99 passes --max-p99-ms, and names the saturation
+point. --priority picks the admission lane; shed requests count as HTTP 429s.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = "1:40,5:30,20:20,100:9,1000:1"
+
+
+def replay_batches(path: str, batch_size: int) -> list[bytes]:
+    batches, singles = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            if isinstance(record.get("requests"), list):
+                batches.append(json.dumps({"requests": record["requests"]}).encode())
+            elif isinstance(record.get("formula"), str) and isinstance(record.get("inputs"), dict):
+                singles.append(record)
+    for start in range(0, len(singles), batch_size):
+        batches.append(json.dumps({"requests": singles[start:start + batch_size]}).encode())
+    return batches
+
+
+def synthetic_batches(sizes: str, count: int, seed: int) -> list[bytes]:
+    import workload
+
+    weighted = [(int(size), float(weight)) for size, weight in (pair.split(":") for pair in sizes.split(","))]
+    rng = random.Random(seed)
+    generators = workload.input_generators()
+    names = list(generators)
+    batches = []
+    for _ in range(count):
+        size = rng.choices([size for size, _ in weighted], [weight for _, weight in weighted])[0]
+        requests = []
+        for i in range(size):
+            name = rng.choice(names)
+            inputs = workload.sample_inputs(generators[name], rng, 1)[0]
+            requests.append({"formula": name, "inputs": inputs, "ref_id": f"load-{i}"})
+        batches.append(json.dumps({"requests": requests}).encode())
+    return batches
+
+
+def _rows(body: bytes) -> int:
+    return body.count(b'"formula"')
+
+
+@dataclass
+class Stats:
+    latencies: list = field(default_factory=list)
+    rows: int = 0
+    http_errors: Counter = field(default_factory=Counter)
+    row_errors: Counter = field(default_factory=Counter)
+    elapsed: float = 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return float("nan")
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> dict:
+        requests = len(self.latencies) + sum(self.http_errors.values())
+        return {
+            "requests": requests,
+            "rows": self.rows,
+            "rps": requests / self.elapsed if self.elapsed else 0.0,
+            "rows_per_sec": self.rows / self.elapsed if self.elapsed else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "http_error_rate": sum(self.http_errors.values()) / requests if requests else 0.0,
+            "row_error_rate": sum(self.row_errors.values()) / self.rows if self.rows else 0.0,
+            "http_errors": dict(self.http_errors),
+            "row_errors": dict(self.row_errors),
+        }
+
+
+async def _send(client: httpx.AsyncClient, body: bytes, stats: Stats):
+    start = time.perf_counter()
+    try:
+        response = await client.post("/compute", content=body)
+    except httpx.HTTPError as e:
+        stats.http_errors[type(e).__name__] += 1
+        return
+    latency = time.perf_counter() - start
+    if response.status_code != 200:
+        stats.http_errors[str(response.status_code)] += 1
+        return
+    stats.latencies.append(latency)
+    results = response.json()
+    stats.rows += len(results)
+    stats.row_errors.update(item["error_code"] for item in results if item.get("error_code"))
+
+
+def _headers(priority: str) -> dict:
+    return {"Content-Type": "application/json", "X-Calc-Priority": priority}
+
+
+async def closed_loop(
+    url: str, batches: list[bytes], concurrency: int, duration: float, priority: str = "routine",
+) -> Stats:
+    stats = Stats()
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60, headers=_headers(priority)) as client:
+        async def client_loop(offset: int):
+            i = offset
+            while time.perf_counter() < deadline:
+                await _send(client, batches[i % len(batches)], stats)
+                i += concurrency
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client_loop(i) for i in range(concurrency)])
+        stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+async def open_loop(
+    url: str, batches: list[bytes], rps: float, duration: float, max_outstanding: int, priority: str = "routine",
+) -> Stats:
+    stats = Stats()
+    limits = httpx.Limits(max_connections=max_outstanding, max_keepalive_connections=max_outstanding)
+    outstanding: set = set()
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60, headers=_headers(priority)) as client:
+        start = time.perf_counter()
+        sent = 0
+        while (now := time.perf_counter()) - start < duration:
+            due = start + sent / rps
+            if due > now:
+                await asyncio.sleep(due - now)
+            if len(outstanding) >= max_outstanding:
+                # The server is not keeping up; count the arrival as shed.
+                stats.http_errors["client_backlog"] += 1
+            else:
+                task = asyncio.create_task(_send(client, batches[sent % len(batches)], stats))
+                outstanding.add(task)
+                task.add_done_callback(outstanding.discard)
+            sent += 1
+        if outstanding:
+            await asyncio.gather(*outstanding)
+        stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(extra_args: list[str], serve: bool = False) -> tuple[subprocess.Popen, str]:
+    """Start uvicorn (or serve.py, the prefork launcher) on a free port."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    launcher = ["serve.py", "--host", "127.0.0.1"] if serve else ["-m", "uvicorn", "main:app"]
+    server = subprocess.Popen(
+        [sys.executable, *launcher, "--port", str(port), "--log-level", "warning", *extra_args],
+        cwd=SERVICE_DIR,
+    )
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return server, url
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError("server did not come up within 30s")
+
+
+def _print(label: str, summary: dict):
+    print(
+        f"{label:<14} req/s {summary['rps']:9.1f}  rows/s {summary['rows_per_sec']:11.1f}  "
+        f"p50 {summary['p50_ms']:8.1f}  p95 {summary['p95_ms']:8.1f}  p99 {summary['p99_ms']:8.1f} ms  "
+        f"http err {summary['http_error_rate']:6.2%}  row err {summary['row_error_rate']:6.2%}"
+    )
+
+
+def sweep(url: str, batches: list[bytes], args) -> dict:
+    best, results = None, []
+    concurrency = 1
+    while concurrency <= args.max_concurrency:
+        summary = asyncio.run(closed_loop(url, batches, concurrency, args.duration, args.priority)).summary()
+        summary["concurrency"] = concurrency
+        results.append(summary)
+        _print(f"c={concurrency}", summary)
+        if summary["p99_ms"] > args.max_p99_ms:
+            print(f"p99 above {args.max_p99_ms:.0f} ms")
+            break
+        if best is not None and summary["rows_per_sec"] < best["rows_per_sec"] * (1 + args.min_gain):
+            break
+        if best is None or summary["rows_per_sec"] > best["rows_per_sec"]:
+            best = summary
+        concurrency *= 2
+    if best is not None:
+        print(
+            f"saturation at concurrency {best['concurrency']}: "
+            f"{best['rows_per_sec']:.0f} rows/s, p99 {best['p99_ms']:.1f} ms"
+        )
+    return {"saturation": best, "steps": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--serve", action="store_true", help="start serve.py instead of plain uvicorn")
+    parser.add_argument("--server-args", default="", help="extra server arguments, e.g. '--workers 4'")
+    parser.add_argument("--replay", help="JSON-lines traffic file")
+    parser.add_argument("--batch-size", type=int, default=20, help="rows per batch for single-request lines")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="synthetic batch sizes as size:weight,...")
+    parser.add_argument("--batches", type=int, default=500, help="distinct synthetic batches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--priority", choices=("urgent", "routine", "bulk"), default="routine")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int, default=8)
+    mode.add_argument("--rps", type=float)
+    mode.add_argument("--sweep", action="store_true")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run (per step when sweeping)")
+    parser.add_argument("--max-outstanding", type=int, default=256, help="open-loop in-flight cap")
+    parser.add_argument("--max-concurrency", type=int, default=256)
+    parser.add_argument("--max-p99-ms", type=float, default=1000.0)
+    parser.add_argument("--min-gain", type=float, default=0.05)
+    parser.add_argument("--output", help="write the summary JSON here")
+    args = parser.parse_args()
+
+    if args.replay:
+        batches = replay_batches(args.replay, args.batch_size)
+        if not batches:
+            parser.error(f"no CalcBatch or CalcRequest lines in {args.replay}")
+    else:
+        batches = synthetic_batches(args.sizes, args.batches, args.seed)
+    print(f"{len(batches)} batches, {sum(map(_rows, batches))} rows")
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_server(args.server_args.split(), args.serve)
+    try:
+        if args.sweep:
+            report = sweep(url, batches, args)
+        elif args.rps:
+            report = asyncio.run(
+                open_loop(url, batches, args.rps, args.duration, args.max_outstanding, args.priority)
+            ).summary()
+            _print(f"rps={args.rps:g}", report)
+        else:
+            report = asyncio.run(
+                closed_loop(url, batches, args.concurrency, args.duration, args.priority)
+            ).summary()
+            _print(f"c={args.concurrency}", report)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
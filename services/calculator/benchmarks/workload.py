@@ -0,0 +1,92 @@
+"""
+Synthetic formula inputs generated from the compendium (calc_blocks.json).
+
+Numbers are drawn from each input's valid_range, enums from valid_values,
+booleans at random. Compendium inputs are matched to parameters by position,
+as in the /formulas catalog; parameters without metadata fall back to 0-100.
+"""
+import inspect
+import json
+import os
+import random
+import re
+import sys
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import load_blocks  # noqa: E402
+from formulas import FORMULAS  # noqa: E402
+
+_RANGE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*-\s*(-?\d+(?:\.\d+)?)\s*$")
+_WORDS = re.compile(r"\s+ou\s+|/|,")
+
+
+def _number(meta: dict, annotation) -> Callable[[random.Random], Any]:
+    match = _RANGE.match(meta.get("valid_range") or "")
+    low, high = (float(match.group(1)), float(match.group(2))) if match else (0.0, 100.0)
+    if annotation is int:
+        return lambda rng: rng.randint(int(low), int(high))
+    return lambda rng: round(rng.uniform(low, high), 1)
+
+
+def _choices(meta: dict) -> list[str]:
+    if meta.get("valid_values"):
+        try:
+            return [str(value) for value in json.loads(meta["valid_values"])]
+        except ValueError:
+            pass
+    notes = re.sub(r"^.*\(|\).*$", "", meta.get("notes") or "")
+    return [word.strip() for word in _WORDS.split(notes) if word.strip()] or [""]
+
+
+def _generator(param: inspect.Parameter, meta: dict) -> Callable[[random.Random], Any]:
+    # The signature wins over the compendium type: formulas are called
+    # directly here, without the validator's coercion.
+    kind = (meta.get("type") or "").lower()
+    annotation = param.annotation
+    if annotation is bool or (kind == "boolean" and annotation is inspect.Parameter.empty):
+        return lambda rng: rng.random() < 0.5
+    if annotation in (int, float):
+        numbers = [float(value) for value in _choices(meta) if _RANGE.match(f"{value}-{value}")]
+        if kind == "enum" and numbers:
+            return lambda rng: annotation(rng.choice(numbers))
+        return _number(meta, annotation)
+    if kind in ("enum", "string") or annotation is str:
+        choices = _choices(meta)
+        return lambda rng: rng.choice(choices)
+    return _number(meta, annotation)
+
+
+def input_generators(blocks: dict[str, dict] = None) -> dict[str, dict[str, Callable]]:
+    """formula -> {parameter: generator(rng)} for every entry in FORMULAS."""
+    blocks = load_blocks() if blocks is None else blocks
+    generators = {}
+    for name in FORMULAS:
+        params = inspect.signature(FORMULAS[name]).parameters
+        metas = blocks.get(name, {}).get("inputs", [])
+        if len(metas) != len(params):
+            metas = [{}] * len(params)
+        generators[name] = {
+            param_name: _generator(param, meta) for (param_name, param), meta in zip(params.items(), metas)
+        }
+    return generators
+
+
+def sample_inputs(generators: dict[str, Callable], rng: random.Random, count: int) -> list[dict]:
+    return [{name: make(rng) for name, make in generators.items()} for _ in range(count)]
+
+
+def mixed_requests(count: int, seed: int = 0, formulas: list[str] = None) -> list[dict]:
+    """CalcRequest dicts cycling over `formulas` (default: all of them)."""
+    rng = random.Random(seed)
+    generators = input_generators()
+    names = formulas or list(generators)
+    return [
+        {
+            "formula": names[i % len(names)],
+            "inputs": sample_inputs(generators[names[i % len(names)]], rng, 1)[0],
+            "ref_id": f"bench-{i}",
+        }
+        for i in range(count)
+    ]
@@ -0,0 +1,144 @@
+"""
+Memoizing result cache in front of formula dispatch.
+
+Every formula is pure, so a (formula, inputs) pair always produces the same
+result. Keys carry a hash of the formulas package source, so results computed
+by a previous version of the formulas never match after a deploy.
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, Optional
+
+import formulas
+
+CACHE_MAX_ENTRIES = int(os.getenv("CALC_CACHE_MAX_ENTRIES", "50000"))
+CACHE_TTL_SECONDS = float(os.getenv("CALC_CACHE_TTL_SECONDS", "3600"))
+CACHE_WARM_FILE = os.getenv("CALC_CACHE_WARM_FILE")
+
+
+def _module_version() -> str:
+    digest = hashlib.sha256()
+    for path in formulas.source_files():
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+FORMULAS_VERSION = _module_version()
+
+MISS = object()
+
+
+def make_key(formula: str, inputs: dict[str, Any]) -> Optional[tuple]:
+    """Canonical key for a call, or None when an input value is not hashable."""
+    # The type is part of the key: 1 and 1.0 are equal but round() keeps ints
+    # as ints, so they serialize differently. So are 0.0 and -0.0, and a
+    # formula may return either; -0.0 is keyed by its repr. One flat tuple of
+    # (name, type, value) triples hashes faster than nested ones.
+    key = [FORMULAS_VERSION, formula]
+    for name in sorted(inputs):
+        value = inputs[name]
+        cls = value.__class__
+        if cls is float and value == 0.0 and math.copysign(1.0, value) < 0:
+            value = "-0.0"
+        key += (name, cls, value)
+    key = tuple(key)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class ResultCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Hashable, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "version": FORMULAS_VERSION,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+RESULTS = ResultCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+
+def read_replay(path: str) -> Iterator[tuple[str, dict]]:
+    """Yield (formula, inputs) calls from a JSON-lines traffic file.
+
+    Lines may hold a whole CalcBatch ({"requests": [...]}) or a single
+    CalcRequest; anything else is skipped.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            requests = record.get("requests") if isinstance(record.get("requests"), list) else [record]
+            for request in requests:
+                if (
+                    isinstance(request, dict)
+                    and isinstance(request.get("formula"), str)
+                    and isinstance(request.get("inputs"), dict)
+                ):
+                    yield request["formula"], request["inputs"]
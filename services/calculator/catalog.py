@@ -0,0 +1,138 @@
+"""
+Formula catalog served by /formulas.
+
+Built on the first request from the formula signatures, joined with the
+compendium metadata in data/compendium/calc_blocks.json (labels, units, valid
+ranges, evidence), then encoded and kept. Compendium inputs are listed in
+signature order, so they are matched to parameters by position. The strong
+ETag hashes the inputs of that body (the formulas source, the compendium file
+and this module), so it is known without building it.
+"""
+import hashlib
+import inspect
+import json
+import os
+import typing
+from functools import cache
+from typing import Any, Optional
+
+from cache import FORMULAS_VERSION
+from fastpath import dumps
+from formulas import FORMULAS
+
+CALC_BLOCKS_FILE = os.getenv(
+    "CALC_BLOCKS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "compendium", "calc_blocks.json"),
+)
+
+_TYPES = {float: "number", int: "integer", str: "string", bool: "boolean"}
+
+
+def _type_name(annotation) -> tuple[str, bool]:
+    """(JSON type, nullable) for a parameter annotation."""
+    if annotation in _TYPES:
+        return _TYPES[annotation], False
+    args = typing.get_args(annotation)
+    nullable = type(None) in args
+    names = {_TYPES.get(arg, "any") for arg in args if arg is not type(None)}
+    if names == {"integer", "number"}:
+        names = {"number"}
+    return (names.pop() if len(names) == 1 else "any"), nullable
+
+
+def load_blocks(path: Optional[str] = CALC_BLOCKS_FILE) -> dict[str, dict]:
+    """calc_blocks.json keyed by FunctionName; empty when the file is absent."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        blocks = json.load(f)
+    return {block["FunctionName"]: block for block in blocks.values() if block.get("FunctionName")}
+
+
+def _interpretation(block: dict) -> tuple[list[dict], dict]:
+    """The "- if:" / "then:" rules and any other "key: value" lines."""
+    rules, fields = [], {}
+    for line in block.get("interpretation", {}).get("raw", []):
+        key, _, value = line.partition(":")
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            value = value[1:-1]
+        if key == "- if":
+            rules.append({"if": value})
+        elif key == "then" and rules:
+            rules[-1]["then"] = value
+        elif key != "rules" and value:
+            fields[key] = value
+    return rules, fields
+
+
+def _parameter(name: str, param: inspect.Parameter, meta: dict) -> dict[str, Any]:
+    type_name, nullable = _type_name(param.annotation)
+    entry = {
+        "name": name,
+        "type": type_name,
+        "nullable": nullable,
+        "required": param.default is inspect.Parameter.empty,
+    }
+    if not entry["required"]:
+        entry["default"] = param.default
+    for key, source in (("label", "name"), ("unit", "unit"), ("valid_range", "valid_range"), ("notes", "notes")):
+        if meta.get(source):
+            entry[key] = meta[source]
+    return entry
+
+
+def _entry(name: str, fn, block: dict) -> dict[str, Any]:
+    params = inspect.signature(fn).parameters
+    metas = block.get("inputs", [])
+    if len(metas) != len(params):
+        metas = []
+    rules, fields = _interpretation(block)
+    entry = {
+        "name": name,
+        "item_id": block.get("ItemID"),
+        "parameters": [
+            _parameter(param_name, param, metas[i] if metas else {})
+            for i, (param_name, param) in enumerate(params.items())
+        ],
+        **fields,
+    }
+    if rules:
+        entry["interpretation"] = rules
+    if block.get("evidence"):
+        entry["evidence"] = block["evidence"]
+    return entry
+
+
+def build(blocks: dict[str, dict]) -> bytes:
+    return dumps({
+        "formulas": [_entry(name, fn, blocks.get(name, {})) for name, fn in FORMULAS.items()],
+    })
+
+
+@cache
+def body() -> bytes:
+    return build(load_blocks())
+
+
+def _etag() -> str:
+    digest = hashlib.sha256(FORMULAS_VERSION.encode("ascii"))
+    for path in (CALC_BLOCKS_FILE, __file__):
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return '"' + digest.hexdigest()[:32] + '"'
+
+
+ETAG = _etag()
+
+
+def not_modified(if_none_match: Optional[str]) -> bool:
+    """If-None-Match uses the weak comparison, so a W/ prefix still matches."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == ETAG:
+            return True
+    return False
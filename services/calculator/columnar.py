@@ -0,0 +1,439 @@
+"""
+Columnar kernels - evaluate a whole group of same-formula rows as NumPy arrays.
+
+Each kernel repeats the arithmetic of its scalar twin in the formulas package
+in the same order, so the intermediate floats are bit-identical. Final
+rounding uses the builtin round() (np.round rounds differently on ties), and
+inputs that were Python ints keep int results where the scalar function would.
+Categories come from the same Ladder tables the scalar functions use.
+Classifiers of categorical inputs take their columns as given: each value is
+normalized as the scalar function does, coded, and the whole column is looked
+up in the formula's OutcomeTable at once. Decision-table classifiers turn
+their (optional) columns into fact masks and pick each row's first rule.
+"""
+import math
+from operator import itemgetter
+from typing import Callable, Optional
+
+from formulas import _decisions as decisions, _ladders as ladders, _tables as tables
+from formulas._common import _as_bool, _normalize_text
+from formulas._decisions import DecisionTable, Features
+from formulas._ladders import Ladder
+from formulas._tables import OutcomeTable
+
+# numpy is imported by the first available() call rather than at startup;
+# it is only needed once a batch is large enough for the kernels.
+np = None
+_MISSING = False
+
+_MAX_EXACT_INT = 2 ** 53
+
+
+def available() -> bool:
+    global np, _MISSING
+    if np is None and not _MISSING:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - numpy is optional
+            _MISSING = True
+            return False
+        np = numpy
+    return np is not None
+
+
+class _Columns:
+    def __init__(self, values: dict[str, list], kinds: dict[str, set]):
+        self._values = values
+        self._kinds = kinds
+        self._arrays = {}
+
+    def __getitem__(self, name: str):
+        array = self._arrays.get(name)
+        if array is None:
+            array = np.array(self._values[name], dtype=np.float64)
+            self._arrays[name] = array
+        return array
+
+    def ints(self, *names: str):
+        size = len(self._values[names[0]])
+        mask = np.ones(size, dtype=bool)
+        for name in names:
+            kinds = self._kinds[name]
+            if float in kinds:
+                mask &= np.array([type(v) is int for v in self._values[name]], dtype=bool)
+            if int not in kinds:
+                mask[:] = False
+        return mask
+
+
+def _round(values, precision: int, ints=None) -> list:
+    # rint(x * 10**p) / 10**p is exactly what round() returns unless x * 10**p
+    # landed within float error of a .5 tie; only those rows go through round().
+    scale = 10.0 ** precision
+    scaled = values * scale
+    rounded = (np.rint(scaled) / scale).tolist()
+    distance = np.abs(scaled - np.floor(scaled) - 0.5)
+    suspect = (distance <= np.abs(scaled) * 1e-12) | ~(np.abs(scaled) < _MAX_EXACT_INT)
+    if ints is not None:
+        suspect |= ints
+    if suspect.any():
+        originals = values.tolist()
+        is_int = ints.tolist() if ints is not None else None
+        for i in np.flatnonzero(suspect).tolist():
+            if is_int is not None and is_int[i]:
+                rounded[i] = int(originals[i])
+            else:
+                rounded[i] = round(originals[i], precision)
+    return rounded
+
+
+def _select(values: list, ladder: Ladder) -> list:
+    return ladder.select(np.array(values, dtype=np.float64))
+
+
+def _div(numerator, denominator):
+    valid = denominator != 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        quotient = numerator / np.where(valid, denominator, 1.0)
+    return quotient, valid
+
+
+def _rows(values: list, categories: list, valid=None, **extras) -> list[dict]:
+    if not extras and (valid is None or valid.all()):
+        return [{"value": value, "category": category} for value, category in zip(values, categories)]
+    results = []
+    valid_list = valid.tolist() if valid is not None else None
+    extra_items = list(extras.items())
+    for i, value in enumerate(values):
+        if valid_list is not None and not valid_list[i]:
+            results.append({"value": None})
+            continue
+        payload = {"value": value, "category": categories[i]}
+        for key, column in extra_items:
+            payload[key] = column[i]
+        results.append(payload)
+    return results
+
+
+def _ratio_kernel(num: Callable, den: Callable, precision: int, ladder: Ladder):
+    def kernel(cols):
+        value, valid = _div(num(cols), den(cols))
+        rounded = _round(value, precision)
+        return _rows(rounded, _select(rounded, ladder), valid)
+    return kernel
+
+
+def _percent_kernel(num: Callable, den: Callable, ladder: Ladder):
+    def kernel(cols):
+        value, valid = _div(num(cols), den(cols))
+        rounded = _round(value * 100, 1)
+        return _rows(rounded, _select(rounded, ladder), valid)
+    return kernel
+
+
+def _ellipsoid_kernel(a: str, b: str, c: str, ladder: Ladder):
+    def kernel(cols):
+        rounded = _round(0.52 * cols[a] * cols[b] * cols[c], 1)
+        return _rows(rounded, _select(rounded, ladder))
+    return kernel
+
+
+def _measure_kernel(name: str, ladder: Ladder):
+    def kernel(cols):
+        rounded = _round(cols[name], 1, cols.ints(name))
+        return _rows(rounded, _select(rounded, ladder))
+    return kernel
+
+
+def _ri(cols):
+    return cols["psv"] - cols["edv"]
+
+
+def _aaa_growth_rate(cols):
+    d_atual = cols["d_atual"]
+    value, valid = _div(d_atual - cols["d_anterior"], cols["intervalo_anos"])
+    rounded = _round(value, 1)
+    categories = ladders.AAA_DIAMETER.select(d_atual)
+    rapid = [v > 3.0 for v in rounded]
+    return _rows(rounded, categories, valid, rapid_growth=rapid)
+
+
+def _adrenal_absolute_washout(cols):
+    portal = cols["hu_portal"]
+    value, valid = _div(portal - cols["hu_tardia"], portal - cols["hu_nc"])
+    rounded = _round(value * 100, 1)
+    return _rows(rounded, _select(rounded, ladders.ADRENAL_WASHOUT), valid)
+
+
+def _hepatic_steatosis_ct(cols):
+    rounded = _round(cols["hu_figado"] - cols["hu_rim"], 1, cols.ints("hu_figado", "hu_rim"))
+    categories = _select(rounded, ladders.STEATOSIS_CT)
+    return _rows(rounded, categories)
+
+
+def _bladder_outlet_obstruction(cols):
+    names = ("pressao_detrusor_max", "fluxo_urinario_max")
+    rounded = _round(cols[names[0]] - 2 * cols[names[1]], 1, cols.ints(*names))
+    categories = _select(rounded, ladders.BLADDER_OUTLET_OBSTRUCTION)
+    return _rows(rounded, categories)
+
+
+def _stone_skin_distance_mean(cols):
+    rounded = _round((cols["ssd_1"] + cols["ssd_2"] + cols["ssd_3"]) / 3, 1)
+    return [{"value": value} for value in rounded]
+
+
+# formula name -> (parameter names, kernel)
+KERNELS: dict[str, tuple[tuple[str, ...], Callable]] = {
+    "calculate_resistive_index": (("psv", "edv"), _ratio_kernel(
+        _ri, lambda c: c["psv"], 2, ladders.RESISTIVE_INDEX,
+    )),
+    "calculate_hepatic_artery_ri": (("psv", "edv"), _ratio_kernel(
+        _ri, lambda c: c["psv"], 2, ladders.VISCERAL_ARTERY_RI,
+    )),
+    "calculate_splenic_artery_ri": (("psv", "edv"), _ratio_kernel(
+        _ri, lambda c: c["psv"], 2, ladders.VISCERAL_ARTERY_RI,
+    )),
+    "calculate_renal_transplant_ri": (("psv", "edv"), _ratio_kernel(
+        _ri, lambda c: c["psv"], 2, ladders.RENAL_TRANSPLANT_RI,
+    )),
+    "calculate_pulsatility_index": (("psv", "edv", "v_mean"), _ratio_kernel(
+        _ri, lambda c: c["v_mean"], 2, ladders.PULSATILITY_INDEX,
+    )),
+    "calculate_portal_vein_congestion_index": (("v_max_portal", "v_min_portal"), _ratio_kernel(
+        lambda c: c["v_max_portal"] - c["v_min_portal"], lambda c: c["v_max_portal"], 2, ladders.PORTAL_CONGESTION,
+    )),
+    "calculate_rv_lv_ratio": (("d_rv", "d_lv"), _ratio_kernel(
+        lambda c: c["d_rv"], lambda c: c["d_lv"], 2, ladders.RV_LV_RATIO,
+    )),
+    "calculate_pa_aorta_ratio": (("d_pa", "d_ao"), _ratio_kernel(
+        lambda c: c["d_pa"], lambda c: c["d_ao"], 2, ladders.PA_AORTA_RATIO,
+    )),
+    "calculate_hepatorenal_index": (("atenuacao_figado", "atenuacao_rim"), _ratio_kernel(
+        lambda c: c["atenuacao_figado"] - c["atenuacao_rim"], lambda c: c["atenuacao_rim"], 2,
+        ladders.HEPATORENAL_INDEX,
+    )),
+    "calculate_height_adjusted_tkv": (("volume_renal_total", "altura"), _ratio_kernel(
+        lambda c: c["volume_renal_total"], lambda c: c["altura"], 2, ladders.HEIGHT_ADJUSTED_TKV,
+    )),
+    "calculate_ankle_brachial_index": (("p_tornozelo", "p_braquial"), _ratio_kernel(
+        lambda c: c["p_tornozelo"], lambda c: c["p_braquial"], 2, ladders.ANKLE_BRACHIAL,
+    )),
+    "calculate_prostate_psa_density": (("psa", "volume_prostata"), _ratio_kernel(
+        lambda c: c["psa"], lambda c: c["volume_prostata"], 3, ladders.PSA_DENSITY,
+    )),
+    "calculate_transition_zone_psa_density": (("psa", "volume_tz"), _ratio_kernel(
+        lambda c: c["psa"], lambda c: c["volume_tz"], 3, ladders.TZ_PSA_DENSITY,
+    )),
+    "calculate_nascet_stenosis": (("d_stenosis", "d_distal"), _percent_kernel(
+        lambda c: c["d_distal"] - c["d_stenosis"], lambda c: c["d_distal"], ladders.CAROTID_STENOSIS,
+    )),
+    "calculate_ecst_stenosis": (("d_estenose", "d_proximal"), _percent_kernel(
+        lambda c: c["d_proximal"] - c["d_estenose"], lambda c: c["d_proximal"], ladders.CAROTID_STENOSIS,
+    )),
+    "calculate_ivc_collapsibility_index": (("d_max_inspiracao", "d_min_expira_o"), _percent_kernel(
+        lambda c: c["d_max_inspiracao"] - c["d_min_expira_o"], lambda c: c["d_max_inspiracao"],
+        ladders.IVC_COLLAPSIBILITY,
+    )),
+    "calculate_emphysema_index_laa": (("voxels_950_hu", "voxels_totais_pulmao"), _percent_kernel(
+        lambda c: c["voxels_950_hu"], lambda c: c["voxels_totais_pulmao"], ladders.EMPHYSEMA_LAA,
+    )),
+    "calculate_adrenal_signal_intensity_index": (("sinal_in_phase", "sinal_opposed_phase"), _percent_kernel(
+        lambda c: c["sinal_in_phase"] - c["sinal_opposed_phase"], lambda c: c["sinal_in_phase"],
+        ladders.ADRENAL_SIGNAL_INDEX,
+    )),
+    "calculate_adrenal_absolute_washout": (("hu_nc", "hu_portal", "hu_tardia"), _adrenal_absolute_washout),
+    "calculate_aaa_growth_rate": (("d_atual", "d_anterior", "intervalo_anos"), _aaa_growth_rate),
+    "calculate_splenic_volume_ellipsoid": (("comprimento", "largura", "espessura"), _ellipsoid_kernel(
+        "comprimento", "largura", "espessura", ladders.SPLENIC_VOLUME,
+    )),
+    "calculate_prostate_volume_ellipsoid": (("comprimento", "largura", "altura"), _ellipsoid_kernel(
+        "comprimento", "largura", "altura", ladders.PROSTATE_VOLUME,
+    )),
+    "calculate_ovarian_volume_ellipsoid": (("comprimento", "largura", "espessura"), _ellipsoid_kernel(
+        "comprimento", "largura", "espessura", ladders.OVARIAN_VOLUME,
+    )),
+    "calculate_uterine_fibroid_volume": (("comprimento", "largura", "altura"), _ellipsoid_kernel(
+        "comprimento", "largura", "altura", ladders.FIBROID_VOLUME,
+    )),
+    "grade_hepatic_steatosis_ct": (("hu_figado", "hu_rim"), _hepatic_steatosis_ct),
+    "calculate_bladder_outlet_obstruction_index": (
+        ("pressao_detrusor_max", "fluxo_urinario_max"), _bladder_outlet_obstruction,
+    ),
+    "calculate_stone_skin_distance_mean": (("ssd_1", "ssd_2", "ssd_3"), _stone_skin_distance_mean),
+    "measure_bile_duct_diameter": (("d_ducto_biliar",), _measure_kernel(
+        "d_ducto_biliar", ladders.BILE_DUCT_DIAMETER,
+    )),
+    "measure_gallbladder_wall_thickness": (("espessura_parede",), _measure_kernel(
+        "espessura_parede", ladders.GALLBLADDER_WALL,
+    )),
+    "measure_bowel_wall_thickness": (("espessura_parede",), _measure_kernel(
+        "espessura_parede", ladders.BOWEL_WALL,
+    )),
+    "measure_visceral_fat_area": (("vfa_cm2",), _measure_kernel("vfa_cm2", ladders.VISCERAL_FAT_AREA)),
+    "measure_renal_artery_psv": (("psv_cm_s",), _measure_kernel("psv_cm_s", ladders.RENAL_ARTERY_PSV)),
+    "measure_renal_artery_edv": (("edv_cm_s",), _measure_kernel("edv_cm_s", ladders.RENAL_ARTERY_EDV)),
+    "measure_adrenal_size": (("diametro_max",), _measure_kernel("diametro_max", ladders.ADRENAL_SIZE)),
+    "measure_bile_duct_stone_diameter": (("d_calcul",), _measure_kernel("d_calcul", ladders.BILE_DUCT_STONE)),
+    "measure_post_void_residual_volume": (("volume_residuo",), _measure_kernel(
+        "volume_residuo", ladders.POST_VOID_RESIDUAL,
+    )),
+    "measure_rectal_wall_thickness": (("espessura_parede",), _measure_kernel(
+        "espessura_parede", ladders.RECTAL_WALL,
+    )),
+    "measure_circumferential_resection_margin": (("distancia_crm",), _measure_kernel(
+        "distancia_crm", ladders.RESECTION_MARGIN,
+    )),
+    "measure_rectal_cancer_depth": (("profundidade_invasao",), _measure_kernel(
+        "profundidade_invasao", ladders.RECTAL_CANCER_DEPTH,
+    )),
+}
+
+
+def _upper(value) -> str:
+    return _normalize_text(value).upper()
+
+
+def _coded(table: OutcomeTable, columns: list[list], keys: tuple) -> list:
+    return table.select(*(
+        table.encode(field, column, key) for field, (column, key) in enumerate(zip(columns, keys))
+    ))
+
+
+def _table_kernel(table: OutcomeTable, *keys: Optional[Callable]):
+    """{"value": outcome} rows, each column normalized by its key function."""
+    def kernel(columns):
+        return [{"value": outcome} for outcome in _coded(table, columns, keys)]
+    return kernel
+
+
+def _rectal_cancer_tnm(columns):
+    t, n, m = (list(map(_upper, column)) for column in columns)
+    categories = _coded(tables.RECTAL_TNM, [t, n, m], (None, None, None))
+    return [
+        {"value": f"{t_val}{n_val}{m_val}", "category": category}
+        for t_val, n_val, m_val, category in zip(t, n, m, categories)
+    ]
+
+
+# formula name -> (parameter names, kernel over the raw input columns)
+CODED_KERNELS: dict[str, tuple[tuple[str, ...], Callable]] = {
+    "classify_aortic_dissection_stanford": (("envolve_ascendente", "localizacao_lacera_o"), _table_kernel(
+        tables.STANFORD, _as_bool, _normalize_text,
+    )),
+    "grade_mesenteric_fat_stranding": (("grau_stranding",), _table_kernel(
+        tables.MESENTERIC_STRANDING, _normalize_text,
+    )),
+    "classify_hepatic_vein_doppler": (("padr_o_fluxo",), _table_kernel(
+        tables.HEPATIC_VEIN_DOPPLER, _normalize_text,
+    )),
+    "classify_rectal_cancer_tnm": (("t_stage", "n_stage", "m_stage"), _rectal_cancer_tnm),
+    "classify_thyroid_nodule_tirads": (
+        ("composicao", "ecogenicidade", "forma", "margens", "focos_ecogenicos"),
+        _table_kernel(tables.TIRADS, *[_normalize_text] * 5),
+    ),
+}
+
+
+# formula name -> (Features, DecisionTable); None outcomes are "Indeterminado".
+DECISION_KERNELS: dict[str, tuple[Features, DecisionTable]] = {
+    "classify_renal_cyst_bosniak_2019": (decisions.BOSNIAK_FEATURES, decisions.BOSNIAK_2019),
+}
+
+
+def supports(formula: str) -> bool:
+    return np is not None and (formula in KERNELS or formula in CODED_KERNELS or formula in DECISION_KERNELS)
+
+
+def _eligible(inputs: dict, params: tuple[str, ...]) -> bool:
+    if len(inputs) != len(params):
+        return False
+    for name in params:
+        value = inputs.get(name)
+        kind = type(value)
+        if kind is float:
+            if not math.isfinite(value):
+                return False
+        elif kind is int:
+            if not -_MAX_EXACT_INT < value < _MAX_EXACT_INT:
+                return False
+        else:
+            return False
+    return True
+
+
+def _clean_columns(rows: list[dict], params: tuple[str, ...]) -> Optional[_Columns]:
+    # Whole-group check: the common case is every row carrying exactly the
+    # parameters as finite floats/ints, which needs no per-row branching.
+    if set(map(len, rows)) != {len(params)}:
+        return None
+    values, kinds = {}, {}
+    for name in params:
+        column = [row.get(name) for row in rows]
+        column_kinds = set(map(type, column))
+        if not column_kinds <= {float, int}:
+            return None
+        values[name], kinds[name] = column, column_kinds
+    columns = _Columns(values, kinds)
+    for name in params:
+        array = columns[name]
+        if not np.isfinite(array).all():
+            return None
+        if int in kinds[name] and (np.abs(array) >= _MAX_EXACT_INT).any():
+            return None
+    return columns
+
+
+def evaluate(formula: str, rows: list[dict]) -> list[Optional[dict]]:
+    """Run `formula` over `rows`; rows the kernel cannot take come back as None."""
+    if not available():
+        return [None] * len(rows)
+    if formula in CODED_KERNELS:
+        return _evaluate_coded(formula, rows)
+    if formula in DECISION_KERNELS:
+        return _evaluate_decision(formula, rows)
+    params, kernel = KERNELS[formula]
+    columns = _clean_columns(rows, params)
+    if columns is not None:
+        return kernel(columns)
+
+    positions = [i for i, inputs in enumerate(rows) if _eligible(inputs, params)]
+    results: list[Optional[dict]] = [None] * len(rows)
+    if not positions:
+        return results
+    columns = _clean_columns([rows[i] for i in positions], params)
+    for i, result in zip(positions, kernel(columns)):
+        results[i] = result
+    return results
+
+
+def _evaluate_coded(formula: str, rows: list[dict]) -> list[Optional[dict]]:
+    # Any value normalizes, so only rows with exactly the parameters qualify.
+    params, kernel = CODED_KERNELS[formula]
+    names = set(params)
+    positions = [i for i, inputs in enumerate(rows) if inputs.keys() == names]
+    if len(positions) == len(rows):
+        return kernel([list(map(itemgetter(name), rows)) for name in params])
+    results: list[Optional[dict]] = [None] * len(rows)
+    if positions:
+        eligible = [rows[i] for i in positions]
+        for i, result in zip(positions, kernel([list(map(itemgetter(name), eligible)) for name in params])):
+            results[i] = result
+    return results
+
+
+def _evaluate_decision(formula: str, rows: list[dict]) -> list[Optional[dict]]:
+    # Parameters are optional: rows may leave any out, but no others.
+    features, table = DECISION_KERNELS[formula]
+    names = set(features.params)
+    positions = [i for i, inputs in enumerate(rows) if inputs.keys() <= names]
+    results: list[Optional[dict]] = [None] * len(rows)
+    if not positions:
+        return results
+    eligible = rows if len(positions) == len(rows) else [rows[i] for i in positions]
+    masks, usable = features.masks(eligible)
+    categories, _ = table.select(masks)
+    for i, category, ok in zip(positions, categories, usable.tolist()):
+        if ok:
+            results[i] = {"value": category} if category is not None else {"value": None, "category": "Indeterminado"}
+    return results
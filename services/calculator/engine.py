@@ -0,0 +1,244 @@
+"""
+Batch dispatch shared by every entry point of the calculator service.
+"""
+import os
+from collections import Counter, defaultdict
+from functools import cache
+from time import monotonic, perf_counter
+from typing import Any, Optional
+
+import metrics
+from cache import MISS, RESULTS, make_key, read_replay
+from formulas import FORMULAS
+from validation import DEADLINE_EXCEEDED, FORMULA_ERROR, UNKNOWN_FORMULA, VALIDATORS
+
+# Formula groups smaller than this run row by row; array setup is not free.
+COLUMNAR_MIN_ROWS = int(os.getenv("CALC_COLUMNAR_MIN_ROWS", "64"))
+
+# Identical (formula, inputs) rows in a batch are evaluated once and fanned out.
+BATCH_DEDUP = os.getenv("CALC_BATCH_DEDUP", "1") == "1"
+
+# (result, error, error_code)
+Outcome = tuple[Any, Optional[str], Optional[str]]
+
+
+def _not_found(formula: str) -> Outcome:
+    return None, f"Formula '{formula}' not found", UNKNOWN_FORMULA
+
+
+def _expired() -> Outcome:
+    return None, "Deadline exceeded before the row was evaluated", DEADLINE_EXCEEDED
+
+
+def _call(fn, inputs: dict) -> Outcome:
+    try:
+        return fn(**inputs), None, None
+    except Exception as e:
+        return None, str(e), FORMULA_ERROR
+
+
+def _own(result):
+    """A copy of a result for one caller.
+
+    Cached and deduplicated results would otherwise be one dict shared by
+    every row and request that gets them. Results are flat: nested values
+    only come from unhashable inputs, which are never cached or deduplicated.
+    """
+    return result.copy() if result.__class__ is dict else result
+
+
+def _remember(key, outcome: Outcome):
+    if key is not None and outcome[1] is None:
+        RESULTS.put(key, _own(outcome[0]))
+
+
+def evaluate(formula: str, inputs: dict) -> Outcome:
+    validator = VALIDATORS.get(formula)
+    if validator is None:
+        return _not_found(formula)
+    checked, code, error = validator(inputs)
+    if checked is None:
+        return None, error, code
+    key = make_key(formula, checked) if RESULTS.enabled else None
+    if key is not None:
+        cached = RESULTS.get(key, MISS)
+        if cached is not MISS:
+            return _own(cached), None, None
+    outcome = _call(validator.fn, checked)
+    _remember(key, outcome)
+    return outcome
+
+
+def _columnar():
+    """The columnar module if NumPy is installed, or None.
+
+    Like the area modules, columnar (which loads the ladders and tables) and
+    formulas._common are imported on first use, not at startup; serve.py and
+    the pool workers preload them.
+    """
+    import columnar
+
+    return columnar if columnar.available() else None
+
+
+@cache
+def _helpers(formula: str) -> frozenset:
+    """The shared helpers a formula calls."""
+    from formulas._common import SHARED_HELPERS
+
+    return SHARED_HELPERS.intersection(FORMULAS[formula].__code__.co_names)
+
+
+def _shares_helpers(formulas: set[str]) -> bool:
+    """True if two different formulas call the same shared helper.
+
+    Identical rows are already deduplicated, so the memo only pays for its
+    lookups when sibling formulas feed a helper the same arguments.
+    """
+    users = Counter(helper for formula in formulas for helper in _helpers(formula))
+    return any(count > 1 for count in users.values())
+
+
+def evaluate_batch(
+    calls: list[tuple[str, dict]], sample: Optional[metrics.Sample] = None, deadline: Optional[float] = None,
+) -> list[Outcome]:
+    """Evaluate calls in order; metrics go to `sample` if given, else the registry.
+
+    `deadline` is a time.monotonic() instant. It is checked between rows (a
+    row already running is not interrupted); rows not evaluated by then come
+    back as deadline_exceeded. Validation errors and cache hits are always
+    returned.
+    """
+    # Checked against the perf_counter() readings the latency metrics take anyway.
+    stop = float("inf") if deadline is None else perf_counter() + deadline - monotonic()
+    record = sample is None
+    if record:
+        sample = metrics.Sample()
+    outcomes: list[Optional[Outcome]] = [None] * len(calls)
+    use_cache = RESULTS.enabled
+    seen: Optional[dict] = {} if BATCH_DEDUP else None
+    duplicates = []
+    pending = []
+    began = perf_counter()
+    for i, (formula, inputs) in enumerate(calls):
+        key = make_key(formula, inputs) if use_cache or seen is not None else None
+        if seen is not None and key is not None:
+            first = seen.setdefault(key, i)
+            if first != i:
+                duplicates.append((i, first))
+                continue
+        validator = VALIDATORS.get(formula)
+        if validator is None:
+            outcomes[i] = _not_found(formula)
+            sample.error(formula, UNKNOWN_FORMULA)
+            continue
+        sample.call(formula)
+        checked, code, error = validator(inputs)
+        if checked is None:
+            outcomes[i] = (None, error, code)
+            sample.error(formula, code)
+            continue
+        if not use_cache:
+            key = None
+        elif checked is not inputs and key is not None:
+            key = make_key(formula, checked)
+        if key is not None:
+            cached = RESULTS.get(key, MISS)
+            if cached is not MISS:
+                outcomes[i] = (_own(cached), None, None)
+                continue
+        pending.append((i, validator.fn, checked, key))
+    sample.validation += perf_counter() - began
+
+    if len(pending) >= COLUMNAR_MIN_ROWS and (columnar := _columnar()) is not None:
+        groups = defaultdict(list)
+        for row in pending:
+            formula = calls[row[0]][0]
+            if columnar.supports(formula):
+                groups[formula].append(row)
+        for formula, rows in groups.items():
+            if len(rows) < COLUMNAR_MIN_ROWS:
+                continue
+            start = perf_counter()
+            if start >= stop:
+                break
+            results = columnar.evaluate(formula, [row[2] for row in rows])
+            done = 0
+            for (i, _, _, key), result in zip(rows, results):
+                if result is not None:
+                    outcomes[i] = (result, None, None)
+                    _remember(key, outcomes[i])
+                    done += 1
+            if done:
+                sample.observe(formula, perf_counter() - start, done)
+
+    scalar = [row for row in pending if outcomes[row[0]] is None]
+    from formulas._common import HELPER_MEMO, HelperMemo
+
+    memo = HelperMemo() if _shares_helpers({calls[row[0]][0] for row in scalar}) else None
+    token = HELPER_MEMO.set(memo)
+    try:
+        for n, (i, fn, inputs, key) in enumerate(scalar):
+            start = perf_counter()
+            if start >= stop:
+                for row in scalar[n:]:
+                    outcomes[row[0]] = _expired()
+                    sample.error(calls[row[0]][0], DEADLINE_EXCEEDED)
+                break
+            outcome = outcomes[i] = _call(fn, inputs)
+            formula = calls[i][0]
+            sample.observe(formula, perf_counter() - start)
+            if outcome[2] is not None:
+                sample.error(formula, outcome[2])
+            _remember(key, outcome)
+    finally:
+        HELPER_MEMO.reset(token)
+    if memo is not None:
+        sample.shared_helpers += memo.hits
+
+    fan_out(calls, outcomes, duplicates, sample)
+    if record:
+        metrics.REGISTRY.record(sample)
+    return outcomes
+
+
+def dedupe(calls: list[tuple[str, dict]]) -> tuple[list[int], list[tuple[int, int]]]:
+    """Split calls into the first occurrence of each distinct call and (row, first) duplicates."""
+    seen: dict = {}
+    unique, duplicates = [], []
+    for i, (formula, inputs) in enumerate(calls):
+        key = make_key(formula, inputs)
+        first = seen.setdefault(key, i) if key is not None else i
+        if first == i:
+            unique.append(i)
+        else:
+            duplicates.append((i, first))
+    return unique, duplicates
+
+
+def fan_out(calls: list[tuple[str, dict]], outcomes: list, duplicates: list[tuple[int, int]], sample: metrics.Sample):
+    """Copy each first outcome to its duplicate rows, which count as calls of their own."""
+    for i, first in duplicates:
+        outcome = outcomes[first]
+        outcomes[i] = (_own(outcome[0]),) + outcome[1:]
+        formula, code = calls[i][0], outcome[2]
+        if code != UNKNOWN_FORMULA:
+            sample.call(formula)
+        if code is not None:
+            sample.error(formula, code)
+    sample.deduplicated += len(duplicates)
+
+
+def evaluate_chunk(
+    calls: list[tuple[str, dict]], deadline: Optional[float] = None,
+) -> tuple[list[Outcome], metrics.Sample]:
+    """evaluate_batch for a pool worker: the metrics travel back with the outcomes."""
+    sample = metrics.Sample()
+    return evaluate_batch(calls, sample, deadline), sample
+
+
+def warm_cache(path: str) -> int:
+    """Pre-fill the result cache from a replay file; returns the rows read."""
+    calls = list(read_replay(path))
+    evaluate_batch(calls)
+    return len(calls)
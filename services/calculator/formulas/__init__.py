@@ -0,0 +1,147 @@
+"""
+Formulas whitelist - LLM never calculates; it always calls here.
+
+The formulas live in one module per area and each module is imported the first
+time one of its formulas is looked up, so the service does not pay for all of
+them at startup. FORMULAS knows every name up front; module attributes such
+as `formulas.calculate_resistive_index` resolve lazily as well (PEP 562).
+"""
+import importlib
+import os
+from collections.abc import Mapping
+from typing import Callable, Iterator
+
+AREAS = ("vascular", "thorax", "abdomen", "pelvis", "thyroid")
+
+# Formula name -> area module, in registry order.
+_LOCATIONS = {
+    "calculate_resistive_index": "vascular",
+    "calculate_pulsatility_index": "vascular",
+    "calculate_nascet_stenosis": "vascular",
+    "calculate_ras_doppler_criteria": "vascular",
+    "calculate_aaa_growth_rate": "vascular",
+    "classify_aortic_dissection_stanford": "vascular",
+    "calculate_ivc_collapsibility_index": "vascular",
+    "calculate_portal_vein_congestion_index": "vascular",
+    "calculate_ecst_stenosis": "vascular",
+    "calculate_mesenteric_stenosis_doppler": "vascular",
+    "calculate_pleural_effusion_volume_ct": "thorax",
+    "calculate_rv_lv_ratio": "thorax",
+    "calculate_pa_aorta_ratio": "thorax",
+    "classify_nodule_fleischner_2017": "thorax",
+    "calculate_emphysema_index_laa": "thorax",
+    "calculate_pesi_score": "thorax",
+    "calculate_hepatorenal_index": "abdomen",
+    "classify_renal_cyst_bosniak_2019": "abdomen",
+    "calculate_renal_nephrometry_score": "abdomen",
+    "calculate_height_adjusted_tkv": "abdomen",
+    "calculate_adrenal_absolute_washout": "abdomen",
+    "calculate_adrenal_signal_intensity_index": "abdomen",
+    "calculate_lirads_threshold_growth": "abdomen",
+    "calculate_modified_ct_severity_index": "abdomen",
+    "measure_pancreatic_duct_diameter": "abdomen",
+    "calculate_splenic_volume_ellipsoid": "abdomen",
+    "calculate_prostate_volume_ellipsoid": "pelvis",
+    "classify_prostate_pirads_v2_1": "pelvis",
+    "calculate_hadlock_efw": "pelvis",
+    "calculate_ovarian_volume_ellipsoid": "pelvis",
+    "classify_ovarian_lesion_orads_us": "pelvis",
+    "classify_thyroid_nodule_tirads": "thyroid",
+    "calculate_thyroid_volume_ellipsoid": "thyroid",
+    "measure_carotid_intima_media_thickness": "vascular",
+    "diagnose_dvt_compression_criteria": "vascular",
+    "calculate_ankle_brachial_index": "vascular",
+    "measure_aortic_diameter": "vascular",
+    "measure_bile_duct_diameter": "abdomen",
+    "measure_gallbladder_wall_thickness": "abdomen",
+    "grade_hepatic_steatosis_ultrasound": "abdomen",
+    "grade_pancreatic_echogenicity": "abdomen",
+    "calculate_psoas_muscle_index": "abdomen",
+    "measure_visceral_fat_area": "abdomen",
+    "calculate_aorta_calcification_score": "abdomen",
+    "measure_bowel_wall_thickness": "abdomen",
+    "grade_mesenteric_fat_stranding": "abdomen",
+    "calculate_hepatic_artery_ri": "abdomen",
+    "classify_hepatic_vein_doppler": "abdomen",
+    "measure_renal_artery_psv": "abdomen",
+    "measure_renal_artery_edv": "abdomen",
+    "calculate_renal_transplant_ri": "abdomen",
+    "measure_adrenal_size": "abdomen",
+    "calculate_adrenal_lipid_index": "abdomen",
+    "calculate_splenic_artery_ri": "abdomen",
+    "classify_spleen_doppler_flow": "abdomen",
+    "measure_bile_duct_stone_diameter": "abdomen",
+    "grade_hepatic_steatosis_ct": "abdomen",
+    "calculate_prostate_psa_density": "pelvis",
+    "calculate_transition_zone_psa_density": "pelvis",
+    "measure_endometrial_thickness": "pelvis",
+    "calculate_uterine_fibroid_volume": "pelvis",
+    "measure_adenomyosis_junctional_zone": "pelvis",
+    "measure_bladder_wall_thickness": "pelvis",
+    "measure_post_void_residual_volume": "pelvis",
+    "measure_rectal_wall_thickness": "pelvis",
+    "classify_rectal_cancer_tnm": "pelvis",
+    "measure_circumferential_resection_margin": "pelvis",
+    "diagnose_ovarian_torsion": "pelvis",
+    "assess_ovarian_reserve_amh": "pelvis",
+    "diagnose_extraprostatic_extension": "pelvis",
+    "diagnose_seminal_vesicle_invasion": "pelvis",
+    "estimate_gleason_score_mri": "pelvis",
+    "grade_prostate_cancer_gleason": "pelvis",
+    "measure_uterine_artery_doppler": "pelvis",
+    "calculate_bladder_outlet_obstruction_index": "pelvis",
+    "measure_rectal_cancer_depth": "pelvis",
+    "classify_lymph_node_staging": "pelvis",
+    "calculate_stone_skin_distance_mean": "abdomen",
+}
+
+_COMMON = ("_normalize_text", "_safe_div", "_as_bool", "_volume_ellipsoid", "_ri_value", "_result")
+
+
+class _Registry(Mapping):
+    def __init__(self, locations: dict[str, str]):
+        self._locations = locations
+        self._loaded: dict[str, Callable] = {}
+
+    def __getitem__(self, name: str) -> Callable:
+        fn = self._loaded.get(name)
+        if fn is None:
+            module = importlib.import_module(f"{__name__}.{self._locations[name]}")
+            fn = self._loaded[name] = getattr(module, name)
+        return fn
+
+    def __contains__(self, name) -> bool:
+        return name in self._locations
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._locations)
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+
+FORMULAS = _Registry(_LOCATIONS)
+
+
+def load_all():
+    """Import every area module, e.g. before forking workers."""
+    for area in AREAS:
+        importlib.import_module(f"{__name__}.{area}")
+
+
+def source_files() -> list[str]:
+    """Paths of every module in the package, in a stable order."""
+    package = os.path.dirname(os.path.abspath(__file__))
+    return [os.path.join(package, name) for name in sorted(os.listdir(package)) if name.endswith(".py")]
+
+
+def __getattr__(name: str):
+    if name in _LOCATIONS:
+        return FORMULAS[name]
+    if name in _COMMON:
+        return getattr(importlib.import_module(f"{__name__}._common"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LOCATIONS) | set(_COMMON))
@@ -0,0 +1,110 @@
+"""
+Helpers shared by every formula module.
+"""
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from typing import Optional
+import unicodedata
+
+
+class HelperMemo(dict):
+    """Results of shared helpers for one batch; `hits` counts reused calls."""
+    hits = 0
+
+
+# Set by the engine around a batch; outside a batch the helpers run directly.
+HELPER_MEMO: ContextVar[Optional[HelperMemo]] = ContextVar("helper_memo", default=None)
+
+# Names of the helpers decorated with _shared.
+SHARED_HELPERS: set[str] = set()
+
+
+def _shared(fn):
+    """Memoize a helper within the current batch, keyed by its arguments."""
+    SHARED_HELPERS.add(fn.__name__)
+    @wraps(fn)
+    def helper(*args):
+        memo = HELPER_MEMO.get()
+        if memo is None:
+            return fn(*args)
+        key = (fn, args)
+        try:
+            value = memo[key]
+        except KeyError:
+            value = memo[key] = fn(*args)
+        except TypeError:  # unhashable argument
+            return fn(*args)
+        else:
+            memo.hits += 1
+        return value
+    return helper
+
+
+def _strip_accents(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in normalized if not unicodedata.combining(ch))
+
+
+# NFKD works character by character, so for Latin-1 and Latin Extended-A/B
+# the accent stripping can be precomputed once and applied with translate().
+_LATIN_END = "\u0250"
+_FOLD = str.maketrans({
+    code: folded for code in range(0x80, ord(_LATIN_END))
+    if (folded := _strip_accents(chr(code))) != chr(code)
+})
+
+NORMALIZE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _fold(text: str) -> str:
+    if not text.isascii():
+        if max(text) < _LATIN_END:
+            text = text.translate(_FOLD)
+        else:
+            text = _strip_accents(text)
+    return text.lower().strip()
+
+
+def _normalize_text(value: Optional[str]) -> str:
+    # Categorical inputs repeat a few hundred distinct strings; remember them.
+    if value is None:
+        return ""
+    return _fold(value if value.__class__ is str else str(value))
+
+
+def _safe_div(numerator: float, denominator: float, precision: Optional[int] = None):
+    if denominator in (0, None):
+        return None
+    value = numerator / denominator
+    if precision is None:
+        return value
+    return round(value, precision)
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    if isinstance(value, (int, float)):
+        return bool(value)
+    return _normalize_text(value) in {"true", "sim", "yes", "1"}
+
+
+@_shared
+def _volume_ellipsoid(d1: float, d2: float, d3: float, factor: float = 0.52, precision: int = 2) -> float:
+    return round(factor * d1 * d2 * d3, precision)
+
+
+@_shared
+def _ri_value(psv: float, edv: float) -> Optional[float]:
+    return _safe_div(psv - edv, psv, 2)
+
+
+def _result(value, category: Optional[str] = None, **extras):
+    payload = {"value": value}
+    if category is not None:
+        payload["category"] = category
+    payload.update(extras)
+    return payload
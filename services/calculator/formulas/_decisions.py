@@ -0,0 +1,349 @@
+"""
+Decision tables: long if/elif classifiers as data, compiled to flat functions.
+
+A classifier's inputs are first reduced to a bitmask of the facts its
+branches test (Features): a flag is set, a text is one of a few values, a
+number falls in a closed range. A fact that is "any of" several others is
+derived from them. Each rule of the DecisionTable is then
+
+    (required, forbidden, outcome)
+
+and holds when every required bit is set and no forbidden one is, so a rule
+is a single `mask & (required | forbidden) == required` test. Rules are
+tried in order and the first that holds gives the outcome, as in the chain
+they replace.
+
+Two rules may trade places when no input can satisfy both (one requires a
+bit the other forbids) or when they give the same outcome; `weights` (hits
+per rule on a representative mix) move frequent rules forward through such
+swaps only, so the order is tuned without changing any result. Both the
+mask builder and the rule chain are generated as Python source and compiled
+once; `Features.masks` and `DecisionTable.select` do the same for a whole
+batch of rows with NumPy. Tables register their string outcomes as the
+ladders do (LABELS).
+"""
+import math
+from typing import Any, Optional, Sequence
+
+# String outcomes of every DecisionTable built so far.
+_LABELS: list[str] = []
+
+
+def _commute(a: tuple, b: tuple) -> bool:
+    """Whether adjacent rules a, b can swap: disjoint, or the same outcome."""
+    (req_a, forb_a, out_a), (req_b, forb_b, out_b) = a, b
+    return out_a == out_b or bool(req_a & forb_b) or bool(req_b & forb_a)
+
+
+def tuned_order(rules: Sequence[tuple], weights: Sequence[float]) -> list[int]:
+    """Rule indices, heavier rules moved forward through commuting neighbours only."""
+    order = list(range(len(rules)))
+    moved = True
+    while moved:
+        moved = False
+        for i in range(len(order) - 1):
+            above, below = order[i], order[i + 1]
+            if weights[below] > weights[above] and _commute(rules[above], rules[below]):
+                order[i], order[i + 1] = below, above
+                moved = True
+    return order
+
+
+class DecisionTable:
+    __slots__ = ("rules", "default", "order", "outcomes", "evaluate", "source", "_arrays")
+
+    def __init__(self, *rules: tuple[int, int, Any], default: Any, weights: Optional[Sequence[float]] = None):
+        for required, forbidden, _ in rules:
+            if required & forbidden:
+                raise ValueError(f"rule requires and forbids {required & forbidden:#x}")
+        self.rules = rules
+        self.default = default
+        self.order = tuned_order(rules, weights) if weights else list(range(len(rules)))
+        self.outcomes = [outcome for _, _, outcome in rules] + [default]
+        _LABELS.extend(outcome for outcome in self.outcomes if isinstance(outcome, str))
+        lines = ["def evaluate(mask):"]
+        for i in self.order:
+            required, forbidden, _ = rules[i]
+            lines += [f"    if mask & {required | forbidden:#x} == {required:#x}:", f"        return outcomes[{i}]"]
+        lines.append("    return default")
+        self.source = "\n".join(lines)
+        namespace = {"outcomes": self.outcomes, "default": default}
+        exec(compile(self.source, f"<{type(self).__name__}>", "exec"), namespace)
+        self.evaluate = namespace["evaluate"]
+        self._arrays = None
+
+    def select(self, masks) -> tuple[list, list[int]]:
+        """Outcomes for an int64 NumPy array of masks, and the hits per rule."""
+        import numpy as np
+
+        if self._arrays is None:
+            outcomes = np.empty(len(self.outcomes), dtype=object)
+            outcomes[:] = self.outcomes
+            self._arrays = outcomes
+        chosen = np.full(len(masks), len(self.rules), dtype=np.intp)
+        pending = np.ones(len(masks), dtype=bool)
+        hits = [0] * len(self.rules)
+        for i in self.order:
+            required, forbidden, _ = self.rules[i]
+            hit = pending & ((masks & (required | forbidden)) == required)
+            count = int(hit.sum())
+            if count:
+                chosen[hit] = i
+                pending &= ~hit
+                hits[i] = count
+                if count == len(masks) or not pending.any():
+                    break
+        return self._arrays[chosen].tolist(), hits
+
+
+class Features:
+    """Keyword inputs -> bitmask, for one DecisionTable.
+
+    flags:  parameter -> bit, set when _as_bool(value).
+    texts:  parameter -> (bit, values), set when _normalize_text(value) is one of them.
+    ranges: parameter -> (value for None, ((bit, low, high), ...)), set when low <= value <= high.
+    counts: parameter -> (bit, minimum), set when int(round(value)) >= minimum; None counts 0.
+    derived: ((bit, any_of), ...), set when any bit of any_of is.
+    """
+
+    __slots__ = ("params", "flags", "texts", "ranges", "counts", "derived", "mask", "source")
+
+    def __init__(
+        self,
+        params: Sequence[str],
+        flags: dict[str, int],
+        texts: dict[str, tuple[int, frozenset]],
+        ranges: dict[str, tuple[Optional[float], tuple]],
+        counts: dict[str, tuple[int, int]],
+        derived: tuple[tuple[int, int], ...],
+    ):
+        self.params = tuple(params)
+        self.flags, self.texts, self.ranges, self.counts, self.derived = flags, texts, ranges, counts, derived
+        lines = [f"def mask({', '.join(f'{name}=None' for name in self.params)}):", "    mask = 0"]
+        for name in self.params:
+            if name in flags:
+                lines += [
+                    f"    if {name} is True or {name} is not None and {name} is not False and _as_bool({name}):",
+                    f"        mask |= {flags[name]:#x}",
+                ]
+            elif name in texts:
+                bit, values = texts[name]
+                lines += [
+                    f"    if {name} is not None and _normalize_text({name}) in {_literal(values)}:",
+                    f"        mask |= {bit:#x}",
+                ]
+            elif name in counts:
+                bit, minimum = counts[name]
+                lines += [
+                    f"    if {name} is not None and int(round({name})) >= {minimum}:",
+                    f"        mask |= {bit:#x}",
+                ]
+            elif name in ranges:
+                missing, bands = ranges[name]
+                guard = f"{name} is not None and " if missing is None else ""
+                if missing is not None:
+                    lines.append(f"    {name} = {missing!r} if {name} is None else {name}")
+                for bit, low, high in bands:
+                    lines += [f"    if {guard}{_interval(name, low, high)}:", f"        mask |= {bit:#x}"]
+        for bit, any_of in derived:
+            lines += [f"    if mask & {any_of:#x}:", f"        mask |= {bit:#x}"]
+        lines.append("    return mask")
+        self.source = "\n".join(lines)
+        from ._common import _as_bool, _normalize_text
+
+        namespace = {"_as_bool": _as_bool, "_normalize_text": _normalize_text}
+        exec(compile(self.source, f"<{type(self).__name__}>", "exec"), namespace)
+        self.mask = namespace["mask"]
+
+    def masks(self, rows: list[dict]):
+        """Masks for rows of keyword inputs, each a subset of `params`.
+
+        Returns (int64 masks, usable). Flags and texts are read row by row,
+        only where given, with each distinct string worked out once; numbers
+        are gathered per parameter and banded with NumPy. Rows with a number
+        NumPy cannot hold exactly, or a count int(round()) would reject, are
+        not usable.
+        """
+        import numpy as np
+
+        from ._common import _as_bool, _normalize_text
+
+        # parameter -> (bit, None) for flags, (bit, values, memo) for texts, (positions, numbers) otherwise.
+        plan: dict = {name: (bit, None) for name, bit in self.flags.items()}
+        plan.update((name, (bit, values, {})) for name, (bit, values) in self.texts.items())
+        numbers = {name: ([], []) for name in (*self.ranges, *self.counts)}
+        plan.update(numbers)
+        codes, unusable = [], []
+        for i, row in enumerate(rows):
+            bits = 0
+            for name, value in row.items():
+                if value is None:
+                    continue
+                step = plan.get(name)
+                if step is None:
+                    continue
+                if len(step) == 3:
+                    bit, values, memo = step
+                    found = memo.get(value) if value.__class__ is str else None
+                    if found is None:
+                        found = bit if _normalize_text(value) in values else 0
+                        if value.__class__ is str:
+                            memo[value] = found
+                    bits |= found
+                elif step[1] is None:
+                    if value is True or value is not False and _as_bool(value):
+                        bits |= step[0]
+                else:
+                    kind = value.__class__
+                    if kind is float or kind is bool or (kind is int and -_MAX_EXACT_INT < value < _MAX_EXACT_INT):
+                        step[0].append(i)
+                        step[1].append(value)
+                    else:
+                        unusable.append(i)
+            codes.append(bits)
+
+        masks = np.array(codes, dtype=np.int64)
+        usable = np.ones(len(rows), dtype=bool)
+        usable[unusable] = False
+        for name, (positions, values) in numbers.items():
+            missing = self._bits(name, None)
+            if missing:
+                masks |= missing
+            if not positions:
+                continue
+            positions = np.array(positions, dtype=np.intp)
+            values = np.array(values, dtype=np.float64)
+            if name in self.counts:
+                bit, minimum = self.counts[name]
+                finite = np.isfinite(values)
+                usable[positions[~finite]] = False
+                with np.errstate(invalid="ignore"):
+                    bits = np.where(np.round(values) >= minimum, bit, 0)
+            else:
+                bits = np.zeros(len(values), dtype=np.int64)
+                for bit, low, high in self.ranges[name][1]:
+                    bits |= np.where((low <= values) & (values <= high), bit, 0)
+            masks[positions] = (masks[positions] & ~missing) | bits
+        for bit, any_of in self.derived:
+            masks |= np.where(masks & any_of, bit, 0)
+        return masks, usable
+
+    def _bits(self, name: str, value) -> int:
+        """The bits a number parameter sets for `value` (None: left out)."""
+        if name in self.counts:
+            bit, minimum = self.counts[name]
+            return bit if value is not None and int(round(value)) >= minimum else 0
+        missing, bands = self.ranges[name]
+        value = missing if value is None else value
+        if value is None:
+            return 0
+        return sum(bit for bit, low, high in bands if low <= value <= high)
+
+
+def _interval(name: str, low: float, high: float) -> str:
+    if high == math.inf:
+        return f"{name} >= {low!r}"
+    if low == -math.inf:
+        return f"{name} <= {high!r}"
+    return f"{low!r} <= {name} <= {high!r}"
+
+
+def _literal(values) -> str:
+    return "{" + ", ".join(map(repr, sorted(values))) + "}"
+
+
+_MAX_EXACT_INT = 2 ** 53
+
+
+# Abdomen
+
+# Facts the Bosniak 2019 chain tests, one bit each.
+(
+    MRI, ENHANCEMENT_CT, WALL_ENHANCEMENT, SEPTA_ENHANCEMENT, NODULE_ENHANCEMENT, NODULE, ACUTE_MARGIN, SOLIDS,
+    SEPTA, CALCIFICATION, MANY_SEPTA, WALL_IRREGULAR, SEPTA_IRREGULAR, WALL_THICK, SEPTA_THICK, WALL_MINIMAL,
+    SEPTA_MINIMAL, WALL_THIN, SEPTA_THIN, PRE_SIMPLE, PRE_BENIGN, PORTAL_BENIGN, HOMOGENEOUS, T2_CSF, T1_MARKED,
+    T1_HETEROGENEOUS, TOO_SMALL, SIMPLE_FLUID, ENHANCEMENT, THICK_OR_IRREGULAR, MINIMALLY_THICK,
+) = (1 << bit for bit in range(31))
+
+_BELOW_4 = math.nextafter(4, -math.inf)
+
+BOSNIAK_FEATURES = Features(
+    (
+        "realce_hu", "componentes_solidos", "septos", "calcificacao", "numero_septos", "modalidade",
+        "tamanho_lesao_mm", "parede_espessura_mm", "septos_espessura_mm", "parede_irregular", "septos_irregulares",
+        "parede_realce", "septos_realce", "nodulo_realce", "nodulo_tamanho_mm", "nodulo_margem", "atenuacao_hu_pre",
+        "atenuacao_hu_portal", "homogeneo", "hiperintenso_t2_csf", "hiperintenso_t1_marcado",
+        "hiperintenso_t1_heterogeneo_fs", "muito_pequeno_caracterizar", "fluido_simples",
+    ),
+    flags={
+        "componentes_solidos": SOLIDS, "septos": SEPTA, "calcificacao": CALCIFICATION,
+        "parede_irregular": WALL_IRREGULAR, "septos_irregulares": SEPTA_IRREGULAR,
+        "parede_realce": WALL_ENHANCEMENT, "septos_realce": SEPTA_ENHANCEMENT, "nodulo_realce": NODULE_ENHANCEMENT,
+        "homogeneo": HOMOGENEOUS, "hiperintenso_t2_csf": T2_CSF, "hiperintenso_t1_marcado": T1_MARKED,
+        "hiperintenso_t1_heterogeneo_fs": T1_HETEROGENEOUS, "muito_pequeno_caracterizar": TOO_SMALL,
+        "fluido_simples": SIMPLE_FLUID,
+    },
+    texts={
+        "modalidade": (MRI, frozenset({"rm", "mri", "ressonancia", "ressonancia_magnetica"})),
+        "nodulo_margem": (ACUTE_MARGIN, frozenset({"aguda", "agudo", "acute"})),
+    },
+    ranges={
+        "realce_hu": (None, ((ENHANCEMENT_CT, 20, math.inf),)),
+        # Thicknesses and nodule size count a missing value as 0 mm.
+        "parede_espessura_mm": (0, (
+            (WALL_THICK, 4, math.inf), (WALL_MINIMAL, 3, _BELOW_4), (WALL_THIN, -math.inf, 2),
+        )),
+        "septos_espessura_mm": (0, (
+            (SEPTA_THICK, 4, math.inf), (SEPTA_MINIMAL, 3, _BELOW_4), (SEPTA_THIN, -math.inf, 2),
+        )),
+        "nodulo_tamanho_mm": (0, ((NODULE, math.nextafter(0, math.inf), math.inf),)),
+        "atenuacao_hu_pre": (None, ((PRE_SIMPLE, -9, 20), (PRE_BENIGN, -9, math.inf))),
+        "atenuacao_hu_portal": (None, ((PORTAL_BENIGN, 21, 30),)),
+    },
+    counts={"numero_septos": (MANY_SEPTA, 4)},
+    derived=(
+        (ENHANCEMENT, ENHANCEMENT_CT | WALL_ENHANCEMENT | SEPTA_ENHANCEMENT | NODULE_ENHANCEMENT),
+        (THICK_OR_IRREGULAR, WALL_IRREGULAR | SEPTA_IRREGULAR | WALL_THICK | SEPTA_THICK),
+        (MINIMALLY_THICK, WALL_MINIMAL | SEPTA_MINIMAL | MANY_SEPTA),
+    ),
+)
+
+# The Bosniak 2019 chain in its original order; None is "Indeterminado".
+_BOSNIAK_RULES = (
+    # IV: enhancing nodules or enhancing solid components.
+    (NODULE_ENHANCEMENT | NODULE, 0, "IV"),
+    (NODULE_ENHANCEMENT | ACUTE_MARGIN, 0, "IV"),
+    (NODULE_ENHANCEMENT | SOLIDS, 0, "IV"),
+    (SOLIDS | ENHANCEMENT, 0, "IV"),
+    # III: thick (>= 4 mm) or irregular enhancing wall/septa.
+    (ENHANCEMENT | THICK_OR_IRREGULAR, 0, "III"),
+    # IIF: minimally thick (3 mm) enhancing wall/septa or many enhancing septa.
+    (ENHANCEMENT | MINIMALLY_THICK, 0, "IIF"),
+    # I: simple cyst.
+    (SIMPLE_FLUID, 0, "I"),
+    (HOMOGENEOUS | PRE_SIMPLE, SEPTA | CALCIFICATION | SOLIDS | MRI, "I"),
+    (MRI | T2_CSF, SEPTA | CALCIFICATION | SOLIDS, "I"),
+    # MRI II/IIF.
+    (MRI | T1_HETEROGENEOUS, 0, "IIF"),
+    (MRI | T2_CSF, 0, "II"),
+    (MRI | T1_MARKED, 0, "II"),
+    # CT II/IIF.
+    (TOO_SMALL, MRI, "II"),
+    (HOMOGENEOUS | PRE_BENIGN, MRI | ENHANCEMENT, "II"),
+    (HOMOGENEOUS | PORTAL_BENIGN, MRI | ENHANCEMENT, "II"),
+    (SEPTA | MANY_SEPTA | ENHANCEMENT, MRI, "IIF"),
+    (CALCIFICATION | MANY_SEPTA | ENHANCEMENT, MRI, "IIF"),
+    (SEPTA | MANY_SEPTA, MRI, "II"),
+    (CALCIFICATION | MANY_SEPTA, MRI, "II"),
+    (SEPTA | WALL_THIN | SEPTA_THIN, MRI, "II"),
+    (CALCIFICATION | WALL_THIN | SEPTA_THIN, MRI, "II"),
+    # Enhancement without a clearer category.
+    (ENHANCEMENT, 0, "IIF"),
+)
+
+# Hits per rule over benchmarks/bench_bosniak.py's lesion mix (`--weights`).
+BOSNIAK_WEIGHTS = (573, 96, 39, 0, 789, 1567, 3224, 5396, 2645, 0, 515, 746, 1053, 2504, 0, 0, 0, 0, 0, 277, 0, 52)
+
+BOSNIAK_2019 = DecisionTable(*_BOSNIAK_RULES, default=None, weights=BOSNIAK_WEIGHTS)
+
+LABELS = frozenset(_LABELS)
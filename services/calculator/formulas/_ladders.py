@@ -0,0 +1,231 @@
+"""
+Threshold ladders: the value -> category cutoffs of the formulas, as data.
+
+    Ladder(("<", 0.55, "Normal"), ("<=", 0.70, "Borderline"), default="Aumentado").lookup(v)
+
+reads as `if v < 0.55: "Normal" elif v <= 0.70: "Borderline" else: "Aumentado"`.
+The rungs of one ladder all point the same way (< / <= with non-decreasing
+cutoffs, or > / >= with non-increasing ones), so the first rung that matches
+is found by counting the cutoffs the value has passed. Inclusive cutoffs are
+stored as the next float outward, which turns every rung into a strict bound
+in one sorted array: bisect for one value, numpy.searchsorted for a column.
+NaN matches no rung and gets the default, as in the if/elif chain. Chains
+that test an integer score for equality (== 7, == 8) are written as <=
+rungs, which agree with them on integers.
+
+The tables live here rather than next to their formulas so the columnar
+kernels can share them without importing the area modules. Each ladder
+registers its string labels as it is built; LABELS, at the end, is what the
+ladders of this module registered, for the wire dictionary.
+"""
+import math
+from bisect import bisect_left, bisect_right
+from typing import Any
+
+# String labels of every Ladder built so far.
+_LABELS: list[str] = []
+
+_ASCENDING = {"<": False, "<=": True}
+_DESCENDING = {">": False, ">=": True}
+
+
+class Ladder:
+    __slots__ = ("rungs", "default", "descending", "labels", "lookup", "_bounds", "_ordered", "_arrays")
+
+    def __init__(self, *rungs: tuple[str, float, Any], default: Any):
+        ops = {op for op, _, _ in rungs}
+        if ops <= _ASCENDING.keys():
+            self.descending = False
+            outward = math.inf
+            bounds = [math.nextafter(t, outward) if _ASCENDING[op] else float(t) for op, t, _ in rungs]
+        elif ops <= _DESCENDING.keys():
+            self.descending = True
+            outward = -math.inf
+            bounds = [math.nextafter(t, outward) if _DESCENDING[op] else float(t) for op, t, _ in rungs][::-1]
+        else:
+            raise ValueError(f"Ladder mixes directions: {sorted(ops)}")
+        if any(a > b for a, b in zip(bounds, bounds[1:])):
+            raise ValueError("Ladder cutoffs are out of order")
+        self.rungs = rungs
+        self.default = default
+        self._bounds = bounds
+        self.labels = [label for _, _, label in rungs] + [default]
+        _LABELS.extend(label for label in self.labels if isinstance(label, str))
+        # Labels by insertion point: a descending ladder counts cutoffs from the top.
+        self._ordered = ordered = self.labels[::-1] if self.descending else self.labels
+        self._arrays = None
+        find = bisect_left if self.descending else bisect_right
+
+        # A closure rather than __call__: calling an instance costs about twice as much.
+        def lookup(value) -> Any:
+            """The label for one value."""
+            return ordered[find(bounds, value)]
+
+        self.lookup = lookup
+
+    def select(self, values) -> list:
+        """Labels for a float64 NumPy array, as a list."""
+        import numpy as np
+
+        if self._arrays is None:
+            self._arrays = (np.array(self._bounds, dtype=np.float64), np.array(self._ordered, dtype=object))
+        bounds, labels = self._arrays
+        index = np.searchsorted(bounds, values, side="left" if self.descending else "right")
+        # NaN sorts last; send it to the default like the scalar path.
+        index[np.isnan(values)] = 0 if self.descending else len(bounds)
+        return labels[index].tolist()
+
+
+# Vascular
+
+RESISTIVE_INDEX = Ladder(
+    ("<", 0.55, "Normal (baixa resistencia vascular)"),
+    ("<=", 0.70, "Borderline (resistencia moderada)"),
+    default="Aumentado (alta resistencia)",
+)
+PULSATILITY_INDEX = Ladder(
+    ("<", 1.0, "Baixo (fluxo pouco pulsatil)"),
+    ("<=", 2.0, "Normal (pulsatilidade normal)"),
+    default="Aumentado (alta pulsatilidade)",
+)
+CAROTID_STENOSIS = Ladder(
+    ("<", 30, "Sem estenose significativa"),
+    ("<=", 69, "Estenose moderada (30-69%)"),
+    default="Estenose grave (>=70%)",
+)
+AAA_DIAMETER = Ladder(
+    ("<", 28, "AAA pequeno; sem follow-up necessario"),
+    ("<", 40, "AAA moderado; follow-up anual"),
+    ("<", 45, "AAA grande; follow-up cada 3 meses"),
+    ("<", 55, "AAA muito grande; considerar cirurgia"),
+    default="AAA critico; cirurgia recomendada",
+)
+IVC_COLLAPSIBILITY = Ladder(
+    (">", 50, "PVC baixa; colapsabilidade normal"),
+    (">=", 25, "PVC normal; colapsabilidade intermediaria"),
+    default="PVC elevada; colapsabilidade reduzida",
+)
+PORTAL_CONGESTION = Ladder(
+    ("<", 0.4, "Normal; sem congestao portal"),
+    ("<=", 0.6, "Borderline; possivel congestao leve"),
+    default="Congestao portal; sugerir hipertensao portal",
+)
+CAROTID_IMT = Ladder(("<", 0.7, "Normal"), ("<=", 0.9, "Borderline"), default="Aumentado")
+ANKLE_BRACHIAL = Ladder(
+    (">=", 1.0, "Normal"),
+    (">=", 0.91, "Borderline"),
+    (">=", 0.71, "PAD leve-moderada"),
+    (">=", 0.41, "PAD moderada-grave"),
+    default="PAD grave/critica",
+)
+AORTIC_ROOT = Ladder(("<", 40, "Normal"), ("<=", 50, "Borderline"), default="Aneurisma aortico")
+AORTIC_ABDOMINAL = Ladder(
+    ("<", 30, "Normal"), ("<=", 50, "Aneurisma abdominal"), default="AAA grande; cirurgia recomendada",
+)
+
+# Thorax
+
+PLEURAL_EFFUSION = Ladder(
+    ("<", 500, "Pequeno derrame (<500 mL)"),
+    ("<=", 1000, "Derrame moderado (500-1000 mL)"),
+    default="Derrame volumoso (>1000 mL)",
+)
+RV_LV_RATIO = Ladder(("<", 0.9, "Normal"), ("<=", 1.0, "Borderline"), default="Dilatação RV")
+PA_AORTA_RATIO = Ladder(
+    ("<", 0.9, "Normal"), ("<=", 1.0, "Borderline"), default="Sugestivo de hipertensao pulmonar",
+)
+EMPHYSEMA_LAA = Ladder(
+    ("<", 5, "Normal"), ("<", 25, "Enfisema leve"), ("<", 50, "Enfisema moderado"), default="Enfisema grave",
+)
+PESI = Ladder(
+    ("<=", 65, "Classe I"),
+    ("<=", 85, "Classe II"),
+    ("<=", 105, "Classe III"),
+    ("<=", 125, "Classe IV"),
+    default="Classe V",
+)
+
+# Abdomen
+
+HEPATORENAL_INDEX = Ladder(
+    ("<", 0.5, "Sem esteatose significativa"),
+    ("<", 1.5, "Esteatose leve"),
+    ("<", 2.5, "Esteatose moderada"),
+    default="Esteatose grave",
+)
+NEPHROMETRY_RADIUS = Ladder(("<", 4, 1), ("<=", 7, 2), default=3)
+NEPHROMETRY_EXOPHYTIC = Ladder(("<=", 25, 1), ("<=", 50, 2), default=3)
+NEPHROMETRY_NEARNESS = Ladder((">=", 7, 1), (">=", 4, 2), default=3)
+NEPHROMETRY_TOTAL = Ladder(
+    ("<=", 6, "Baixa complexidade"), ("<=", 9, "Complexidade intermediaria"), default="Alta complexidade",
+)
+HEIGHT_ADJUSTED_TKV = Ladder(
+    ("<", 1.5, "Mayo Class 1A"),
+    ("<", 2.2, "Mayo Class 1B"),
+    ("<", 2.6, "Mayo Class 2"),
+    ("<", 3.1, "Mayo Class 3"),
+    default="Mayo Class 4",
+)
+ADRENAL_WASHOUT = Ladder((">", 60, "Adenoma"), (">=", 40, "Borderline"), default="Sugestivo nao-adenoma")
+ADRENAL_SIGNAL_INDEX = Ladder((">", 16.5, "Adenoma"), (">=", 10, "Borderline"), default="Sugestivo nao-adenoma")
+CTSI_NECROSIS_POINTS = Ladder(("<=", 0, 0), ("<=", 30, 2), default=4)
+CTSI_SCORE = Ladder(("<=", 2, "Pancreatite leve"), ("<=", 6, "Pancreatite moderada"), default="Pancreatite grave")
+SPLENIC_VOLUME = Ladder(
+    ("<", 150, "Normal"), ("<=", 200, "Borderline"), ("<=", 400, "Esplenomegalia leve"),
+    default="Esplenomegalia moderada-grave",
+)
+BILE_DUCT_DIAMETER = Ladder(
+    ("<", 6, "Normal"), ("<=", 7, "Borderline"), ("<=", 10, "Dilatado leve"), default="Dilatado moderado-grave",
+)
+GALLBLADDER_WALL = Ladder(
+    ("<", 3, "Normal"), ("<=", 3.5, "Borderline"), ("<=", 5, "Espessado"), default="Muito espessado",
+)
+STEATOSIS_US_GRADE = Ladder(
+    ("<=", 0, "Sem esteatose"), ("<=", 1, "Esteatose leve"), ("<=", 2, "Esteatose moderada"),
+    default="Esteatose grave",
+)
+VISCERAL_FAT_AREA = Ladder(("<", 100, "Normal"), ("<=", 150, "Aumentado"), default="Muito aumentado")
+AORTA_CALCIFICATION = Ladder(
+    ("<=", 0, "Sem calcificacao"), ("<=", 1, "Calcificacao leve"), ("<=", 2, "Calcificacao moderada"),
+    default="Calcificacao grave",
+)
+BOWEL_WALL = Ladder(
+    ("<", 2, "Normal"), ("<=", 3, "Borderline"), ("<=", 5, "Espessado"), default="Muito espessado",
+)
+VISCERAL_ARTERY_RI = Ladder(("<", 0.55, "Normal"), ("<=", 0.70, "Borderline"), default="Aumentado")
+RENAL_ARTERY_PSV = Ladder(("<", 180, "Normal"), ("<=", 200, "Borderline"), default="Aumentado")
+RENAL_ARTERY_EDV = Ladder((">", 45, "Normal"), (">=", 20, "Borderline"), default="Reduzido")
+RENAL_TRANSPLANT_RI = Ladder(("<", 0.70, "Normal"), ("<=", 0.80, "Borderline"), default="Aumentado")
+ADRENAL_SIZE = Ladder(
+    ("<", 10, "Normal"), ("<=", 12, "Borderline"), ("<=", 15, "Aumentado"), default="Muito aumentado",
+)
+ADRENAL_LIPID_INDEX = Ladder(("<", -10, "Muito lipidico"), ("<=", 10, "Borderline"), default="Pouco lipidico")
+BILE_DUCT_STONE = Ladder(("<", 5, "Pequeno"), ("<=", 10, "Moderado"), default="Grande")
+STEATOSIS_CT = Ladder(
+    (">", -10, "Sem esteatose"), (">", -20, "Esteatose leve"), (">", -30, "Esteatose moderada"),
+    default="Esteatose grave",
+)
+
+# Pelvis
+
+PROSTATE_VOLUME = Ladder(
+    ("<", 25, "Normal"), ("<=", 50, "Hiperplasia leve"), ("<=", 100, "Hiperplasia moderada"),
+    default="Hiperplasia grave",
+)
+PSA_DENSITY = Ladder(("<", 0.15, "Normal"), ("<=", 0.25, "Borderline"), default="Aumentado")
+TZ_PSA_DENSITY = Ladder(("<", 0.10, "Normal"), ("<=", 0.20, "Borderline"), default="Aumentado")
+GLEASON_GROUP = Ladder(("<=", 6, "Grupo 1"), ("<=", 7, "Grupo 2-3"), ("<=", 8, "Grupo 4"), default="Grupo 5")
+BLADDER_OUTLET_OBSTRUCTION = Ladder(("<", 20, "Sem obstrucao"), ("<=", 40, "Borderline"), default="Obstruido")
+POST_VOID_RESIDUAL = Ladder(("<", 50, "Normal"), ("<=", 100, "Borderline"), default="Retencao")
+OVARIAN_VOLUME = Ladder(("<", 9, "Normal"), ("<=", 12, "Borderline"), default="Aumentado")
+OVARIAN_RESERVE_AMH = Ladder((">=", 1.0, "Normal"), (">=", 0.5, "Reduzido"), default="Muito reduzido")
+FIBROID_VOLUME = Ladder(("<", 100, "Pequeno"), ("<=", 500, "Moderado"), default="Grande")
+RECTAL_WALL = Ladder(("<", 5, "T1 (submucosa)"), ("<=", 10, "T2 (muscular propria)"), default="T3-T4")
+RESECTION_MARGIN = Ladder((">=", 2, "Negativo"), (">=", 1, "Borderline"), default="Positivo")
+RECTAL_CANCER_DEPTH = Ladder(("<=", 5, "T3a"), ("<=", 10, "T3b"), ("<=", 15, "T3c"), default="T3d/T4")
+
+# Thyroid
+
+TIRADS_LEVEL = Ladder(("<=", 1, "TR1"), ("<=", 2, "TR2"), ("<=", 3, "TR3"), ("<=", 6, "TR4"), default="TR5")
+
+LABELS = frozenset(_LABELS)
@@ -0,0 +1,188 @@
+"""
+Outcome tables: classifiers of categorical inputs, precomputed over their domain.
+
+    OutcomeTable(("ausente", "leve"), ("M0",), outcome=lambda grau, m: ...).lookup("leve", "M1")
+
+Each field lists the normalized values its classifier tells apart; they get
+codes 1..n and anything else gets 0, which stands for every value the
+classifier does not list (`outcome` is called with None for it). At import,
+`outcome` runs once for every combination of codes and the results go into
+one flat row-major list. A call whose values are all listed is one dict
+lookup on the tuple of them; otherwise each field's code is looked up and
+the codes give the index.
+`select` does the same for whole integer-coded columns (`encode`) with NumPy.
+
+The point maps and chains that used to sit in the formula bodies live here,
+as data for the tables, so the columnar kernels share them like the ladders.
+Tables register their string outcomes as the ladders do (LABELS).
+"""
+from itertools import product
+from typing import Any, Callable, Iterable, Optional
+
+from ._ladders import TIRADS_LEVEL
+
+_UNLISTED = object()
+
+# String outcomes of every OutcomeTable built so far.
+_LABELS: list[str] = []
+
+
+class OutcomeTable:
+    __slots__ = ("fields", "codes", "outcomes", "lookup", "_strides", "_arrays")
+
+    def __init__(self, *fields: tuple, outcome: Callable[..., Any]):
+        self.fields = fields
+        self.codes = [{value: code for code, value in enumerate(field, 1)} for field in fields]
+        domains = [(None,) + tuple(field) for field in fields]
+        self.outcomes = outcomes = [outcome(*values) for values in product(*domains)]
+        _LABELS.extend(outcome for outcome in outcomes if isinstance(outcome, str))
+        strides, stride = [], 1
+        for domain in reversed(domains):
+            strides.append(stride)
+            stride *= len(domain)
+        self._strides = strides[::-1]
+        self._arrays = None
+
+        # Specialized closures, as Ladder.lookup: one per arity in use.
+        if len(fields) == 1:
+            (codes,) = self.codes
+            get = codes.get
+
+            def lookup(key) -> Any:
+                """The outcome for one normalized value."""
+                return outcomes[get(key, 0)]
+        else:
+            # Combinations of listed values hit one tuple-keyed dict; the rest
+            # add up their codes.
+            listed = {
+                values: outcome for values, outcome in zip(product(*domains), outcomes) if None not in values
+            }
+            pairs = list(zip(self.codes, self._strides))
+
+            def lookup(*keys) -> Any:
+                """The outcome for one normalized value per field."""
+                outcome = listed.get(keys, _UNLISTED)
+                if outcome is not _UNLISTED:
+                    return outcome
+                index = 0
+                for key, (codes, stride) in zip(keys, pairs):
+                    index += codes.get(key, 0) * stride
+                return outcomes[index]
+
+        self.lookup = lookup
+
+    def encode(self, field: int, values: Iterable, key: Optional[Callable] = None):
+        """Codes for a column of one field, as an int NumPy array.
+
+        `key` normalizes raw values; a column repeats a handful of distinct
+        strings, so it runs once per string rather than once per row.
+        """
+        import numpy as np
+
+        get = self.codes[field].get
+        if key is None:
+            return np.fromiter((get(value, 0) for value in values), dtype=np.intp)
+        seen: dict[str, int] = {}
+
+        def code(value) -> int:
+            if value.__class__ is not str:
+                return get(key(value), 0)
+            found = seen.get(value)
+            if found is None:
+                found = seen[value] = get(key(value), 0)
+            return found
+
+        return np.fromiter(map(code, values), dtype=np.intp)
+
+    def select(self, *columns) -> list:
+        """Outcomes for integer-coded NumPy columns, one per field, as a list."""
+        import numpy as np
+
+        if self._arrays is None:
+            outcomes = np.empty(len(self.outcomes), dtype=object)
+            outcomes[:] = self.outcomes
+            self._arrays = outcomes
+        index = columns[0] * self._strides[0]
+        for column, stride in zip(columns[1:], self._strides[1:]):
+            index = index + column * stride
+        return self._arrays[index].tolist()
+
+
+# Vascular
+
+
+def _stanford(ascending: Optional[bool], location: Optional[str]) -> str:
+    if ascending:
+        return "Type A"
+    if location == "descendente":
+        return "Type B"
+    return "Type B (limitada descendente)"
+
+
+# Keyed by _as_bool(envolve_ascendente) and the normalized location.
+STANFORD = OutcomeTable((False, True), ("descendente",), outcome=_stanford)
+
+# Abdomen
+
+
+def _mesenteric_stranding(grau: Optional[str]) -> str:
+    if grau == "ausente":
+        return "Normal"
+    if grau == "leve":
+        return "Borderline"
+    if grau == "moderado":
+        return "Inflamacao mesenterica"
+    return "Inflamacao acentuada"
+
+
+def _hepatic_vein(padrao: Optional[str]) -> str:
+    if padrao == "normal_trifasico":
+        return "Normal"
+    if padrao == "bifasico":
+        return "Borderline"
+    if padrao == "monofasico":
+        return "Alterado"
+    if padrao == "reverso":
+        return "Reverso"
+    return "Indeterminado"
+
+
+MESENTERIC_STRANDING = OutcomeTable(("ausente", "leve", "moderado"), outcome=_mesenteric_stranding)
+HEPATIC_VEIN_DOPPLER = OutcomeTable(("normal_trifasico", "bifasico", "monofasico", "reverso"), outcome=_hepatic_vein)
+
+# Pelvis
+
+
+def _rectal_stage(t_val: Optional[str], n_val: Optional[str], m_val: Optional[str]) -> str:
+    if t_val == "T1" and n_val == "N0" and m_val == "M0":
+        return "Stage I"
+    if t_val in {"T2", "T3", "T4"} and n_val == "N0" and m_val == "M0":
+        return "Stage II"
+    if n_val in {"N1", "N2"} and m_val == "M0":
+        return "Stage III"
+    if m_val != "M0":
+        return "Stage IV"
+    return "Indeterminado"
+
+
+# Keyed by the upper-cased normalized T, N and M.
+RECTAL_TNM = OutcomeTable(("T1", "T2", "T3", "T4"), ("N0", "N1", "N2"), ("M0",), outcome=_rectal_stage)
+
+# Thyroid
+
+# ACR TI-RADS points; values not listed score 0.
+TIRADS_COMPOSITION = {"cistica": 0, "quase_completamente_cistica": 0, "cistica_com_solido": 1, "solida": 2}
+TIRADS_ECHOGENICITY = {"anecoica": 0, "isoecoica": 1, "hiperecoica": 1, "hipoecoica": 2}
+TIRADS_SHAPE = {"tao_larga_quanto_alta": 3}
+TIRADS_MARGINS = {"bem_definidas": 0, "mal_definidas": 0, "lobuladas": 2, "espiculadas": 3}
+TIRADS_FOCI = {"ausentes": 0, "pontos_grandes": 1, "pontos_pequenos_comet_tail": 0}
+_TIRADS_POINTS = (TIRADS_COMPOSITION, TIRADS_ECHOGENICITY, TIRADS_SHAPE, TIRADS_MARGINS, TIRADS_FOCI)
+
+
+def _tirads_level(*keys: Optional[str]) -> str:
+    return TIRADS_LEVEL.lookup(sum(points.get(key, 0) for points, key in zip(_TIRADS_POINTS, keys)))
+
+
+TIRADS = OutcomeTable(*(tuple(points) for points in _TIRADS_POINTS), outcome=_tirads_level)
+
+LABELS = frozenset(_LABELS)
@@ -0,0 +1,326 @@
+"""
+Abdomen: liver, kidneys, adrenals, pancreas, spleen, biliary tree and bowel.
+"""
+from typing import Optional
+
+from ._common import _normalize_text, _safe_div, _volume_ellipsoid, _ri_value, _result
+from ._ladders import (
+    ADRENAL_LIPID_INDEX, ADRENAL_SIGNAL_INDEX, ADRENAL_SIZE, ADRENAL_WASHOUT, AORTA_CALCIFICATION,
+    BILE_DUCT_DIAMETER, BILE_DUCT_STONE, BOWEL_WALL, CTSI_NECROSIS_POINTS, CTSI_SCORE, GALLBLADDER_WALL,
+    HEIGHT_ADJUSTED_TKV, HEPATORENAL_INDEX, NEPHROMETRY_EXOPHYTIC, NEPHROMETRY_NEARNESS, NEPHROMETRY_RADIUS,
+    NEPHROMETRY_TOTAL, RENAL_ARTERY_EDV, RENAL_ARTERY_PSV, RENAL_TRANSPLANT_RI, SPLENIC_VOLUME, STEATOSIS_CT,
+    STEATOSIS_US_GRADE, VISCERAL_ARTERY_RI, VISCERAL_FAT_AREA,
+)
+from ._decisions import BOSNIAK_2019, BOSNIAK_FEATURES
+from ._tables import HEPATIC_VEIN_DOPPLER, MESENTERIC_STRANDING
+
+
+def calculate_hepatorenal_index(atenuacao_figado: float, atenuacao_rim: float):
+    hri = _safe_div(atenuacao_figado - atenuacao_rim, atenuacao_rim, 2)
+    if hri is None:
+        return _result(None)
+    category = HEPATORENAL_INDEX.lookup(hri)
+    return _result(hri, category)
+
+
+def classify_renal_cyst_bosniak_2019(
+    realce_hu: Optional[float] = None,
+    componentes_solidos: Optional[bool] = None,
+    septos: Optional[bool] = None,
+    calcificacao: Optional[bool] = None,
+    numero_septos: Optional[float] = None,
+    modalidade: Optional[str] = None,
+    tamanho_lesao_mm: Optional[float] = None,
+    parede_espessura_mm: Optional[float] = None,
+    septos_espessura_mm: Optional[float] = None,
+    parede_irregular: Optional[bool] = None,
+    septos_irregulares: Optional[bool] = None,
+    parede_realce: Optional[bool] = None,
+    septos_realce: Optional[bool] = None,
+    nodulo_realce: Optional[bool] = None,
+    nodulo_tamanho_mm: Optional[float] = None,
+    nodulo_margem: Optional[str] = None,
+    atenuacao_hu_pre: Optional[float] = None,
+    atenuacao_hu_portal: Optional[float] = None,
+    homogeneo: Optional[bool] = None,
+    hiperintenso_t2_csf: Optional[bool] = None,
+    hiperintenso_t1_marcado: Optional[bool] = None,
+    hiperintenso_t1_heterogeneo_fs: Optional[bool] = None,
+    muito_pequeno_caracterizar: Optional[bool] = None,
+    fluido_simples: Optional[bool] = None,
+):
+    mask = BOSNIAK_FEATURES.mask(
+        realce_hu, componentes_solidos, septos, calcificacao, numero_septos, modalidade, tamanho_lesao_mm,
+        parede_espessura_mm, septos_espessura_mm, parede_irregular, septos_irregulares, parede_realce,
+        septos_realce, nodulo_realce, nodulo_tamanho_mm, nodulo_margem, atenuacao_hu_pre, atenuacao_hu_portal,
+        homogeneo, hiperintenso_t2_csf, hiperintenso_t1_marcado, hiperintenso_t1_heterogeneo_fs,
+        muito_pequeno_caracterizar, fluido_simples,
+    )
+    category = BOSNIAK_2019.evaluate(mask)
+    if category is None:
+        return _result(None, "Indeterminado")
+    return _result(category)
+
+
+def calculate_renal_nephrometry_score(
+    radius_cm: float,
+    exophytic_percent: float,
+    nearness_mm: float,
+    anterior_posterior: str,
+    location_polar: str,
+):
+    r_score = NEPHROMETRY_RADIUS.lookup(radius_cm)
+    e_score = NEPHROMETRY_EXOPHYTIC.lookup(exophytic_percent)
+    n_score = NEPHROMETRY_NEARNESS.lookup(nearness_mm)
+
+    ap = _normalize_text(anterior_posterior)
+    a_score = 2 if ap == "ambos" else 1
+
+    loc = _normalize_text(location_polar)
+    l_score = 2 if loc == "meio" else 1
+
+    total = r_score + e_score + n_score + a_score + l_score
+    category = NEPHROMETRY_TOTAL.lookup(total)
+    return _result(total, category)
+
+
+def calculate_height_adjusted_tkv(volume_renal_total: float, altura: float):
+    ht_tkv = _safe_div(volume_renal_total, altura, 2)
+    if ht_tkv is None:
+        return _result(None)
+    category = HEIGHT_ADJUSTED_TKV.lookup(ht_tkv)
+    return _result(ht_tkv, category)
+
+
+def calculate_adrenal_absolute_washout(hu_nc: float, hu_portal: float, hu_tardia: float):
+    denominator = hu_portal - hu_nc
+    if denominator == 0:
+        return _result(None)
+    washout = round(((hu_portal - hu_tardia) / denominator) * 100, 1)
+    category = ADRENAL_WASHOUT.lookup(washout)
+    return _result(washout, category)
+
+
+def calculate_adrenal_signal_intensity_index(sinal_in_phase: float, sinal_opposed_phase: float):
+    sii = _safe_div(sinal_in_phase - sinal_opposed_phase, sinal_in_phase, None)
+    if sii is None:
+        return _result(None)
+    sii = round(sii * 100, 1)
+    category = ADRENAL_SIGNAL_INDEX.lookup(sii)
+    return _result(sii, category)
+
+
+def calculate_lirads_threshold_growth(d_anterior: float, d_atual: float, intervalo_meses: float):
+    percent = _safe_div(d_atual - d_anterior, d_anterior, None)
+    if percent is None:
+        return _result(None)
+    percent = round(percent * 100, 1)
+    threshold = percent >= 50 and intervalo_meses <= 6
+    return _result(percent, "Threshold growth" if threshold else "Sem threshold", threshold_growth=threshold)
+
+
+def calculate_modified_ct_severity_index(grau_inflamacao: str, percentual_necrose: float):
+    grade = _normalize_text(grau_inflamacao)
+    infl_points = {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4}.get(grade, 0)
+    nec_points = CTSI_NECROSIS_POINTS.lookup(percentual_necrose)
+    score = infl_points + nec_points
+    category = CTSI_SCORE.lookup(score)
+    return _result(score, category)
+
+
+def measure_pancreatic_duct_diameter(
+    diametro_cabeca: Optional[float] = None,
+    diametro_corpo: Optional[float] = None,
+    diametro_cauda: Optional[float] = None,
+):
+    values = {
+        "cabeca": diametro_cabeca,
+        "corpo": diametro_corpo,
+        "cauda": diametro_cauda,
+    }
+    any_values = [v for v in values.values() if v is not None]
+    if not any_values:
+        return _result(None)
+
+    dilated = False
+    borderline = False
+    if diametro_cabeca is not None:
+        if diametro_cabeca > 5:
+            dilated = True
+        elif 3 <= diametro_cabeca <= 5:
+            borderline = True
+    if diametro_corpo is not None:
+        if diametro_corpo > 3:
+            dilated = True
+        elif 2 <= diametro_corpo <= 3:
+            borderline = True
+    if diametro_cauda is not None:
+        if diametro_cauda > 2:
+            dilated = True
+        elif 1 <= diametro_cauda <= 2:
+            borderline = True
+
+    if dilated:
+        category = "Dilatado"
+    elif borderline:
+        category = "Borderline"
+    else:
+        category = "Normal"
+
+    return _result(None, category, **values)
+
+
+def calculate_splenic_volume_ellipsoid(comprimento: float, largura: float, espessura: float):
+    volume = _volume_ellipsoid(comprimento, largura, espessura, 0.52, 1)
+    category = SPLENIC_VOLUME.lookup(volume)
+    return _result(volume, category)
+
+
+def measure_bile_duct_diameter(d_ducto_biliar: float):
+    value = round(d_ducto_biliar, 1)
+    category = BILE_DUCT_DIAMETER.lookup(value)
+    return _result(value, category)
+
+
+def measure_gallbladder_wall_thickness(espessura_parede: float):
+    value = round(espessura_parede, 1)
+    category = GALLBLADDER_WALL.lookup(value)
+    return _result(value, category)
+
+
+def grade_hepatic_steatosis_ultrasound(
+    ecogenicidade_figado: str,
+    visibilidade_diafragma: str,
+    atenuacao_posterior: str,
+):
+    eco = _normalize_text(ecogenicidade_figado)
+    dia = _normalize_text(visibilidade_diafragma)
+    atten = _normalize_text(atenuacao_posterior)
+
+    eco_score = {"normal": 0, "levemente_aumentada": 1, "moderadamente_aumentada": 2, "acentuadamente_aumentada": 3}.get(eco, 0)
+    dia_score = {"normal": 0, "reduzida": 2, "ausente": 3}.get(dia, 0)
+    att_score = {"ausente": 0, "leve": 1, "moderada": 2, "acentuada": 3}.get(atten, 0)
+
+    grade = max(eco_score, dia_score, att_score)
+    label = STEATOSIS_US_GRADE.lookup(grade)
+    return _result(grade, label)
+
+
+def grade_pancreatic_echogenicity(ecogenicidade_pancreas: str, comparacao_figado: str):
+    eco = _normalize_text(ecogenicidade_pancreas)
+    if eco == "normal":
+        label = "Normal"
+    elif eco == "levemente_aumentada":
+        label = "Pancreatite cronica leve"
+    elif eco == "moderadamente_aumentada":
+        label = "Pancreatite cronica moderada"
+    else:
+        label = "Pancreatite cronica grave"
+    return _result(label)
+
+
+def calculate_psoas_muscle_index(area_psoas: float, altura: float):
+    pmi = _safe_div(area_psoas, altura ** 2, 1)
+    return _result(pmi)
+
+
+def measure_visceral_fat_area(vfa_cm2: float):
+    value = round(vfa_cm2, 1)
+    category = VISCERAL_FAT_AREA.lookup(value)
+    return _result(value, category)
+
+
+def calculate_aorta_calcification_score(grau_calcificacao: float):
+    score = int(round(grau_calcificacao))
+    category = AORTA_CALCIFICATION.lookup(score)
+    return _result(score, category)
+
+
+def measure_bowel_wall_thickness(espessura_parede: float):
+    value = round(espessura_parede, 1)
+    category = BOWEL_WALL.lookup(value)
+    return _result(value, category)
+
+
+def grade_mesenteric_fat_stranding(grau_stranding: str):
+    return _result(MESENTERIC_STRANDING.lookup(_normalize_text(grau_stranding)))
+
+
+def calculate_hepatic_artery_ri(psv: float, edv: float):
+    ri = _ri_value(psv, edv)
+    if ri is None:
+        return _result(None)
+    category = VISCERAL_ARTERY_RI.lookup(ri)
+    return _result(ri, category)
+
+
+def classify_hepatic_vein_doppler(padr_o_fluxo: str):
+    return _result(HEPATIC_VEIN_DOPPLER.lookup(_normalize_text(padr_o_fluxo)))
+
+
+def measure_renal_artery_psv(psv_cm_s: float):
+    value = round(psv_cm_s, 1)
+    category = RENAL_ARTERY_PSV.lookup(value)
+    return _result(value, category)
+
+
+def measure_renal_artery_edv(edv_cm_s: float):
+    value = round(edv_cm_s, 1)
+    category = RENAL_ARTERY_EDV.lookup(value)
+    return _result(value, category)
+
+
+def calculate_renal_transplant_ri(psv: float, edv: float):
+    ri = _ri_value(psv, edv)
+    if ri is None:
+        return _result(None)
+    category = RENAL_TRANSPLANT_RI.lookup(ri)
+    return _result(ri, category)
+
+
+def measure_adrenal_size(diametro_max: float):
+    value = round(diametro_max, 1)
+    category = ADRENAL_SIZE.lookup(value)
+    return _result(value, category)
+
+
+def calculate_adrenal_lipid_index(hu_nc: float, hu_portal: float):
+    lipid_index = round(hu_nc, 1)
+    category = ADRENAL_LIPID_INDEX.lookup(lipid_index)
+    return _result(lipid_index, category)
+
+
+def calculate_splenic_artery_ri(psv: float, edv: float):
+    ri = _ri_value(psv, edv)
+    if ri is None:
+        return _result(None)
+    category = VISCERAL_ARTERY_RI.lookup(ri)
+    return _result(ri, category)
+
+
+def classify_spleen_doppler_flow(direcao_fluxo: str):
+    direction = _normalize_text(direcao_fluxo)
+    if direction == "hepatopetal":
+        return _result("Normal")
+    if direction == "bifasico":
+        return _result("Borderline")
+    if direction == "hepatofugal":
+        return _result("Reverso")
+    return _result("Indeterminado")
+
+
+def measure_bile_duct_stone_diameter(d_calcul: float):
+    value = round(d_calcul, 1)
+    category = BILE_DUCT_STONE.lookup(value)
+    return _result(value, category)
+
+
+def grade_hepatic_steatosis_ct(hu_figado: float, hu_rim: float):
+    diferenca = round(hu_figado - hu_rim, 1)
+    label = STEATOSIS_CT.lookup(diferenca)
+    return _result(diferenca, label)
+
+
+def calculate_stone_skin_distance_mean(ssd_1: float, ssd_2: float, ssd_3: float):
+    mean = round((ssd_1 + ssd_2 + ssd_3) / 3, 1)
+    return _result(mean)
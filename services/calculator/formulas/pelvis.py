@@ -0,0 +1,245 @@
+"""
+Pelvis: urology, gynecology / obstetrics and rectum.
+"""
+from typing import Optional
+
+from ._common import _normalize_text, _safe_div, _as_bool, _volume_ellipsoid, _result
+from ._ladders import (
+    BLADDER_OUTLET_OBSTRUCTION, FIBROID_VOLUME, GLEASON_GROUP, OVARIAN_RESERVE_AMH, OVARIAN_VOLUME,
+    POST_VOID_RESIDUAL, PROSTATE_VOLUME, PSA_DENSITY, RECTAL_CANCER_DEPTH, RECTAL_WALL, RESECTION_MARGIN,
+    TZ_PSA_DENSITY,
+)
+from ._tables import RECTAL_TNM
+
+
+# Urologia
+
+def calculate_prostate_volume_ellipsoid(comprimento: float, largura: float, altura: float):
+    volume = _volume_ellipsoid(comprimento, largura, altura, 0.52, 1)
+    category = PROSTATE_VOLUME.lookup(volume)
+    return _result(volume, category)
+
+
+def classify_prostate_pirads_v2_1(t2_score: float, dwi_score: float, dce_score: float, localizacao: str):
+    zone = _normalize_text(localizacao)
+    if zone == "zona_periferica":
+        base = int(round(dwi_score))
+        if base == 3 and dce_score > 0:
+            base = 4
+    else:
+        base = int(round(t2_score))
+        if base == 3 and dwi_score >= 4:
+            base = 4
+    base = min(max(base, 1), 5)
+    return _result(base)
+
+
+def calculate_prostate_psa_density(psa: float, volume_prostata: float):
+    psad = _safe_div(psa, volume_prostata, 3)
+    if psad is None:
+        return _result(None)
+    category = PSA_DENSITY.lookup(psad)
+    return _result(psad, category)
+
+
+def calculate_transition_zone_psa_density(psa: float, volume_tz: float):
+    tz_psad = _safe_div(psa, volume_tz, 3)
+    if tz_psad is None:
+        return _result(None)
+    category = TZ_PSA_DENSITY.lookup(tz_psad)
+    return _result(tz_psad, category)
+
+
+def diagnose_extraprostatic_extension(epe_presente: bool, lateralidade: str):
+    if not _as_bool(epe_presente):
+        return _result("Sem EPE; T2")
+    side = _normalize_text(lateralidade)
+    if side == "bilateral":
+        return _result("EPE bilateral; T3a")
+    return _result("EPE unilateral; T3a")
+
+
+def diagnose_seminal_vesicle_invasion(svi_presente: bool, lateralidade: str):
+    if not _as_bool(svi_presente):
+        return _result("Sem SVI; T2-T3a")
+    side = _normalize_text(lateralidade)
+    if side == "bilateral":
+        return _result("SVI bilateral; T3b")
+    return _result("SVI unilateral; T3b")
+
+
+def estimate_gleason_score_mri(dwi_score: float, dce_score: float, t2_score: float):
+    if dwi_score <= 2 and dce_score <= 1:
+        return _result("Gleason 6-7")
+    if dwi_score == 3 or dce_score == 2:
+        return _result("Gleason 7")
+    if dwi_score >= 4 or dce_score == 3:
+        return _result("Gleason 8-10")
+    return _result("Indeterminado")
+
+
+def grade_prostate_cancer_gleason(gleason_primary: float, gleason_secondary: float):
+    score = int(round(gleason_primary + gleason_secondary))
+    category = GLEASON_GROUP.lookup(score)
+    return _result(score, category)
+
+
+def measure_uterine_artery_doppler(ri_arteria_uterina: float, notch_diastolico: bool):
+    ri = round(ri_arteria_uterina, 2)
+    if ri < 0.58 and not _as_bool(notch_diastolico):
+        category = "Normal"
+    else:
+        category = "Aumentado"
+    return _result(ri, category)
+
+
+def calculate_bladder_outlet_obstruction_index(pressao_detrusor_max: float, fluxo_urinario_max: float):
+    boo_index = round(pressao_detrusor_max - 2 * fluxo_urinario_max, 1)
+    category = BLADDER_OUTLET_OBSTRUCTION.lookup(boo_index)
+    return _result(boo_index, category)
+
+
+def measure_bladder_wall_thickness(espessura_parede: float, volume_bexiga: float):
+    value = round(espessura_parede, 1)
+    if value < 3 and volume_bexiga > 300:
+        category = "Normal"
+    elif value <= 5:
+        category = "Borderline"
+    else:
+        category = "Espessado"
+    return _result(value, category)
+
+
+def measure_post_void_residual_volume(volume_residuo: float):
+    value = round(volume_residuo, 1)
+    category = POST_VOID_RESIDUAL.lookup(value)
+    return _result(value, category)
+
+
+# Ginecologia / Obstetricia
+
+def calculate_hadlock_efw(ac: float, fl: float, bpd: Optional[float] = None, hc: Optional[float] = None):
+    log_weight = 1.304 + 0.05281 * ac + 0.1938 * fl - 0.004 * ac * fl
+    weight = round(10 ** log_weight, 0)
+    return _result(weight)
+
+
+def calculate_ovarian_volume_ellipsoid(comprimento: float, largura: float, espessura: float):
+    volume = _volume_ellipsoid(comprimento, largura, espessura, 0.52, 1)
+    category = OVARIAN_VOLUME.lookup(volume)
+    return _result(volume, category)
+
+
+def classify_ovarian_lesion_orads_us(
+    tamanho_mm: float,
+    composicao: str,
+    vascularizacao: str,
+    achados_adicionais: Optional[str] = None,
+):
+    comp = _normalize_text(composicao)
+    vasc = _normalize_text(vascularizacao)
+
+    # Simplified mapping based on composition/vascularity only.
+    if comp == "cistica_simples" and vasc == "ausente":
+        category = 2
+    elif comp == "cistica_complexa":
+        category = 3 if vasc == "ausente" else 4
+    elif comp == "mista":
+        category = 4 if vasc == "presente" else 3
+    elif comp == "solida":
+        category = 5 if vasc == "presente" else 4
+    else:
+        category = 3
+
+    return _result(int(category), None, achados_adicionais=achados_adicionais)
+
+
+def diagnose_ovarian_torsion(doppler_fluxo: str, volume_ovario: float, edema_estroma: bool):
+    fluxo = _normalize_text(doppler_fluxo)
+    edema = _as_bool(edema_estroma)
+    if fluxo == "ausente" and volume_ovario > 20 and edema:
+        return _result("Provavel torsao")
+    if fluxo == "reduzido" and edema:
+        return _result("Possivel torsao")
+    if fluxo == "presente" and not edema:
+        return _result("Nao torsao")
+    return _result("Indeterminado")
+
+
+def assess_ovarian_reserve_amh(amh_ng_ml: float):
+    category = OVARIAN_RESERVE_AMH.lookup(amh_ng_ml)
+    return _result(round(amh_ng_ml, 2), category)
+
+
+def measure_endometrial_thickness(espessura_endometrio: float, fase_ciclo: str):
+    fase = _normalize_text(fase_ciclo)
+    value = round(espessura_endometrio, 1)
+    if fase == "proliferativa" and value < 8:
+        category = "Normal"
+    elif fase == "secretoria" and value < 14:
+        category = "Normal"
+    elif value > 20:
+        category = "Muito espessado"
+    elif value > 16 and fase != "menstrual":
+        category = "Espessado"
+    else:
+        category = "Indeterminado"
+    return _result(value, category)
+
+
+def calculate_uterine_fibroid_volume(comprimento: float, largura: float, altura: float):
+    volume = _volume_ellipsoid(comprimento, largura, altura, 0.52, 1)
+    category = FIBROID_VOLUME.lookup(volume)
+    return _result(volume, category)
+
+
+def measure_adenomyosis_junctional_zone(espessura_jz: float, irregularidade_jz: bool):
+    value = round(espessura_jz, 1)
+    irregular = _as_bool(irregularidade_jz)
+    if value < 8 and not irregular:
+        category = "Normal"
+    elif value <= 12 and irregular:
+        category = "Adenomiose leve"
+    elif value <= 16 and irregular:
+        category = "Adenomiose moderada"
+    elif value > 16 and irregular:
+        category = "Adenomiose grave"
+    else:
+        category = "Indeterminado"
+    return _result(value, category)
+
+
+def measure_rectal_wall_thickness(espessura_parede: float):
+    value = round(espessura_parede, 1)
+    category = RECTAL_WALL.lookup(value)
+    return _result(value, category)
+
+
+def classify_rectal_cancer_tnm(t_stage: str, n_stage: str, m_stage: str):
+    t_val = _normalize_text(t_stage).upper()
+    n_val = _normalize_text(n_stage).upper()
+    m_val = _normalize_text(m_stage).upper()
+    return _result(f"{t_val}{n_val}{m_val}", RECTAL_TNM.lookup(t_val, n_val, m_val))
+
+
+def measure_circumferential_resection_margin(distancia_crm: float):
+    value = round(distancia_crm, 1)
+    category = RESECTION_MARGIN.lookup(value)
+    return _result(value, category)
+
+
+def measure_rectal_cancer_depth(profundidade_invasao: float):
+    value = round(profundidade_invasao, 1)
+    category = RECTAL_CANCER_DEPTH.lookup(value)
+    return _result(value, category)
+
+
+def classify_lymph_node_staging(numero_linfonodos: float, diametro_max: float):
+    count = int(round(numero_linfonodos))
+    if count == 0:
+        category = "N0"
+    elif count <= 3:
+        category = "N1"
+    else:
+        category = "N2"
+    return _result(category, None, numero_linfonodos=count, diametro_max=diametro_max)
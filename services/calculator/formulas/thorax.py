@@ -0,0 +1,97 @@
+"""
+Thorax: pleura, pulmonary vessels, nodules, emphysema and PESI.
+"""
+from ._common import _normalize_text, _safe_div, _as_bool, _result
+from ._ladders import EMPHYSEMA_LAA, PA_AORTA_RATIO, PESI, PLEURAL_EFFUSION, RV_LV_RATIO
+
+
+def calculate_pleural_effusion_volume_ct(profundidade_max: float, comprimento_max: float):
+    if profundidade_max <= 0:
+        return _result(None)
+    d_cm = profundidade_max / 10.0
+    volume = 0.365 * (d_cm ** 3) - 4.529 * (d_cm ** 2) + 159.723 * d_cm - 88.377
+    volume = round(volume, 1)
+    category = PLEURAL_EFFUSION.lookup(volume)
+    return _result(volume, category, comprimento_max=comprimento_max)
+
+
+def calculate_rv_lv_ratio(d_rv: float, d_lv: float):
+    ratio = _safe_div(d_rv, d_lv, 2)
+    if ratio is None:
+        return _result(None)
+    category = RV_LV_RATIO.lookup(ratio)
+    return _result(ratio, category)
+
+
+def calculate_pa_aorta_ratio(d_pa: float, d_ao: float):
+    ratio = _safe_div(d_pa, d_ao, 2)
+    if ratio is None:
+        return _result(None)
+    category = PA_AORTA_RATIO.lookup(ratio)
+    return _result(ratio, category)
+
+
+def classify_nodule_fleischner_2017(tamanho_mm: float, tipo_nodulo: str, risco_paciente: str):
+    tipo = _normalize_text(tipo_nodulo)
+    risco = _normalize_text(risco_paciente)
+    if tipo in {"solido"}:
+        if tamanho_mm < 4:
+            return _result("Sem follow-up necessario")
+        if tamanho_mm <= 6:
+            if risco == "alto":
+                return _result("Follow-up 6-8 semanas")
+            return _result("Follow-up 12 meses")
+        if tamanho_mm <= 8:
+            return _result("Follow-up 6-8 semanas depois 3-6 meses")
+        return _result("PET-CT ou biopsia")
+
+    if tipo in {"subssolido", "vidro_fosco_puro"}:
+        if tamanho_mm < 6:
+            return _result("Sem follow-up")
+        return _result("Follow-up 3-6 meses depois 18-24 meses")
+
+    return _result("Indeterminado")
+
+
+def calculate_emphysema_index_laa(voxels_950_hu: float, voxels_totais_pulmao: float):
+    percentage = _safe_div(voxels_950_hu, voxels_totais_pulmao, None)
+    if percentage is None:
+        return _result(None)
+    percentage = round(percentage * 100, 1)
+    category = EMPHYSEMA_LAA.lookup(percentage)
+    return _result(percentage, category)
+
+
+def calculate_pesi_score(
+    idade: float,
+    sexo: str,
+    fc: float,
+    pas: float,
+    fr: float,
+    temperatura: float,
+    consciencia_alterada: bool,
+    sao2: float,
+    icc: bool,
+    dpoc: bool,
+):
+    score = idade
+    if _normalize_text(sexo) == "m":
+        score += 10
+    if fc >= 110:
+        score += 30
+    if pas < 100:
+        score += 20
+    if fr >= 30:
+        score += 20
+    if temperatura < 36:
+        score += 20
+    if _as_bool(consciencia_alterada):
+        score += 60
+    if _as_bool(icc):
+        score += 20
+    if _as_bool(dpoc):
+        score += 10
+
+    category = PESI.lookup(score)
+
+    return _result(int(score), category)
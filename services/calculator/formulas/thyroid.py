@@ -0,0 +1,40 @@
+"""
+Thyroid: TI-RADS and gland volume.
+"""
+from typing import Optional
+
+from ._common import _normalize_text, _volume_ellipsoid, _result
+from ._tables import TIRADS
+
+
+def classify_thyroid_nodule_tirads(
+    composicao: str,
+    ecogenicidade: str,
+    forma: str,
+    margens: str,
+    focos_ecogenicos: str,
+):
+    level = TIRADS.lookup(
+        _normalize_text(composicao),
+        _normalize_text(ecogenicidade),
+        _normalize_text(forma),
+        _normalize_text(margens),
+        _normalize_text(focos_ecogenicos),
+    )
+    return _result(level)
+
+
+def calculate_thyroid_volume_ellipsoid(
+    l_rd: float,
+    w_rd: float,
+    h_rd: float,
+    l_ld: float,
+    w_ld: float,
+    h_ld: float,
+    v_istmo: Optional[float] = None,
+):
+    vol_rd = _volume_ellipsoid(l_rd, w_rd, h_rd, 0.52, 1)
+    vol_ld = _volume_ellipsoid(l_ld, w_ld, h_ld, 0.52, 1)
+    istmo = v_istmo or 0.0
+    total = round(vol_rd + vol_ld + istmo, 1)
+    return _result(total)
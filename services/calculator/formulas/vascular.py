@@ -0,0 +1,138 @@
+"""
+Vascular: Doppler indices, stenosis grading and aortic measurements.
+"""
+from typing import Optional
+
+from ._common import _normalize_text, _safe_div, _as_bool, _ri_value, _result
+from ._ladders import (
+    AAA_DIAMETER, ANKLE_BRACHIAL, AORTIC_ABDOMINAL, AORTIC_ROOT, CAROTID_IMT, CAROTID_STENOSIS,
+    IVC_COLLAPSIBILITY, PORTAL_CONGESTION, PULSATILITY_INDEX, RESISTIVE_INDEX,
+)
+from ._tables import STANFORD
+
+
+def calculate_resistive_index(psv: float, edv: float):
+    ri = _ri_value(psv, edv)
+    if ri is None:
+        return _result(None)
+    category = RESISTIVE_INDEX.lookup(ri)
+    return _result(ri, category)
+
+
+def calculate_pulsatility_index(psv: float, edv: float, v_mean: float):
+    pi = _safe_div(psv - edv, v_mean, 2)
+    if pi is None:
+        return _result(None)
+    category = PULSATILITY_INDEX.lookup(pi)
+    return _result(pi, category)
+
+
+def calculate_nascet_stenosis(d_stenosis: float, d_distal: float):
+    percent = _safe_div(d_distal - d_stenosis, d_distal, None)
+    if percent is None:
+        return _result(None)
+    percent = round(percent * 100, 1)
+    category = CAROTID_STENOSIS.lookup(percent)
+    return _result(percent, category)
+
+
+def calculate_ras_doppler_criteria(psv_renal: float, psv_aorta: float):
+    rar = _safe_div(psv_renal, psv_aorta, 2)
+    if rar is None:
+        return _result(None)
+    if psv_renal < 180 and rar < 3.5:
+        category = "Sem estenose significativa"
+    elif (180 <= psv_renal <= 200) or (3.5 <= rar <= 4.0):
+        category = "Borderline; considerar confirmacao"
+    else:
+        category = "Provavel estenose >=60%"
+    return _result(rar, category, psv_renal=round(psv_renal, 1))
+
+
+def calculate_aaa_growth_rate(d_atual: float, d_anterior: float, intervalo_anos: float):
+    growth_rate = _safe_div(d_atual - d_anterior, intervalo_anos, 1)
+    if growth_rate is None:
+        return _result(None)
+
+    category = AAA_DIAMETER.lookup(d_atual)
+
+    rapid_growth = growth_rate > 3.0
+    return _result(growth_rate, category, rapid_growth=rapid_growth)
+
+
+def classify_aortic_dissection_stanford(envolve_ascendente: bool, localizacao_lacera_o: str):
+    return _result(STANFORD.lookup(_as_bool(envolve_ascendente), _normalize_text(localizacao_lacera_o)))
+
+
+def calculate_ivc_collapsibility_index(d_max_inspiracao: float, d_min_expira_o: float):
+    ci = _safe_div(d_max_inspiracao - d_min_expira_o, d_max_inspiracao, None)
+    if ci is None:
+        return _result(None)
+    ci = round(ci * 100, 1)
+    category = IVC_COLLAPSIBILITY.lookup(ci)
+    return _result(ci, category)
+
+
+def calculate_portal_vein_congestion_index(v_max_portal: float, v_min_portal: float):
+    ci = _safe_div(v_max_portal - v_min_portal, v_max_portal, 2)
+    if ci is None:
+        return _result(None)
+    category = PORTAL_CONGESTION.lookup(ci)
+    return _result(ci, category)
+
+
+def calculate_ecst_stenosis(d_estenose: float, d_proximal: float):
+    percent = _safe_div(d_proximal - d_estenose, d_proximal, None)
+    if percent is None:
+        return _result(None)
+    percent = round(percent * 100, 1)
+    category = CAROTID_STENOSIS.lookup(percent)
+    return _result(percent, category)
+
+
+def calculate_mesenteric_stenosis_doppler(psv_sma: float, psv_celiaca: Optional[float] = None):
+    if psv_sma > 400 or (psv_celiaca is not None and psv_celiaca > 250):
+        category = "Provavel estenose significativa"
+    elif (275 <= psv_sma <= 400) or (psv_celiaca is not None and 200 <= psv_celiaca <= 250):
+        category = "Borderline; considerar confirmacao"
+    else:
+        category = "Sem estenose significativa"
+    return _result(psv_sma, category, psv_celiaca=psv_celiaca)
+
+
+def measure_carotid_intima_media_thickness(imt_mm: float):
+    category = CAROTID_IMT.lookup(imt_mm)
+    return _result(round(imt_mm, 2), category)
+
+
+def diagnose_dvt_compression_criteria(compressibilidade: str, lado_contralateral: str):
+    comp = _normalize_text(compressibilidade)
+    contra = _normalize_text(lado_contralateral)
+    if comp == "incompressivel" and contra == "normal":
+        return _result("DVT presente")
+    return _result("Sem TVP")
+
+
+def calculate_ankle_brachial_index(p_tornozelo: float, p_braquial: float):
+    abi = _safe_div(p_tornozelo, p_braquial, 2)
+    if abi is None:
+        return _result(None)
+    category = ANKLE_BRACHIAL.lookup(abi)
+    return _result(abi, category)
+
+
+def measure_aortic_diameter(d_aorta: float, localizacao: str):
+    location = _normalize_text(localizacao)
+    category = ""
+    if location == "raiz":
+        category = AORTIC_ROOT.lookup(d_aorta)
+    elif location == "ascendente":
+        if d_aorta < 37:
+            category = "Normal"
+        elif d_aorta > 50:
+            category = "Aneurisma aortico"
+        else:
+            category = "Borderline"
+    elif location == "abdominal":
+        category = AORTIC_ABDOMINAL.lookup(d_aorta)
+    return _result(round(d_aorta, 1), category or None, localizacao=location)
@@ -0,0 +1,144 @@
+"""
+Dependency-graph batches: inputs that reference another row's result.
+
+An input given as {"$ref": "vol1.value"} is replaced by the `value` field of
+the result of the row whose ref_id is "vol1". "vol1" alone takes the whole
+result, and further dotted parts walk nested fields. Rows run level by level
+in topological order, and each level is evaluated as an ordinary batch, so
+independent rows still share dedup, the cache and the process pool. A row
+that cannot run gets its own error instead: an unknown or ambiguous
+reference, a reference cycle, or a failed upstream row.
+"""
+from collections import defaultdict
+from typing import Any, Optional
+
+import metrics
+import pool
+from engine import Outcome
+
+REF = "$ref"
+# Batches whose body does not contain this skip the graph entirely.
+MARKER = b'"$ref"'
+
+UNRESOLVED_REFERENCE = "unresolved_reference"
+DEPENDENCY_CYCLE = "dependency_cycle"
+UPSTREAM_ERROR = "upstream_error"
+ERROR_CODES = (UNRESOLVED_REFERENCE, DEPENDENCY_CYCLE, UPSTREAM_ERROR)
+
+_AMBIGUOUS = -1
+
+
+def refs(inputs: dict) -> dict[str, str]:
+    """input name -> reference, for the inputs given as {"$ref": "..."}."""
+    return {
+        name: value[REF] for name, value in inputs.items()
+        if value.__class__ is dict and len(value) == 1 and isinstance(value.get(REF), str)
+    }
+
+
+def _target(ref: str, index: dict[str, int]) -> tuple[Optional[int], list[str]]:
+    """(row, path into its result) for a reference; the row is None if unknown."""
+    if ref in index:
+        return index[ref], []
+    ref_id, _, path = ref.partition(".")
+    return index.get(ref_id), path.split(".") if path else []
+
+
+def _lookup(result: Any, path: list[str]) -> tuple[bool, Any]:
+    for part in path:
+        if not isinstance(result, dict) or part not in result:
+            return False, None
+        result = result[part]
+    return True, result
+
+
+def _substitute(
+    request: dict, targets: dict[str, tuple[int, list[str], str]], requests: list[dict], outcomes: list,
+) -> tuple[Optional[dict], Optional[Outcome]]:
+    """(inputs with references resolved, None) or (None, the row's error)."""
+    inputs = dict(request["inputs"])
+    for name, (upstream, path, ref) in targets.items():
+        result, error, _ = outcomes[upstream]
+        if error is not None:
+            source = requests[upstream].get("ref_id")
+            return None, (None, f"Input '{name}' depends on '{source}', which failed: {error}", UPSTREAM_ERROR)
+        found, value = _lookup(result, path)
+        if not found or value is None:
+            return None, (None, f"Input '{name}': reference '{ref}' has no value", UNRESOLVED_REFERENCE)
+        inputs[name] = value
+    return inputs, None
+
+
+async def evaluate(
+    requests: list[dict], sample: metrics.Sample, deadline: Optional[float] = None,
+) -> list[Outcome]:
+    """Evaluate a batch whose inputs may reference other rows; `sample` receives its metrics."""
+    index: dict[str, int] = {}
+    for i, request in enumerate(requests):
+        ref_id = request.get("ref_id")
+        if ref_id is not None:
+            index[ref_id] = _AMBIGUOUS if ref_id in index else i
+
+    outcomes: list[Optional[Outcome]] = [None] * len(requests)
+    own = metrics.Sample()
+
+    def fail(i: int, outcome: Outcome):
+        outcomes[i] = outcome
+        own.error(requests[i]["formula"], outcome[2])
+
+    targets: dict[int, dict[str, tuple[int, list[str], str]]] = {}
+    dependents: dict[int, list[int]] = defaultdict(list)
+    waiting: dict[int, int] = {}
+    for i, request in enumerate(requests):
+        found = refs(request["inputs"])
+        if not found:
+            continue
+        targets[i] = {}
+        for name, ref in found.items():
+            upstream, path = _target(ref, index)
+            if upstream is None or upstream == _AMBIGUOUS:
+                problem = "matches several rows" if upstream == _AMBIGUOUS else "matches no ref_id"
+                fail(i, (None, f"Input '{name}': reference '{ref}' {problem}", UNRESOLVED_REFERENCE))
+                break
+            targets[i][name] = (upstream, path, ref)
+        if outcomes[i] is not None:
+            continue
+        upstreams = {upstream for upstream, _, _ in targets[i].values()}
+        waiting[i] = len(upstreams)
+        for upstream in upstreams:
+            dependents[upstream].append(i)
+
+    level = [i for i in range(len(requests)) if i not in waiting]
+    while level:
+        run, calls = [], []
+        for i in level:
+            if outcomes[i] is not None:
+                continue
+            inputs = requests[i]["inputs"]
+            if i in targets:
+                inputs, failure = _substitute(requests[i], targets[i], requests, outcomes)
+                if failure is not None:
+                    fail(i, failure)
+                    continue
+            run.append(i)
+            calls.append((requests[i]["formula"], inputs))
+        if calls:
+            # evaluate_batch_async records its own sample; keep them apart.
+            part = metrics.Sample()
+            for i, outcome in zip(run, await pool.evaluate_batch_async(calls, part, deadline)):
+                outcomes[i] = outcome
+            sample.merge(part)
+        ready = []
+        for i in level:
+            for dependent in dependents.get(i, ()):
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    ready.append(dependent)
+        level = sorted(ready)
+
+    for i, outcome in enumerate(outcomes):
+        if outcome is None:
+            fail(i, (None, "Row is part of, or depends on, a reference cycle", DEPENDENCY_CYCLE))
+    metrics.REGISTRY.record(own)
+    sample.merge(own)
+    return outcomes
@@ -0,0 +1,137 @@
+"""
+Idempotency-Key support for /compute.
+
+A request carrying an Idempotency-Key header is answered once. The encoded
+response is kept for CALC_IDEMPOTENCY_TTL_SECONDS, so a retry gets the same
+bytes back without re-evaluating or re-encoding the batch. A duplicate that
+arrives while the first request is still running waits for that computation
+instead of starting a second one. Replays carry `Idempotent-Replayed: true`.
+The same key with a different body (or Accept type) is a client error, 422.
+
+Only complete 200 responses are kept. Errors, shed requests and batches cut
+short by a deadline are computed again on retry. The store is per process,
+so with serve.py a retry only hits it when it reaches the same worker.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from starlette.responses import Response
+
+import metrics
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("CALC_IDEMPOTENCY_TTL_SECONDS", "300"))
+IDEMPOTENCY_MAX_BYTES = int(os.getenv("CALC_IDEMPOTENCY_MAX_BYTES", str(64 * 1024 * 1024)))
+
+HEADER = "idempotency-key"
+REPLAYED = "Idempotent-Replayed"
+
+
+class KeyReused(Exception):
+    """The key was already used for a different request."""
+
+
+def fingerprint(media_type: str, body: bytes) -> bytes:
+    return hashlib.sha256(media_type.encode("ascii") + b"\0" + body).digest()
+
+
+class _Stored:
+    __slots__ = ("expires_at", "fingerprint", "status_code", "body", "media_type", "headers")
+
+    def __init__(self, fingerprint: bytes, response: Response, ttl_seconds: float):
+        self.expires_at = time.monotonic() + ttl_seconds
+        self.fingerprint = fingerprint
+        self.status_code = response.status_code
+        self.body = response.body
+        self.media_type = response.media_type
+        self.headers = {
+            name: value for name, value in response.headers.items()
+            if name not in ("content-length", "content-type")
+        }
+
+    def response(self) -> Response:
+        return Response(
+            self.body, status_code=self.status_code, media_type=self.media_type,
+            headers={**self.headers, REPLAYED: "true"},
+        )
+
+
+class IdempotencyStore:
+    """Stored responses and in-flight computations by key. Used from the event loop only."""
+
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._stored: OrderedDict[str, _Stored] = OrderedDict()
+        self._running: dict[str, tuple[bytes, asyncio.Future]] = {}
+
+    def _get(self, key: str) -> Optional[_Stored]:
+        stored = self._stored.get(key)
+        if stored is not None and stored.expires_at <= time.monotonic():
+            self._drop(key)
+            return None
+        return stored
+
+    def _drop(self, key: str):
+        self.bytes -= len(self._stored.pop(key).body)
+
+    def _keep(self, key: str, stored: _Stored):
+        size = len(stored.body)
+        if size > self.max_bytes:
+            return
+        if key in self._stored:
+            self._drop(key)
+        self._stored[key] = stored
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self._stored)))
+
+    async def run(self, key: str, fingerprint: bytes, compute: Callable[[], Awaitable[Response]]) -> Response:
+        """The response stored for `key`, the one being computed for it, or a fresh one."""
+        while True:
+            stored = self._get(key)
+            if stored is not None:
+                self._check(fingerprint, stored.fingerprint)
+                metrics.IDEMPOTENCY.inc("replayed")
+                return stored.response()
+            running = self._running.get(key)
+            if running is None:
+                break
+            self._check(fingerprint, running[0])
+            # Wait without being cancelled along with the first request.
+            await asyncio.wait([running[1]])
+            if not running[1].cancelled():
+                metrics.IDEMPOTENCY.inc("joined")
+                return _Stored(fingerprint, running[1].result(), 0).response()
+            # The first request went away; whoever gets here first runs it.
+
+        future = asyncio.get_running_loop().create_future()
+        self._running[key] = (fingerprint, future)
+        try:
+            response = await compute()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # retrieved: followers re-raise it themselves
+            raise
+        finally:
+            del self._running[key]
+        if response.status_code == 200 and response.headers.get("x-calc-deadline-exceeded", "0") == "0":
+            self._keep(key, _Stored(fingerprint, response, self.ttl_seconds))
+            metrics.IDEMPOTENCY.inc("stored")
+        future.set_result(response)
+        return response
+
+    def _check(self, fingerprint: bytes, expected: bytes):
+        if fingerprint != expected:
+            metrics.IDEMPOTENCY.inc("conflict")
+            raise KeyReused("Idempotency-Key was already used with a different request body")
+
+
+RESPONSES = IdempotencyStore(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_BYTES)
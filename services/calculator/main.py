@@ -1,44 +1,231 @@
-from fastapi import FastAPI
+from contextlib import AsyncExitStack, asynccontextmanager
+from time import monotonic, time_ns
+from typing import Annotated, Literal, Optional
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse
+from fastapi.exceptions import RequestValidationError
+from pydantic import PositiveFloat, StringConstraints, TypeAdapter, ValidationError
 from schemas import CalcBatch, CalcResult
 from formulas import FORMULAS
+import admission
+import api
+import cache
+import catalog
+import engine
+import fastpath
+import graph
+import idempotency
+import metrics
+import pool
+import streaming
+import tracing
+import wire
+from validation import DEADLINE_EXCEEDED
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if cache.CACHE_WARM_FILE:
+        engine.warm_cache(cache.CACHE_WARM_FILE)
+    yield
+    pool.shutdown()
+
+
+app = FastAPI(title="Radon Calculator Service", lifespan=lifespan)
+
+def openapi():
+    # /compute reads its body itself, so register the CalcBatch schema it
+    # references by hand.
+    if app.openapi_schema is None:
+        schema = FastAPI.openapi(app)
+        batch = CalcBatch.model_json_schema(ref_template="#/components/schemas/{model}")
+        components = schema.setdefault("components", {}).setdefault("schemas", {})
+        components.update(batch.pop("$defs", {}))
+        components["CalcBatch"] = batch
+    return app.openapi_schema
+
+app.openapi = openapi
+
+async def _parse_body(request: Request) -> dict:
+    body = await request.body()
+    try:
+        return fastpath.parse_payload(body)
+    except ValidationError:
+        raise RequestValidationError(fastpath.validation_errors(body))
+
+DEADLINE_HEADER = "x-calc-deadline-ms"
+PRIORITY_HEADER = "x-calc-priority"
+
+_DEADLINE_MS = TypeAdapter(PositiveFloat)
+_LANE = TypeAdapter(Literal[admission.LANES])
+_IDEMPOTENCY_KEY = TypeAdapter(Annotated[str, StringConstraints(min_length=1, max_length=255)])
+
+def _header(request: Request, name: str, adapter: TypeAdapter, default=None):
+    value = request.headers.get(name)
+    if value is None:
+        return default
+    try:
+        return adapter.validate_python(value)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("header", name)} for error in e.errors(include_url=False)])
 
-app = FastAPI(title="Radon Calculator Service")
+def _deadline(request: Request, payload: dict, received: float) -> Optional[float]:
+    """The monotonic() instant set by X-Calc-Deadline-Ms or deadline_ms, whichever comes first."""
+    budgets = [payload.get("deadline_ms"), _header(request, DEADLINE_HEADER, _DEADLINE_MS)]
+    budgets = [budget for budget in budgets if budget is not None]
+    return received + min(budgets) / 1000 if budgets else None
+
+def _shed(e: admission.Shed) -> Response:
+    return Response(
+        fastpath.dumps({"detail": str(e)}),
+        status_code=429,
+        media_type="application/json",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+_HEALTH = fastpath.dumps({"status": "ok", "formulas_available": list(FORMULAS), "catalog_etag": catalog.ETAG})
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "formulas_available": list(FORMULAS.keys())}
-
-@app.post("/compute", response_model=list[CalcResult])
-def compute(batch: CalcBatch) -> list[CalcResult]:
-    results = []
-    for req in batch.requests:
-        if req.formula not in FORMULAS:
-            results.append(CalcResult(
-                ref_id=req.ref_id,
-                formula=req.formula,
-                result=None,
-                error=f"Formula '{req.formula}' not found",
-            ))
-            continue
-
-        try:
-            fn = FORMULAS[req.formula]
-            result = fn(**req.inputs)
-            results.append(CalcResult(
-                ref_id=req.ref_id,
-                formula=req.formula,
-                result=result,
-                error=None,
-            ))
-        except Exception as e:
-            results.append(CalcResult(
-                ref_id=req.ref_id,
-                formula=req.formula,
-                result=None,
-                error=str(e),
-            ))
-
-    return results
+    return Response(_HEALTH, media_type="application/json")
+
+@app.get("/formulas")
+def formula_catalog(request: Request):
+    headers = {"ETag": catalog.ETAG, "Cache-Control": "no-cache"}
+    if catalog.not_modified(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(catalog.body(), media_type="application/json", headers=headers)
+
+@app.get("/cache")
+def cache_stats():
+    return cache.RESULTS.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    body = metrics.REGISTRY.render(
+        metrics.cache_metrics(cache.RESULTS.stats()) + metrics.trace_metrics(tracing.EXPORTER.dropped)
+    )
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/compute/dictionary")
+def compute_dictionary():
+    return wire.dictionary()
+
+@app.post(
+    "/compute",
+    response_model=list[CalcResult],
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/CalcBatch"}}},
+    }},
+)
+async def compute(request: Request):
+    received = monotonic()
+    with tracing.request("POST /compute", request.headers.get(tracing.TRACEPARENT)) as trace:
+        response = await _answer(request, received, trace)
+        if trace is not None:
+            trace.attributes["http.response.status_code"] = response.status_code
+        return response
+
+async def _answer(request: Request, received: float, trace: Optional[tracing.Span]) -> Response:
+    media_type = wire.negotiate(request.headers.get("accept"))
+    if media_type is None:
+        return Response(status_code=406)
+    key = _header(request, idempotency.HEADER, _IDEMPOTENCY_KEY)
+    if key is None:
+        return await _compute(request, media_type, received, trace)
+    fingerprint = idempotency.fingerprint(media_type, await request.body())
+    try:
+        return await idempotency.RESPONSES.run(
+            key, fingerprint, lambda: _compute(request, media_type, received, trace),
+        )
+    except idempotency.KeyReused as e:
+        return Response(fastpath.dumps({"detail": str(e)}), status_code=422, media_type="application/json")
+
+async def _compute(request: Request, media_type: str, received: float, trace: Optional[tracing.Span]) -> Response:
+    # The body is parsed and the response encoded by fastpath instead of
+    # FastAPI, so the per-row model round trip can be skipped.
+    lane = _header(request, PRIORITY_HEADER, _LANE, admission.ROUTINE)
+    metrics.IN_FLIGHT.inc("compute")
+    waiting = time_ns()
+    try:
+        # Time spent queued for a slot counts against the deadline.
+        async with admission.CONTROLLER.slot(lane):
+            tracing.since(trace, "admission", waiting)
+            with tracing.span(trace, "parse"):
+                payload = await _parse_body(request)
+                requests = payload["requests"]
+                deadline = _deadline(request, payload, received)
+            metrics.BATCH_ROWS.observe("compute", value=len(requests))
+            sample = metrics.Sample()
+            has_refs = graph.MARKER in await request.body()
+            with tracing.span(trace, "evaluate") as evaluating:
+                outcomes = await api.dispatch(requests, sample, deadline, has_refs)
+                tracing.formula_spans(evaluating, sample)
+    except admission.Shed as e:
+        return _shed(e)
+    finally:
+        metrics.IN_FLIGHT.dec("compute")
+    headers = {
+        "X-Calc-Deduplicated": str(sample.deduplicated),
+        "X-Calc-Shared-Helpers": str(sample.shared_helpers),
+    }
+    if deadline is not None:
+        expired = sum(1 for outcome in outcomes if outcome[2] == DEADLINE_EXCEEDED)
+        if expired:
+            metrics.DEADLINES.inc("compute")
+        headers["X-Calc-Deadline-Exceeded"] = str(expired)
+    if trace is not None:
+        trace.attributes.update({"calc.rows": len(requests), "calc.lane": lane, "calc.refs": has_refs})
+    with tracing.span(trace, "serialize"):
+        if media_type == wire.MSGPACK:
+            rows = [fastpath.result_row(req, outcome) for req, outcome in zip(requests, outcomes)]
+            try:
+                return Response(wire.encode(rows), media_type=wire.MSGPACK, headers=headers)
+            except wire.TooManyStrings:
+                pass  # answered in JSON below; the Content-Type tells the client
+        return Response(fastpath.render(requests, outcomes), media_type="application/json", headers=headers)
+
+@app.post("/compute/stream")
+async def compute_stream(request: Request):
+    received = monotonic()
+    lane = _header(request, PRIORITY_HEADER, _LANE, admission.ROUTINE)
+    trace = tracing.start("POST /compute/stream", request.headers.get(tracing.TRACEPARENT))
+    # The slot is taken before the response starts, so a shed stream still
+    # gets its 429, and the response gives it and the trace back when the
+    # stream ends, which is at the next chunk once the client has gone.
+    held = AsyncExitStack()
+    if trace is not None:
+        trace.attributes["calc.lane"] = lane
+        held.callback(trace.finish)
+    waiting = time_ns()
+    try:
+        await held.enter_async_context(admission.CONTROLLER.slot(lane))
+        tracing.since(trace, "admission", waiting)
+        with tracing.span(trace, "parse"):
+            if streaming.is_ndjson(request):
+                payload, chunks = {}, streaming.ndjson_requests(request)
+            else:
+                payload = await _parse_body(request)
+                chunks = streaming.batch_chunks(payload["requests"])
+            deadline = _deadline(request, payload, received)
+    except admission.Shed as e:
+        response = _shed(e)
+    except BaseException as e:
+        if trace is not None:
+            trace.error = f"{type(e).__name__}: {e}"
+        await held.aclose()
+        raise
+    else:
+        if trace is not None:
+            trace.attributes["http.response.status_code"] = 200
+        results = streaming.stream_results(chunks, deadline, trace, streaming.disconnect_check(request))
+        return streaming.NDJSONStreamingResponse(results, on_close=held.aclose)
+    if trace is not None:
+        trace.attributes["http.response.status_code"] = response.status_code
+    await held.aclose()
+    return response
 
 if __name__ == "__main__":
     import uvicorn
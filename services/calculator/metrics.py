@@ -0,0 +1,263 @@
+"""
+Prometheus metrics for the calculator service, served as text by /metrics.
+
+Per-row figures are gathered into a plain Sample while a batch is evaluated
+and merged into the registry once per batch, so the hot loop never takes a
+lock. Pool workers send their Sample back with the outcomes.
+"""
+import threading
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+from validation import DEADLINE_EXCEEDED, FORMULA_ERROR, UNKNOWN_FORMULA
+
+# Seconds per row; most formulas finish in a few microseconds.
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2)
+BATCH_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def cause(error_code: str) -> str:
+    """Coarse error cause: unknown_formula, bad_input, formula_error or deadline_exceeded."""
+    if error_code in (UNKNOWN_FORMULA, FORMULA_ERROR, DEADLINE_EXCEEDED):
+        return error_code
+    return "bad_input"
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self.values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_format(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        self.values[labels] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labelnames = labelnames
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self.values: dict[tuple, list] = {}
+
+    def _series(self, labels: tuple) -> list:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        return series
+
+    def observe(self, *labels, value: float, count: int = 1):
+        series = self._series(labels)
+        series[bisect_left(self.buckets, value)] += count
+        series[-1] += value * count
+
+    def merge(self, labels: tuple, other: list):
+        series = self._series(labels)
+        for i, value in enumerate(other):
+            series[i] += value
+
+    def count(self, *labels) -> int:
+        return sum(self.values.get(labels, [0])[:-1])
+
+    def samples(self) -> Iterable[str]:
+        for labels, series in sorted(self.values.items()):
+            names = self.labelnames + ("le",)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(names, labels + (_format(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_format(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Sample:
+    """What one batch recorded, merged into the registry in one go."""
+    __slots__ = ("calls", "errors", "latency", "deduplicated", "shared_helpers", "validation")
+
+    def __init__(self):
+        self.calls: dict[str, int] = {}
+        self.errors: dict[tuple[str, str], int] = {}
+        # formula -> Histogram series over LATENCY_BUCKETS
+        self.latency: dict[str, list] = {}
+        # Evaluations saved: duplicate rows, and shared helper calls reused.
+        self.deduplicated = 0
+        self.shared_helpers = 0
+        # Seconds spent validating, deduplicating and checking the cache; for tracing.
+        self.validation = 0.0
+
+    def call(self, formula: str):
+        self.calls[formula] = self.calls.get(formula, 0) + 1
+
+    def error(self, formula: str, error_code: str):
+        # Unknown names come from clients; keep them out of the label set.
+        key = ("" if error_code == UNKNOWN_FORMULA else formula, error_code)
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    def observe(self, formula: str, seconds: float, rows: int = 1):
+        series = self.latency.get(formula)
+        if series is None:
+            series = self.latency[formula] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        series[bisect_left(LATENCY_BUCKETS, seconds / rows)] += rows
+        series[-1] += seconds
+
+    def merge(self, other: "Sample"):
+        for formula, count in other.calls.items():
+            self.calls[formula] = self.calls.get(formula, 0) + count
+        for key, count in other.errors.items():
+            self.errors[key] = self.errors.get(key, 0) + count
+        for formula, series in other.latency.items():
+            mine = self.latency.setdefault(formula, [0] * len(series))
+            for i, value in enumerate(series):
+                mine[i] += value
+        self.deduplicated += other.deduplicated
+        self.shared_helpers += other.shared_helpers
+        self.validation += other.validation
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics: list = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def record(self, sample: Sample):
+        with self._lock:
+            for formula, count in sample.calls.items():
+                FORMULA_CALLS.inc(formula, amount=count)
+            for (formula, error_code), count in sample.errors.items():
+                FORMULA_ERRORS.inc(formula, cause(error_code), error_code, amount=count)
+            for formula, series in sample.latency.items():
+                FORMULA_LATENCY.merge((formula,), series)
+            SAVED.inc("duplicate_row", amount=sample.deduplicated)
+            SAVED.inc("shared_helper", amount=sample.shared_helpers)
+
+    def render(self, extra: Optional[list] = None) -> str:
+        lines = []
+        with self._lock:
+            for metric in self.metrics + (extra or []):
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+FORMULA_CALLS = REGISTRY.add(Counter(
+    "calc_formula_calls_total", "Rows dispatched to a known formula, cache hits included.", ("formula",),
+))
+FORMULA_ERRORS = REGISTRY.add(Counter(
+    "calc_formula_errors_total",
+    "Rows that returned an error, by cause (unknown_formula, bad_input, formula_error, deadline_exceeded) "
+    "and error_code.",
+    ("formula", "cause", "error_code"),
+))
+FORMULA_LATENCY = REGISTRY.add(Histogram(
+    "calc_formula_latency_seconds", "Evaluation time per row, cache hits excluded.",
+    LATENCY_BUCKETS, ("formula",),
+))
+SAVED = REGISTRY.add(Counter(
+    "calc_evaluations_saved_total",
+    "Evaluations skipped: duplicate rows fanned out within a batch, shared helper results reused.",
+    ("kind",),
+))
+BATCH_ROWS = REGISTRY.add(Histogram(
+    "calc_batch_rows", "Rows per /compute or /compute/stream request.", BATCH_BUCKETS, ("endpoint",),
+))
+IN_FLIGHT = REGISTRY.add(Gauge(
+    "calc_requests_in_flight", "Compute requests currently being handled.", ("endpoint",),
+))
+DEADLINES = REGISTRY.add(Counter(
+    "calc_deadlines_exceeded_total", "Compute requests whose deadline fired before every row was evaluated.",
+    ("endpoint",),
+))
+ADMISSION_ACTIVE = REGISTRY.add(Gauge(
+    "calc_admission_active", "Compute batches holding an admission slot.",
+))
+ADMISSION_QUEUE = REGISTRY.add(Gauge(
+    "calc_admission_queue_depth", "Compute requests waiting for an admission slot, by lane.", ("lane",),
+))
+ADMISSION_WAIT = REGISTRY.add(Histogram(
+    "calc_admission_wait_seconds", "Time queued requests waited for an admission slot.", WAIT_BUCKETS, ("lane",),
+))
+ADMISSION_ESTIMATED_WAIT = REGISTRY.add(Gauge(
+    "calc_admission_estimated_wait_seconds", "Estimated wait for a request joining the back of the queue.",
+))
+SHED = REGISTRY.add(Counter(
+    "calc_requests_shed_total", "Requests rejected with 429, by lane and reason (queue_depth, estimated_wait).",
+    ("lane", "reason"),
+))
+IDEMPOTENCY = REGISTRY.add(Counter(
+    "calc_idempotent_requests_total",
+    "Requests with an Idempotency-Key, by outcome (stored, replayed, joined, conflict).",
+    ("outcome",),
+))
+QUEUE_DEPTH = REGISTRY.add(Gauge(
+    "calc_queue_depth", "Batches or chunks handed to an executor and not finished yet.", ("executor",),
+))
+
+
+def cache_metrics(stats: dict) -> list:
+    """Result cache counters, built from cache.RESULTS.stats() at scrape time."""
+    metrics = []
+    for field in ("hits", "misses", "evictions", "expirations"):
+        counter = Counter(f"calc_cache_{field}_total", f"Result cache {field}.")
+        counter.inc(amount=stats[field])
+        metrics.append(counter)
+    entries = Gauge("calc_cache_entries", "Entries in the result cache.")
+    entries.set(value=stats["entries"])
+    metrics.append(entries)
+    return metrics
+
+
+def trace_metrics(dropped: int) -> list:
+    """Trace exporter counters, built from tracing.EXPORTER at scrape time."""
+    counter = Counter("calc_trace_spans_dropped_total", "Finished spans dropped: queue full or trace file not writable.")
+    counter.inc(amount=dropped)
+    return [counter]
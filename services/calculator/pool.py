@@ -0,0 +1,141 @@
+"""
+Process pool for large /compute batches.
+
+Batches of at least CALC_POOL_MIN_ROWS rows are cut into CALC_POOL_CHUNK_ROWS
+chunks and evaluated by CALC_POOL_WORKERS worker processes (by default one per
+CPU the pod may use, see serve.available_cpus), so a single big batch can use
+every core instead of one thread under the GIL. Smaller batches stay
+in-process and pay no IPC cost.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from engine import Outcome, dedupe, evaluate_batch, evaluate_chunk, fan_out
+from serve import available_cpus
+
+POOL_MIN_ROWS = int(os.getenv("CALC_POOL_MIN_ROWS", "10000"))
+POOL_CHUNK_ROWS = int(os.getenv("CALC_POOL_CHUNK_ROWS", "5000"))
+POOL_WORKERS = int(os.getenv("CALC_POOL_WORKERS", str(available_cpus())))
+
+_PRELOAD = ["formulas", "validation", "cache", "columnar", "metrics", "engine"]
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker():
+    # Import the registry before the first chunk arrives, not inside it.
+    for name in _PRELOAD:
+        __import__(name)
+    import columnar
+    import formulas
+
+    formulas.load_all()
+    columnar.available()
+
+
+def _context():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(_PRELOAD)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def enabled() -> bool:
+    return POOL_WORKERS > 1
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=POOL_WORKERS,
+            mp_context=_context(),
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+def chunk(calls: list, size: int) -> list[list]:
+    return [calls[i:i + size] for i in range(0, len(calls), size)]
+
+
+async def _inline(
+    calls: list[tuple[str, dict]], sample: metrics.Sample, deadline: Optional[float],
+) -> list[Outcome]:
+    metrics.QUEUE_DEPTH.inc("thread")
+    try:
+        return await run_in_threadpool(evaluate_batch, calls, sample, deadline)
+    finally:
+        metrics.QUEUE_DEPTH.dec("thread")
+
+
+async def _in_worker(
+    loop, executor, part: list, deadline: Optional[float],
+) -> tuple[list[Outcome], metrics.Sample]:
+    metrics.QUEUE_DEPTH.inc("process")
+    try:
+        return await loop.run_in_executor(executor, evaluate_chunk, part, deadline)
+    finally:
+        metrics.QUEUE_DEPTH.dec("process")
+
+
+async def _in_pool(
+    calls: list[tuple[str, dict]], sample: metrics.Sample, deadline: Optional[float],
+) -> list[Outcome]:
+    global _executor
+    # Deduplicate across the whole batch before it is cut into chunks.
+    unique, duplicates = dedupe(calls)
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    try:
+        parts = await asyncio.gather(*[
+            _in_worker(loop, executor, part, deadline)
+            for part in chunk([calls[i] for i in unique], POOL_CHUNK_ROWS)
+        ])
+    except BrokenProcessPool:
+        # A worker died (OOM kill, signal); release the survivors and the
+        # forkserver, and start a fresh pool next time.
+        if _executor is executor:
+            _executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        return await _inline(calls, sample, deadline)
+    outcomes: list = [None] * len(calls)
+    flat = (outcome for part, _ in parts for outcome in part)
+    for i, outcome in zip(unique, flat):
+        outcomes[i] = outcome
+    for _, part_sample in parts:
+        sample.merge(part_sample)
+    fan_out(calls, outcomes, duplicates, sample)
+    return outcomes
+
+
+async def evaluate_batch_async(
+    calls: list[tuple[str, dict]], sample: Optional[metrics.Sample] = None, deadline: Optional[float] = None,
+) -> list[Outcome]:
+    """Evaluate a batch off the event loop; `sample` receives the batch's metrics.
+
+    `deadline` (a time.monotonic() instant) is passed down to evaluate_batch,
+    so rows still queued for a thread or a worker when it passes expire too.
+    """
+    sample = metrics.Sample() if sample is None else sample
+    if not enabled() or len(calls) < POOL_MIN_ROWS:
+        outcomes = await _inline(calls, sample, deadline)
+    else:
+        outcomes = await _in_pool(calls, sample, deadline)
+    metrics.REGISTRY.record(sample)
+    return outcomes
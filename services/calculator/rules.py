@@ -0,0 +1,597 @@
+"""
+The compendium's interpretation rules, compiled to Python classifiers.
+
+    python rules.py build            # write compiled_rules.py (+ bytecode), untracked
+    python rules.py check            # exit 1 if compiled_rules.py is missing or stale
+    python rules.py report [--json]  # thresholds where compendium and FORMULAS disagree
+
+Each calc_blocks.json item lists `- if: <condition>` / `then: "<label>"`
+rules. `build` parses every condition into a Python expression and writes
+one function per item to compiled_rules.py, which takes a mapping of the
+variables the rules name and returns the label of the first rule that holds
+(None when none does). The file records the SHA-256 of the calc_blocks.json
+it was built from and is byte-compiled on the spot, so later runs of
+classifiers() just import it. The file is a local build output and is not
+committed: without it (or if the compendium has changed since) the rules
+are compiled in memory instead, and check fails until it is rebuilt.
+
+Conditions are comparisons, chained as in Python (`0.55 <= RI <= 0.70`),
+joined by AND / OR / NOT with parentheses. `=` and `!=` against a quoted
+string compare _normalize_text of both sides, `x in [...]` tests membership,
+and a bare name is read with _as_bool. A condition outside that grammar
+(e.g. `pmi >= 8.4 (homem)`) leaves its item out, with the reason in
+UNSUPPORTED.
+
+`report` compares each item whose rules are numeric cutoffs on one variable
+with the ladder (formulas._ladders) its formula assigns the category from.
+Both are probed at every cutoff either side names and just below and above
+it, and the points where the category changes are listed side by side.
+Items whose formula reads an outcome table (formulas._tables) or a decision
+table (formulas._decisions) are probed with the values their rules name.
+Every item left out is listed with the reason.
+
+This module and compiled_rules.py are offline cross-check tooling: the
+service does not import them, and FORMULAS stays the classifier /compute
+runs. They are for checking the formulas against the compendium when
+either one changes.
+"""
+import argparse
+import ast
+import hashlib
+import importlib
+import inspect
+import json
+import math
+import os
+import py_compile
+import re
+import sys
+from collections import Counter
+from functools import cache
+from itertools import product
+from typing import Any, Callable, Optional
+
+from catalog import CALC_BLOCKS_FILE, _interpretation, load_blocks
+from formulas import FORMULAS, _decisions, _ladders, _tables, load_all
+from formulas._common import _as_bool, _normalize_text
+
+GENERATED_MODULE = "compiled_rules"
+GENERATED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), GENERATED_MODULE + ".py")
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)
+      | "(?P<string>[^"]*)"
+      | (?P<op><=|>=|!=|==|<|>|=)
+      | (?P<punct>[()\[\],])
+      | (?P<word>[^\W\d]\w*)
+    )""", re.VERBOSE)
+_KEYWORDS = {"AND", "OR", "NOT", "in"}
+_EQUALITY = {"=": "==", "==": "==", "!=": "!="}
+
+
+class RuleError(ValueError):
+    pass
+
+
+class Rule:
+    """One parsed `- if:` condition and its label."""
+
+    __slots__ = ("condition", "label", "source", "names", "cutoffs", "texts", "numeric")
+
+    def __init__(self, condition: str, label: Optional[str]):
+        self.condition = condition
+        self.label = label
+        # Filled in by _Parser: the Python expression, the variables it reads,
+        # the numbers and the strings each variable is compared with, and
+        # whether the rule is numeric comparisons only.
+        self.names: set[str] = set()
+        self.cutoffs: dict[str, set[float]] = {}
+        self.texts: dict[str, set[str]] = {}
+        self.numeric = True
+        self.source = _Parser(condition, self).parse()
+
+
+class _Parser:
+    """Recursive descent over the condition grammar, emitting Python source."""
+
+    def __init__(self, text: str, rule: Rule):
+        self.text = text
+        self.rule = rule
+        self.tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if match is None or match.end() == position:
+                raise RuleError(f"unexpected {text[position:].strip()[:1]!r} at column {position + 1}")
+            kind = match.lastgroup
+            value, start = match.group(kind), match.start(kind)
+            if kind == "word" and value in _KEYWORDS:
+                kind = value
+            self.tokens.append((kind, value, start))
+            position = match.end()
+        self.tokens.append(("end", "", len(text)))
+        self.index = 0
+
+    def peek(self) -> tuple[str, str, int]:
+        return self.tokens[self.index]
+
+    def take(self, *kinds: str) -> tuple[str, str, int]:
+        token = self.tokens[self.index]
+        if kinds and token[0] not in kinds and token[1] not in kinds:
+            found = "end of rule" if token[0] == "end" else repr(token[1])
+            raise RuleError(f"unexpected {found} at column {token[2] + 1}")
+        self.index += 1
+        return token
+
+    def parse(self) -> str:
+        source = self.disjunction()
+        self.take("end")
+        return source
+
+    def disjunction(self) -> str:
+        parts = [self.conjunction()]
+        while self.peek()[0] == "OR":
+            self.take()
+            parts.append(self.conjunction())
+        return " or ".join(parts)
+
+    def conjunction(self) -> str:
+        parts = [self.negation()]
+        while self.peek()[0] == "AND":
+            self.take()
+            parts.append(self.negation())
+        return " and ".join(parts)
+
+    def negation(self) -> str:
+        if self.peek()[0] == "NOT":
+            self.take()
+            self.rule.numeric = False
+            return f"not {self.negation()}"
+        if self.peek()[1] == "(":
+            self.take()
+            inner = self.disjunction()
+            self.take(")")
+            return f"({inner})"
+        return self.comparison()
+
+    def operand(self) -> tuple[str, Any]:
+        kind, value, _ = self.take("number", "string", "word")
+        if kind == "number":
+            return kind, float(value) if "." in value else int(value)
+        if kind == "word":
+            self.rule.names.add(value)
+        return kind, value
+
+    def comparison(self) -> str:
+        operands = [self.operand()]
+        ops = []
+        if self.peek()[0] == "in":
+            self.take()
+            return self.membership(operands[0])
+        while self.peek()[0] == "op":
+            ops.append(self.take()[1])
+            operands.append(self.operand())
+        if not ops:
+            kind, name = operands[0]
+            if kind != "word":
+                raise RuleError(f"{name!r} is not a condition")
+            self.rule.numeric = False
+            return f"_as_bool(values[{name!r}])"
+        if any(kind == "string" for kind, _ in operands):
+            return self.text_comparison(operands, ops)
+        names = [value for kind, value in operands if kind == "word"]
+        numbers = [value for kind, value in operands if kind == "number"]
+        for name in names:
+            self.rule.cutoffs.setdefault(name, set()).update(numbers)
+        parts = [self.number_source(operands[0])]
+        for op, operand in zip(ops, operands[1:]):
+            parts += [_EQUALITY.get(op, op), self.number_source(operand)]
+        return " ".join(parts)
+
+    def text_comparison(self, operands: list, ops: list) -> str:
+        if len(ops) != 1 or ops[0] not in _EQUALITY:
+            raise RuleError(f"text can only be compared with = or != in {self.text!r}")
+        self.rule.numeric = False
+        names = [value for kind, value in operands if kind == "word"]
+        for name in names:
+            self.rule.texts.setdefault(name, set()).update(value for kind, value in operands if kind == "string")
+        parts = [
+            repr(_normalize_text(value)) if kind == "string" else f"_normalize_text(values[{value!r}])"
+            for kind, value in operands
+        ]
+        return f"{parts[0]} {_EQUALITY[ops[0]]} {parts[1]}"
+
+    def membership(self, subject: tuple[str, Any]) -> str:
+        kind, name = subject
+        if kind != "word":
+            raise RuleError(f"{name!r} cannot be tested for membership")
+        self.take("[")
+        items = [self.operand()]
+        while self.peek()[1] == ",":
+            self.take()
+            items.append(self.operand())
+        self.take("]")
+        self.rule.numeric = False
+        if all(item_kind == "string" for item_kind, _ in items):
+            self.rule.texts.setdefault(name, set()).update(value for _, value in items)
+            members = ", ".join(repr(_normalize_text(value)) for _, value in items)
+            return f"_normalize_text(values[{name!r}]) in ({members},)"
+        if all(item_kind == "number" for item_kind, _ in items):
+            return f"values[{name!r}] in ({', '.join(repr(value) for _, value in items)},)"
+        raise RuleError(f"mixed list in {self.text!r}")
+
+    @staticmethod
+    def number_source(operand: tuple[str, Any]) -> str:
+        kind, value = operand
+        return f"values[{value!r}]" if kind == "word" else repr(value)
+
+
+def parse_rules(block: dict) -> list[Rule]:
+    """The block's rules in order; RuleError on the first one outside the grammar."""
+    rules = []
+    for rule in _interpretation(block)[0]:
+        if "then" not in rule:
+            raise RuleError(f"no label for {rule['if']!r}")
+        rules.append(Rule(rule["if"], rule["then"]))
+    return rules
+
+
+def _function(name: str, rules: list[Rule]) -> str:
+    lines = [f"def {name}(values):"]
+    for rule in rules:
+        lines += [f"    # {rule.condition}", f"    if {rule.source}:", f"        return {rule.label!r}"]
+    lines.append("    return None")
+    return "\n".join(lines)
+
+
+def _digest(path: Optional[str]) -> str:
+    if not path or not os.path.exists(path):
+        return ""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def generate(blocks: dict[str, dict], digest: str) -> str:
+    """Source of the compiled module for `blocks`, stamped with the compendium's digest."""
+    functions, unsupported = [], {}
+    for name in sorted(blocks):
+        try:
+            rules = parse_rules(blocks[name])
+        except RuleError as e:
+            unsupported[name] = str(e)
+            continue
+        if rules and name.isidentifier():
+            functions.append((name, _function(name, rules)))
+    parts = [
+        "# Generated by `python rules.py build` from data/compendium/calc_blocks.json. Do not edit.",
+        '"""Compendium interpretation rules as classifiers; see rules.py. Not imported by the service."""',
+        "from formulas._common import _as_bool, _normalize_text",
+        "",
+        f"SOURCE_SHA256 = {digest!r}",
+    ]
+    for _, source in functions:
+        parts += ["", "", source]
+    parts += ["", "", "CLASSIFIERS = {"]
+    parts += [f"    {name!r}: {name}," for name, _ in functions]
+    parts += ["}", "", "UNSUPPORTED = {"]
+    parts += [f"    {name!r}: {reason!r}," for name, reason in unsupported.items()]
+    parts.append("}")
+    return "\n".join(parts) + "\n"
+
+
+def build(path: str = GENERATED_FILE, blocks_file: Optional[str] = CALC_BLOCKS_FILE) -> str:
+    """Write the compiled module and its bytecode; returns the module path."""
+    source = generate(load_blocks(blocks_file), _digest(blocks_file))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source)
+    py_compile.compile(path, doraise=True)
+    return path
+
+
+def _in_memory(blocks_file: Optional[str]) -> dict[str, Any]:
+    namespace = {"__name__": GENERATED_MODULE}
+    exec(compile(generate(load_blocks(blocks_file), _digest(blocks_file)), "<compendium rules>", "exec"), namespace)
+    return namespace
+
+
+def _generated(blocks_file: Optional[str]) -> Optional[dict[str, Any]]:
+    """The built module's namespace, or None when it is missing or out of date."""
+    try:
+        module = importlib.import_module(GENERATED_MODULE)
+    except ImportError:
+        return None
+    if module.SOURCE_SHA256 != _digest(blocks_file):
+        return None
+    return vars(module)
+
+
+@cache
+def _namespace() -> dict[str, Any]:
+    return _generated(CALC_BLOCKS_FILE) or _in_memory(CALC_BLOCKS_FILE)
+
+
+def classifiers() -> dict[str, Callable[[dict], Optional[str]]]:
+    """Compendium classifier per formula name, from compiled_rules when it is current."""
+    return _namespace()["CLASSIFIERS"]
+
+
+def unsupported() -> dict[str, str]:
+    """Items whose rules could not be compiled, with the reason."""
+    return _namespace()["UNSUPPORTED"]
+
+
+def classify(formula: str, values: dict) -> Optional[str]:
+    """The compendium label for `values` (the variables the item's rules name)."""
+    return classifiers()[formula](values)
+
+
+# Cross-check against FORMULAS
+
+
+_LABEL_TARGETS = {"category", "label", "level"}
+
+
+def _category_ladders(fn) -> list[str]:
+    """Names of the _ladders tables a formula assigns its category/label/level from."""
+    names = []
+    for node in ast.walk(ast.parse(inspect.getsource(fn))):
+        if not (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)):
+            continue
+        call = node.value.func
+        if (
+            any(isinstance(t, ast.Name) and t.id in _LABEL_TARGETS for t in node.targets)
+            and isinstance(call, ast.Attribute) and call.attr == "lookup"
+            and isinstance(call.value, ast.Name) and isinstance(getattr(_ladders, call.value.id, None), _ladders.Ladder)
+        ):
+            names.append(call.value.id)
+    return names
+
+
+def _category_tables(fn) -> list[str]:
+    """Names of the _tables / _decisions tables a formula looks its category up in."""
+    names = []
+    for node in ast.walk(ast.parse(inspect.getsource(fn))):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)):
+            continue
+        call = node.func
+        if call.attr in ("lookup", "evaluate") and isinstance(call.value, ast.Name) and (
+            isinstance(getattr(_tables, call.value.id, None), _tables.OutcomeTable)
+            or isinstance(getattr(_decisions, call.value.id, None), _decisions.DecisionTable)
+        ):
+            names.append(call.value.id)
+    return names
+
+
+def _table(name: str):
+    return getattr(_tables, name, None) or getattr(_decisions, name)
+
+
+def _steps(c: float, whole: bool) -> tuple[float, float]:
+    if whole:
+        return c - 1, c + 1
+    return math.nextafter(c, -math.inf), math.nextafter(c, math.inf)
+
+
+def _cuts(classify_value: Callable[[float], Any], candidates: list[float], whole: bool) -> list[str]:
+    """Where the category changes: "< c" (c starts the upper range), "<= c" (c ends the lower one), "= c" (both).
+
+    Outside the candidates' span, no category (None) means the rules stop
+    there rather than that they leave a gap, so it counts as the nearest
+    category inside.
+    """
+    low, high = candidates[0], candidates[-1]
+    cuts = []
+    for c in candidates:
+        below, above = _steps(c, whole)
+        at = classify_value(c)
+        lo, hi = classify_value(below), classify_value(above)
+        if lo is None and below < low:
+            lo = at
+        if hi is None and above > high:
+            hi = at
+        if lo == at == hi:
+            continue
+        if at == hi:
+            cuts.append(f"< {c:g}")
+        elif at == lo:
+            cuts.append(f"<= {c:g}")
+        else:
+            cuts.append(f"= {c:g}")
+    return cuts
+
+
+def _gaps(classify_value: Callable[[float], Any], candidates: list[float], whole: bool) -> list[str]:
+    """Stretches between the first and last cutoff that no rule covers."""
+    gaps = []
+    for a, b in zip(candidates, candidates[1:]):
+        probes = range(int(a) + 1, int(b)) if whole else (math.nextafter(a, b), (a + b) / 2, math.nextafter(b, a))
+        if any(classify_value(x) is None for x in probes):
+            gaps.append(f"{a:g}..{b:g}")
+    return gaps
+
+
+def _first_match(rules: list[Rule]) -> Callable[[dict], Optional[int]]:
+    """Index of the first of `rules` that holds for `values`, or None."""
+    source = " else ".join(f"{i} if {rule.source}" for i, rule in enumerate(rules))
+    return eval(f"lambda values: {source} else None", {"_as_bool": _as_bool, "_normalize_text": _normalize_text})
+
+
+_OTHER = "(other)"
+
+
+def _label(result: Any) -> Any:
+    return result.get("category", result.get("value")) if isinstance(result, dict) else result
+
+
+def _groups(labels: dict[str, Any]) -> list[str]:
+    """Probes that share a label, one " | "-joined group per label, sorted."""
+    groups: dict[Any, list[str]] = {}
+    for probe, label in labels.items():
+        groups.setdefault(label, []).append(probe)
+    return sorted(" | ".join(sorted(group)) for group in groups.values())
+
+
+def _table_entry(name: str, rules: list[Rule], table_name: str) -> Optional[dict]:
+    """Compare a table-driven formula with the item's categorical rules; None if they do not fit.
+
+    Rules on the formula's own inputs (`padrão_fluxo = "bifásico"`) are
+    probed with every combination of the strings they name plus one value
+    they do not, through the formula; the two sides agree when they group
+    the probes the compendium covers the same way. Rules on the formula's
+    output (`tirads_level = "TR3"`) are compared with the values the table
+    can return.
+    """
+    fn = FORMULAS[name]
+    names = set().union(*(rule.names for rule in rules))
+    if any(rule.cutoffs for rule in rules):
+        return None
+    params = inspect.signature(fn).parameters
+    arguments = {variable: re.sub(r"\W", "_", variable, flags=re.ASCII) for variable in sorted(names)}
+    classify_values = _first_match(rules)
+    entry = {"variable": ", ".join(sorted(names)), "table": table_name}
+    if not set(arguments.values()) <= params.keys():
+        if len(names) != 1:
+            return None
+        (variable,) = names
+        returns = {outcome for outcome in _table(table_name).outcomes if outcome is not None}
+        named = set().union(*(rule.texts.get(variable, set()) for rule in rules))
+        entry.update({
+            "compendium": sorted(named),
+            "formulas": sorted(returns),
+            "gaps": sorted(outcome for outcome in returns if classify_values({variable: outcome}) is None),
+        })
+        entry["agree"] = {_normalize_text(value) for value in named} == {_normalize_text(value) for value in returns}
+        return entry
+    required = {param for param, p in params.items() if p.default is inspect.Parameter.empty}
+    if not required <= set(arguments.values()):
+        return None
+    domains = []
+    for variable in arguments:
+        texts = set().union(*(rule.texts.get(variable, set()) for rule in rules))
+        domains.append(sorted(texts) + [_OTHER] if texts else [True, False])
+    compendium, formulas, gaps = {}, {}, []
+    for values in product(*domains):
+        probe = ", ".join(f"{variable}={value}" for variable, value in zip(arguments, values))
+        label = classify_values(dict(zip(arguments, values)))
+        if label is None:
+            gaps.append(probe)
+            continue
+        compendium[probe] = label
+        formulas[probe] = _label(fn(**dict(zip(arguments.values(), values))))
+    entry.update({"compendium": _groups(compendium), "formulas": _groups(formulas), "gaps": gaps})
+    entry["agree"] = entry["compendium"] == entry["formulas"]
+    return entry
+
+
+def cross_check(blocks: Optional[dict[str, dict]] = None) -> dict[str, list[dict]]:
+    """Items whose cutoffs disagree with FORMULAS, items that agree, and items not compared (with why).
+
+    Items whose formula reads its category from a ladder are compared on
+    the numeric rules on their main variable. When every cutoff on both
+    sides is a whole number the variable is taken to be one (a score, a
+    whole percent) and probed at c - 1, c, c + 1, so `<= 69` and `>= 70`
+    agree with each other. Items whose formula reads an outcome or decision
+    table are compared as _table_entry describes. Formulas that compute
+    their category in code are not compared; the reason names the
+    variables their rules combine.
+    """
+    load_all()
+    blocks = load_blocks() if blocks is None else blocks
+    report = {"disagree": [], "agree": [], "skipped": []}
+    for name in sorted(blocks):
+        block = blocks[name]
+        entry = {"formula": name, "item_id": block.get("ItemID")}
+        try:
+            rules = parse_rules(block)
+        except RuleError as e:
+            report["skipped"].append({**entry, "reason": f"unsupported rule: {e}"})
+            continue
+        if name not in FORMULAS:
+            report["skipped"].append({**entry, "reason": "not in FORMULAS"})
+            continue
+        numeric = [rule for rule in rules if rule.numeric and len(rule.names) == 1]
+        counts = Counter(next(iter(rule.names)) for rule in numeric)
+        cutoffs_on_one = bool(counts) and counts.most_common(1)[0][1] >= 2
+        ladder_names = _category_ladders(FORMULAS[name])
+        table_names = _category_tables(FORMULAS[name])
+        if not (cutoffs_on_one and len(ladder_names) == 1):
+            compared = _table_entry(name, rules, table_names[0]) if len(table_names) == 1 else None
+            if compared is not None:
+                agree = compared.pop("agree")
+                report["agree" if agree else "disagree"].append({**entry, **compared})
+                continue
+            variables = ", ".join(sorted(set().union(*(rule.names for rule in rules))))
+            if not rules:
+                reason = "no interpretation rules"
+            elif len(ladder_names) + len(table_names) > 1:
+                reason = f"category from more than one ladder or table ({', '.join(ladder_names + table_names)})"
+            elif table_names:
+                reason = f"rules on {variables} do not map onto {table_names[0]}'s inputs or outputs"
+            elif cutoffs_on_one:
+                reason = f"category computed in code, not a ladder; rules are cutoffs on {counts.most_common(1)[0][0]}"
+            else:
+                reason = f"category computed in code, not a ladder or table; rules combine {variables}"
+            report["skipped"].append({**entry, "reason": reason})
+            continue
+        variable = counts.most_common(1)[0][0]
+        numeric = [rule for rule in numeric if variable in rule.names]
+        ladder = getattr(_ladders, ladder_names[0])
+        candidates = sorted(
+            set().union(*(rule.cutoffs[variable] for rule in numeric)) | {c for _, c, _ in ladder.rungs}
+        )
+        whole = all(float(c).is_integer() for c in candidates)
+        first_match = _first_match(numeric)
+        compendium = lambda value: first_match({variable: value})  # noqa: E731
+        entry.update({
+            "variable": variable,
+            "ladder": ladder_names[0],
+            "compendium": _cuts(compendium, candidates, whole),
+            "formulas": _cuts(ladder.lookup, candidates, whole),
+            "gaps": _gaps(compendium, candidates, whole),
+        })
+        report["disagree" if entry["compendium"] != entry["formulas"] else "agree"].append(entry)
+    return report
+
+
+def _print_report(report: dict[str, list[dict]]):
+    print(f"{len(report['disagree'])} disagree, {len(report['agree'])} agree, {len(report['skipped'])} not compared")
+    for entry in report["disagree"]:
+        against = entry.get("ladder") or entry["table"]
+        print(f"\n{entry['formula']} ({entry['item_id']}): {entry['variable']} vs {against}")
+        print(f"  compendium: {', '.join(entry['compendium'])}")
+        print(f"  FORMULAS  : {', '.join(entry['formulas'])}")
+    gaps = [entry for entry in report["disagree"] + report["agree"] if entry["gaps"]]
+    if gaps:
+        print("\nvalues no compendium rule covers:")
+        for entry in gaps:
+            if "ladder" in entry:
+                print(f"  {entry['formula']}: {entry['variable']} in {', '.join(entry['gaps'])}")
+            else:
+                print(f"  {entry['formula']}: {'; '.join(entry['gaps'])}")
+    if report["skipped"]:
+        print("\nnot compared:")
+        for entry in report["skipped"]:
+            print(f"  {entry['formula']}: {entry['reason']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["build", "check", "report"])
+    parser.add_argument("--json", action="store_true", help="report as JSON")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(build())
+    elif args.command == "check":
+        if _generated(CALC_BLOCKS_FILE) is None:
+            sys.exit(f"{GENERATED_FILE} is missing or out of date; run `python rules.py build`")
+    elif args.json:
+        print(json.dumps(cross_check(), ensure_ascii=False, indent=2))
+    else:
+        _print_report(cross_check())
+
+
+if __name__ == "__main__":
+    main()
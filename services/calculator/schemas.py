@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Any, Optional
 
 class CalcRequest(BaseModel):
@@ -11,6 +11,8 @@ class CalcResult(BaseModel):
     formula: str
     result: Any
     error: Optional[str] = None
+    error_code: Optional[str] = None
 
 class CalcBatch(BaseModel):
     requests: list[CalcRequest]
+    deadline_ms: Optional[float] = Field(default=None, gt=0)
@@ -0,0 +1,218 @@
+"""
+Production launcher: preload once, then fork workers that share one socket.
+
+    python serve.py [--host 0.0.0.0] [--port 8081] [--workers N]
+    python serve.py --uds /run/calculator.sock [--workers N]
+
+The parent imports the app and builds all the read-only state up front: every
+formula module and validator, the numpy kernels, the /formulas catalog and
+the wire dictionary. It then freezes those objects out of the garbage
+collector's reach and forks CALC_WORKERS uvicorn workers: by default one per
+CPU the pod may use, its affinity mask capped by a cgroup CPU limit. The
+workers accept on the same listening socket, so the preloaded pages stay
+shared copy-on-write instead of being copied into every worker. A worker
+that exits is replaced. uvloop and httptools are used when installed.
+With --uds (or CALC_UDS) the workers listen on a Unix domain socket instead
+of TCP, which saves co-located callers the loopback round trip.
+
+Metrics, the result cache and admission slots are per worker. The per-batch
+process pool is off unless CALC_POOL_WORKERS is set, since the workers
+already use every core.
+"""
+import argparse
+import gc
+import importlib.util
+import math
+import os
+import signal
+import socket
+import stat
+import sys
+import time
+import traceback
+from typing import Optional
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def _cgroup_quota(root: str = CGROUP_ROOT) -> Optional[float]:
+    """The CPUs a cgroup CPU limit allows (cgroup v2 cpu.max, else v1 CFS quota), or None."""
+    try:
+        with open(os.path.join(root, "cpu.max")) as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open(os.path.join(root, "cpu", "cpu.cfs_quota_us")) as f:
+                quota = f.read().strip()
+            with open(os.path.join(root, "cpu", "cpu.cfs_period_us")) as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota in ("max", "-1"):
+        return None
+    try:
+        return int(quota) / int(period)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def available_cpus(root: str = CGROUP_ROOT) -> int:
+    """CPUs this process may run on: its affinity mask, capped by the pod's CPU limit."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not on Linux
+        count = os.cpu_count() or 1
+    quota = _cgroup_quota(root)
+    if quota is not None:
+        count = min(count, max(1, math.ceil(quota)))
+    return count
+
+
+WORKERS = int(os.getenv("CALC_WORKERS", str(available_cpus())))
+HOST = os.getenv("CALC_HOST", "0.0.0.0")
+PORT = int(os.getenv("CALC_PORT", "8081"))
+UDS = os.getenv("CALC_UDS")
+
+# A worker that dies sooner than this after starting is restarted after a pause.
+_RESTART_BACKOFF = 1.0
+
+_SIGNALS = {signal.SIGTERM, signal.SIGINT}
+
+
+def preload():
+    """Import the app and build everything the workers only read."""
+    import catalog
+    import columnar
+    import formulas
+    import pool
+    import validation
+    import wire
+    from main import app
+
+    formulas.load_all()
+    for name in formulas.FORMULAS:
+        validation.VALIDATORS[name]
+    columnar.available()
+    catalog.body()
+    wire.dictionary()
+    if "CALC_POOL_WORKERS" not in os.environ:
+        pool.POOL_WORKERS = 1
+    return app
+
+
+def bind(host: str, port: int) -> socket.socket:
+    # An explicit IPPROTO_TCP lets asyncio set TCP_NODELAY on accepted
+    # connections; with proto 0 small responses wait on Nagle's algorithm.
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def bind_unix(path: str) -> socket.socket:
+    if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        os.unlink(path)  # left over from a previous run
+    sock = socket.socket(socket.AF_UNIX)
+    sock.bind(path)
+    os.chmod(path, 0o666)
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(app, sock: socket.socket, log_level: str):
+    import uvicorn
+
+    config = uvicorn.Config(
+        app,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        log_level=log_level,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(app, sock: socket.socket, log_level: str) -> int:
+    # Signals stay blocked across the fork so the supervisor's handler never
+    # runs in the child.
+    signal.pthread_sigmask(signal.SIG_BLOCK, _SIGNALS)
+    pid = os.fork()
+    if pid:
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, _SIGNALS)
+        return pid
+    # Worker: restore default signals (uvicorn installs its own) and never
+    # return into the supervisor loop.
+    for signum in _SIGNALS:
+        signal.signal(signum, signal.SIG_DFL)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, _SIGNALS)
+    gc.enable()
+    status = 0
+    try:
+        _serve(app, sock, log_level)
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def supervise(app, sock: socket.socket, workers: int, log_level: str):
+    started = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in started:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for signum in _SIGNALS:
+        signal.signal(signum, stop)
+    for _ in range(workers):
+        started[spawn(app, sock, log_level)] = time.monotonic()
+    while started:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        lived = time.monotonic() - started.pop(pid, 0.0)
+        if stopping:
+            continue
+        print(f"worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; restarting", file=sys.stderr)
+        if lived < _RESTART_BACKOFF:
+            time.sleep(_RESTART_BACKOFF)
+        if not stopping:
+            started[spawn(app, sock, log_level)] = time.monotonic()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--uds", default=UDS, help="listen on this Unix domain socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    # Keep collections from touching (and so un-sharing) the preloaded
+    # objects: nothing is collected until they are frozen, and the frozen
+    # generation is never scanned again.
+    gc.disable()
+    app = preload()
+    gc.collect()
+    gc.freeze()
+    sock = bind_unix(args.uds) if args.uds else bind(args.host, args.port)
+    try:
+        supervise(app, sock, max(1, args.workers), args.log_level)
+    finally:
+        if args.uds and os.path.exists(args.uds):
+            os.unlink(args.uds)
+
+
+if __name__ == "__main__":
+    main()
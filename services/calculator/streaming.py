@@ -0,0 +1,156 @@
+"""
+NDJSON streaming for /compute/stream.
+
+Rows are evaluated in small chunks and each CalcResult is written as its own
+line as soon as its chunk finishes, so neither the request nor the response
+has to be held in memory as a whole. A stream holds one admission slot, in
+the lane its X-Calc-Priority header picks, from before its first line until
+its last, so bulk backfills queue and are shed here as on /compute.
+
+The stream checks between chunks whether the client has gone and, if it
+has, stops: the rest of the batch is not evaluated and the slot is given
+back.
+
+Deadlines work as on /compute (X-Calc-Deadline-Ms, or deadline_ms in a
+CalcBatch body): rows not evaluated in time are written with error_code
+deadline_exceeded. The count cannot go in a header once the stream has
+started. Idempotency-Key is not honoured. Lines are written as they are
+computed and not kept, and every formula is pure, so a retried stream
+computes the same lines again.
+"""
+import os
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+import metrics
+from engine import evaluate_batch
+from fastpath import RequestRow, dumps, result_row
+from tracing import Span
+from validation import DEADLINE_EXCEEDED, INVALID_REQUEST
+
+STREAM_CHUNK_ROWS = int(os.getenv("CALC_STREAM_CHUNK_ROWS", "64"))
+
+NDJSON = "application/x-ndjson"
+
+_ROW = TypeAdapter(RequestRow)
+
+
+class _BadLine(dict):
+    """A result row for an NDJSON line that is not a valid CalcRequest."""
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    media_type = NDJSON
+
+    def __init__(self, content, on_close: Optional[Callable[[], Awaitable]] = None, **kwargs):
+        super().__init__(content, **kwargs)
+        # Runs once the stream ends or fails, e.g. to give back an admission slot.
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        # No disconnect listener: it would race an NDJSON body's generator for
+        # receive(). stream_results polls for the disconnect between chunks.
+        try:
+            await self.stream_response(send)
+        finally:
+            if self.on_close is not None:
+                await self.on_close()
+
+
+def disconnect_check(request: Request) -> Callable[[], Awaitable[bool]]:
+    """An async check for whether the client of `request` has gone."""
+
+    async def disconnected() -> bool:
+        # While the body is still arriving, request.stream() notices the
+        # disconnect itself, and polling receive() would steal a body chunk.
+        return request._stream_consumed and await request.is_disconnected()
+
+    return disconnected
+
+
+def is_ndjson(request: Request) -> bool:
+    return request.headers.get("content-type", "").split(";")[0].strip() in (NDJSON, "application/ndjson")
+
+
+async def ndjson_requests(request: Request) -> AsyncIterator[list]:
+    """Yield the CalcRequests (or parse errors) that are available so far."""
+    buffer = b""
+    line_number = 0
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        parsed = []
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                parsed.append(_parse_line(line, line_number))
+        for start in range(0, len(parsed), STREAM_CHUNK_ROWS):
+            yield parsed[start:start + STREAM_CHUNK_ROWS]
+    if buffer.strip():
+        yield [_parse_line(buffer, line_number + 1)]
+
+
+def _parse_line(line: bytes, line_number: int) -> dict:
+    try:
+        return _ROW.validate_json(line)
+    except ValidationError as e:
+        return _BadLine(
+            ref_id=None,
+            formula="",
+            result=None,
+            error=f"Invalid request on line {line_number}: {e.errors()[0]['msg']}",
+            error_code=INVALID_REQUEST,
+        )
+
+
+async def batch_chunks(requests: list[dict]) -> AsyncIterator[list]:
+    for start in range(0, len(requests), STREAM_CHUNK_ROWS):
+        yield requests[start:start + STREAM_CHUNK_ROWS]
+
+
+def _encode(items: list[dict], deadline: Optional[float]) -> tuple[bytes, int]:
+    """The NDJSON lines for a chunk, and how many of its rows expired."""
+    requests = [item for item in items if not isinstance(item, _BadLine)]
+    outcomes = evaluate_batch([(req["formula"], req["inputs"]) for req in requests], deadline=deadline)
+    expired = sum(1 for outcome in outcomes if outcome[2] == DEADLINE_EXCEEDED)
+    pending = iter(outcomes)
+    lines = [
+        dumps(item if isinstance(item, _BadLine) else result_row(item, next(pending)))
+        for item in items
+    ]
+    return b"\n".join(lines) + b"\n", expired
+
+
+async def stream_results(
+    chunks: AsyncIterator[list],
+    deadline: Optional[float] = None,
+    trace: Optional[Span] = None,
+    disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> AsyncIterator[bytes]:
+    """The NDJSON lines for `chunks`; stops early once `disconnected()` says the client has gone."""
+    rows = expired = 0
+    gone = False
+    metrics.IN_FLIGHT.inc("compute_stream")
+    try:
+        async for items in chunks:
+            if disconnected is not None and await disconnected():
+                gone = True
+                break
+            if items:
+                rows += len(items)
+                lines, missed = await run_in_threadpool(_encode, items, deadline)
+                expired += missed
+                yield lines
+    finally:
+        metrics.IN_FLIGHT.dec("compute_stream")
+        metrics.BATCH_ROWS.observe("compute_stream", value=rows)
+        if expired:
+            metrics.DEADLINES.inc("compute_stream")
+        if trace is not None:
+            trace.attributes.update({"calc.rows": rows, "calc.deadline_exceeded": expired})
+            if gone:
+                trace.attributes["calc.client_disconnected"] = True
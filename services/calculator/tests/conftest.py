@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The service modules import each other by bare name (they run from this
+# directory under uvicorn), so make that directory importable for tests.
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVICE_DIR not in sys.path:
+    sys.path.insert(0, SERVICE_DIR)
@@ -0,0 +1,157 @@
+import asyncio
+import json
+
+import pytest
+
+from ..admission import BULK, ROUTINE, URGENT, Admission, Shed
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_waiters_are_served_in_lane_order():
+    async def scenario():
+        gate = Admission(limit=1, shed_depth=10, shed_wait_ms=10_000)
+        order = []
+
+        async def request(lane, name):
+            async with gate.slot(lane):
+                order.append(name)
+                await asyncio.sleep(0)
+
+        await gate.acquire(ROUTINE)
+        tasks = [asyncio.create_task(request(lane, name)) for lane, name in [
+            (BULK, "bulk"), (ROUTINE, "routine"), (URGENT, "urgent"), (ROUTINE, "routine2"),
+        ]]
+        await asyncio.sleep(0)
+        assert gate.depth() == 4
+        gate.release(0.01)
+        await asyncio.gather(*tasks)
+        assert order == ["urgent", "routine", "routine2", "bulk"]
+        assert gate.active == 0 and gate.depth() == 0
+
+    _run(scenario())
+
+
+def test_bulk_is_shed_on_queue_depth_but_urgent_still_queues():
+    async def scenario():
+        gate = Admission(limit=1, shed_depth=1, shed_wait_ms=10_000)
+        await gate.acquire(ROUTINE)
+        waiting = asyncio.create_task(gate.acquire(ROUTINE))
+        await asyncio.sleep(0)
+        with pytest.raises(Shed) as shed:
+            await gate.acquire(BULK)
+        assert shed.value.reason == "queue_depth" and shed.value.retry_after >= 1
+        urgent = asyncio.create_task(gate.acquire(URGENT))
+        await asyncio.sleep(0)
+        assert gate.depth() == 2
+        gate.release(0.01)
+        await asyncio.sleep(0)
+        assert urgent.done() and not waiting.done()
+        gate.release(0.01)
+        await waiting
+
+    _run(scenario())
+
+
+def test_bulk_is_shed_on_estimated_wait():
+    async def scenario():
+        gate = Admission(limit=2, shed_depth=100, shed_wait_ms=500)
+        gate.hold = 0.4
+        await gate.acquire(URGENT)
+        await gate.acquire(URGENT)
+        waiting = asyncio.create_task(gate.acquire(ROUTINE))
+        await asyncio.sleep(0)
+        assert gate.estimated_wait() == pytest.approx(0.4)
+        waiting2 = asyncio.create_task(gate.acquire(ROUTINE))
+        await asyncio.sleep(0)
+        assert gate.estimated_wait() == pytest.approx(0.8)
+        with pytest.raises(Shed) as shed:
+            await gate.acquire(BULK)
+        assert shed.value.reason == "estimated_wait" and shed.value.retry_after == 1
+        for task in (waiting, waiting2):
+            task.cancel()
+        await asyncio.gather(waiting, waiting2, return_exceptions=True)
+        assert gate.depth() == 0 and gate.active == 2
+
+    _run(scenario())
+
+
+def test_cancelled_waiter_passes_a_granted_slot_on():
+    async def scenario():
+        gate = Admission(limit=1, shed_depth=10, shed_wait_ms=10_000)
+        await gate.acquire(ROUTINE)
+        first = asyncio.create_task(gate.acquire(ROUTINE))
+        second = asyncio.create_task(gate.acquire(ROUTINE))
+        await asyncio.sleep(0)
+        gate.release(0.01)  # granted to `first`, which has not resumed yet
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(second, 1)
+        assert gate.active == 1 and gate.depth() == 0
+
+    _run(scenario())
+
+
+def test_compute_sheds_bulk_with_retry_after(monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import admission as app_admission, app, metrics as app_metrics
+
+    gate = app_admission.Admission(limit=1, shed_depth=0, shed_wait_ms=10_000)
+    gate.active = 1
+    monkeypatch.setattr(app_admission, "CONTROLLER", gate)
+    client = TestClient(app)
+    body = {"requests": [{"formula": "calculate_resistive_index", "inputs": {"psv": 90, "edv": 10}}]}
+    before = app_metrics.SHED.value(BULK, "queue_depth")
+    response = client.post("/compute", json=body, headers={"X-Calc-Priority": "bulk"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert app_metrics.SHED.value(BULK, "queue_depth") == before + 1
+    assert client.post("/compute", json=body, headers={"X-Calc-Priority": "soon"}).status_code == 422
+    assert 'calc_requests_shed_total{lane="bulk",reason="queue_depth"}' in client.get("/metrics").text
+
+
+
+def test_stream_holds_a_slot_and_sheds_bulk(monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import admission as app_admission, app
+
+    gate = app_admission.Admission(limit=1, shed_depth=0, shed_wait_ms=10_000)
+    monkeypatch.setattr(app_admission, "CONTROLLER", gate)
+    client = TestClient(app)
+    body = {"requests": [{"formula": "calculate_resistive_index", "inputs": {"psv": 90, "edv": 10}}]}
+    response = client.post("/compute/stream", json=body, headers={"X-Calc-Priority": "bulk"})
+    assert response.status_code == 200 and gate.active == 0
+    assert client.post("/compute/stream", json={"requests": [{"inputs": {}}]}).status_code == 422
+    assert gate.active == 0
+
+    gate.active = 1
+    response = client.post("/compute/stream", json=body, headers={"X-Calc-Priority": "bulk"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_an_abandoned_stream_gives_its_slot_back(monkeypatch):
+    pytest.importorskip("httpx")
+    from ..main import admission as app_admission, streaming as app_streaming
+    from .test_main import leave_after_first_lines
+
+    gate = app_admission.Admission(limit=1, shed_depth=0, shed_wait_ms=10_000)
+    monkeypatch.setattr(app_admission, "CONTROLLER", gate)
+    slots, encode = [], app_streaming._encode
+
+    def counted(items, deadline):
+        slots.append(gate.active)
+        return encode(items, deadline)
+
+    monkeypatch.setattr(app_streaming, "_encode", counted)
+    rows = [{"formula": "calculate_resistive_index", "inputs": {"psv": 90, "edv": i}} for i in range(1000)]
+    sent = leave_after_first_lines(json.dumps({"requests": rows}).encode(), "application/json")
+    assert len(sent) == 1 and slots == [1]
+    assert gate.active == 0
+
@@ -0,0 +1,45 @@
+import pytest
+from pydantic import ValidationError
+
+from .. import api, pool
+from ..validation import DEADLINE_EXCEEDED
+from .test_fastpath import BATCH
+
+
+def test_rows_match_compute():
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import app
+
+    expected = TestClient(app).post("/compute", json=BATCH).json()
+    assert api.compute_batch(BATCH["requests"]) == expected
+
+
+def test_references_and_deadlines_behave_like_compute():
+    requests = [
+        {"formula": "calculate_prostate_volume_ellipsoid", "inputs": {"comprimento": 5, "largura": 4, "altura": 4},
+         "ref_id": "vol1"},
+        {"formula": "calculate_prostate_psa_density", "inputs": {"psa": 6, "volume_prostata": {"$ref": "vol1.value"}}},
+    ]
+    rows = api.compute_batch(requests)
+    assert rows[1]["error"] is None
+    assert rows[1]["result"]["value"] == round(6 / rows[0]["result"]["value"], 3)
+    uncached = {"formula": "calculate_resistive_index", "inputs": {"psv": 100, "edv": 12.3456}}
+    assert api.compute_batch([uncached], deadline_ms=1e-9)[0]["error_code"] == DEADLINE_EXCEEDED
+
+
+def test_large_batches_use_the_pool(monkeypatch):
+    monkeypatch.setattr(pool, "POOL_WORKERS", 2)
+    monkeypatch.setattr(pool, "POOL_MIN_ROWS", 10)
+    requests = [{"formula": "calculate_resistive_index", "inputs": {"psv": 100, "edv": i}} for i in range(20)]
+    try:
+        rows = api.compute_batch(requests)
+    finally:
+        pool.shutdown()
+    assert [row["result"]["value"] for row in rows] == [round((100 - i) / 100, 2) for i in range(20)]
+
+
+def test_malformed_requests_raise():
+    with pytest.raises(ValidationError):
+        api.compute_batch([{"inputs": {}}])
@@ -0,0 +1,47 @@
+import importlib.util
+import os
+
+from ..formulas import FORMULAS
+
+BENCH_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "bench_formulas.py")
+_spec = importlib.util.spec_from_file_location("bench_formulas", BENCH_FILE)
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+
+
+def _results(ns, blocks, rows_per_sec):
+    return {
+        "formulas": {"calculate_resistive_index": {"ns_per_call": ns, "retained_blocks_per_call": blocks}},
+        "endpoint": {"100": {"rows_per_sec": rows_per_sec}},
+    }
+
+
+def test_compare_flags_changes_past_the_threshold():
+    baseline = _results(1000.0, 2.0, 50_000.0)
+    assert bench.compare(baseline, _results(1100.0, 2.0 + bench.BLOCK_SLACK, 45_000.0), 0.10) == []
+    regressions = bench.compare(baseline, _results(1101.0, 2.6, 44_999.0), 0.10)
+    assert regressions == [
+        "calculate_resistive_index: 1000 -> 1101 ns/call (+10%)",
+        "calculate_resistive_index: 2.00 -> 2.60 retained blocks/call",
+        "/compute x100: 50,000 -> 44,999 rows/s (-10%)",
+    ]
+    # A looser threshold lets the same run through; block counts do not depend on it.
+    assert bench.compare(baseline, _results(1101.0, 2.6, 44_999.0), 0.20) == [regressions[1]]
+
+
+def test_compare_skips_entries_missing_from_the_baseline():
+    current = _results(9999.0, 9.0, 1.0)
+    assert bench.compare({}, current, 0.10) == []
+    assert bench.compare({"formulas": {}, "endpoint": {"1": {"rows_per_sec": 1.0}}}, current, 0.10) == []
+
+
+def test_committed_baseline_covers_every_formula():
+    baseline = bench._load(os.path.join(os.path.dirname(BENCH_FILE), "baseline.json"))
+    assert set(baseline["formulas"]) == set(FORMULAS)
+    assert all(set(row) == {"ns_per_call", "retained_blocks_per_call"} for row in baseline["formulas"].values())
+    assert bench.compare(baseline, baseline, 0.0) == []
+
+
+def test_retained_blocks_count_what_a_call_keeps():
+    assert bench.retained_blocks_per_call(lambda: None, [{}] * 200) < bench.BLOCK_SLACK
+    assert bench.retained_blocks_per_call(lambda: [object()], [{}] * 200) >= 2 - bench.BLOCK_SLACK
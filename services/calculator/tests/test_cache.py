@@ -0,0 +1,96 @@
+import json
+
+from .. import cache, engine
+from ..cache import FORMULAS_VERSION, ResultCache, make_key, read_replay
+
+
+def test_key_is_canonical_and_versioned():
+    a = make_key("calculate_resistive_index", {"psv": 100, "edv": 30})
+    b = make_key("calculate_resistive_index", {"edv": 30, "psv": 100})
+    assert a == b
+    assert a[0] == FORMULAS_VERSION
+
+
+def test_key_separates_ints_from_floats():
+    assert make_key("f", {"x": 1}) != make_key("f", {"x": 1.0})
+    assert make_key("f", {"x": True}) != make_key("f", {"x": 1})
+
+
+def test_key_separates_negative_zero():
+    assert make_key("f", {"x": -0.0}) != make_key("f", {"x": 0.0})
+    assert make_key("f", {"x": 0}) != make_key("f", {"x": 0.0})
+    engine.RESULTS.clear()
+    zero = {"d_ducto_biliar": 0.0}
+    negative = {"d_ducto_biliar": -0.0}
+    assert str(engine.evaluate("measure_bile_duct_diameter", zero)[0]["value"]) == "0.0"
+    assert str(engine.evaluate("measure_bile_duct_diameter", negative)[0]["value"]) == "-0.0"
+    rows = engine.evaluate_batch([("measure_bile_duct_diameter", zero), ("measure_bile_duct_diameter", negative)])
+    assert [str(row[0]["value"]) for row in rows] == ["0.0", "-0.0"]
+
+
+def test_unhashable_inputs_are_not_cached():
+    assert make_key("f", {"x": [1, 2]}) is None
+
+
+def test_lru_evicts_least_recently_used():
+    results = ResultCache(max_entries=2, ttl_seconds=60)
+    results.put("a", 1)
+    results.put("b", 2)
+    assert results.get("a") == 1
+    results.put("c", 3)
+    assert results.get("b") is None
+    assert results.get("a") == 1 and results.get("c") == 3
+    assert results.stats()["evictions"] == 1
+    assert results.hits == 3 and results.misses == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    results = ResultCache(max_entries=10, ttl_seconds=5)
+    results.put("a", 1)
+    now[0] += 4
+    assert results.get("a") == 1
+    now[0] += 2
+    assert results.get("a") is None
+    assert results.expirations == 1
+
+
+def test_read_replay_accepts_batches_and_single_requests(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"requests": [{"formula": "calculate_resistive_index", "inputs": {"psv": 100, "edv": 30}}]}),
+        json.dumps({"formula": "measure_bile_duct_diameter", "inputs": {"d_ducto_biliar": 8}, "ref_id": "x"}),
+        json.dumps({"request_id": "user-001", "title": "not a calculation"}),
+        "not json",
+        "",
+    ]))
+    assert list(read_replay(str(path))) == [
+        ("calculate_resistive_index", {"psv": 100, "edv": 30}),
+        ("measure_bile_duct_diameter", {"d_ducto_biliar": 8}),
+    ]
+
+
+def test_engine_serves_repeated_calls_from_cache(tmp_path):
+    engine.RESULTS.clear()
+    path = tmp_path / "traffic.jsonl"
+    path.write_text(json.dumps({"formula": "calculate_nascet_stenosis", "inputs": {"d_stenosis": 3, "d_distal": 7}}))
+    assert engine.warm_cache(str(path)) == 1
+
+    hits = engine.RESULTS.hits
+    result, error, _ = engine.evaluate("calculate_nascet_stenosis", {"d_distal": 7, "d_stenosis": 3})
+    assert error is None
+    assert result["value"] == 57.1
+    assert engine.RESULTS.hits == hits + 1
+
+
+def test_cached_results_are_copies():
+    engine.RESULTS.clear()
+    inputs = {"d_stenosis": 3, "d_distal": 7}
+    first, _, _ = engine.evaluate("calculate_nascet_stenosis", inputs)
+    first["value"] = "changed by a caller"
+    second, _, _ = engine.evaluate("calculate_nascet_stenosis", inputs)
+    assert second["value"] == 57.1
+    second["category"] = "changed again"
+    (third, _, _), (fourth, _, _) = engine.evaluate_batch([("calculate_nascet_stenosis", inputs)] * 2)
+    assert third == fourth == {"value": 57.1, "category": first["category"]} and third is not fourth
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from .. import catalog
+from ..main import app
+
+client = TestClient(app)
+
+
+def test_catalog_lists_every_formula_with_its_signature():
+    response = client.get("/formulas")
+    assert response.status_code == 200
+    entries = {entry["name"]: entry for entry in response.json()["formulas"]}
+    assert set(entries) == set(client.get("/health").json()["formulas_available"])
+    ri = entries["calculate_resistive_index"]
+    assert ri["item_id"] == "VASC-0001"
+    assert [param["name"] for param in ri["parameters"]] == ["psv", "edv"]
+    assert ri["parameters"][0]["type"] == "number"
+    assert ri["parameters"][0]["unit"] == "m/s"
+    assert ri["interpretation"][0] == {"if": "RI < 0.55", "then": "Normal (baixa resistência vascular)"}
+    optional = [
+        param for param in entries["classify_renal_cyst_bosniak_2019"]["parameters"] if not param["required"]
+    ]
+    assert optional and all("default" in param for param in optional)
+
+
+def test_etag_revalidation():
+    first = client.get("/formulas")
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert client.get("/health").json()["catalog_etag"] == etag
+    cached = client.get("/formulas", headers={"If-None-Match": f'"other", {etag}'})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    assert client.get("/formulas", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_catalog_without_compendium():
+    entries = json.loads(catalog.build({}))["formulas"]
+    assert all(entry["item_id"] is None for entry in entries)
+    assert all("label" not in param for entry in entries for param in entry["parameters"])
@@ -0,0 +1,97 @@
+import math
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from ..columnar import KERNELS, evaluate
+from ..formulas import FORMULAS
+
+
+def _random_value(rng: random.Random):
+    roll = rng.random()
+    if roll < 0.05:
+        return 0
+    if roll < 0.45:
+        return rng.randint(-5, 120)
+    if roll < 0.85:
+        return round(rng.uniform(-5, 120), 1)
+    return rng.uniform(0, 5)
+
+
+def _same(a, b):
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b and type(a) is type(b)
+
+
+@pytest.mark.parametrize("formula", sorted(KERNELS))
+def test_kernel_matches_scalar_formula(formula):
+    params, _ = KERNELS[formula]
+    rng = random.Random(formula)
+    rows = [{name: _random_value(rng) for name in params} for _ in range(2000)]
+
+    results = evaluate(formula, rows)
+
+    for inputs, result in zip(rows, results):
+        expected = FORMULAS[formula](**inputs)
+        assert result.keys() == expected.keys(), inputs
+        for key in expected:
+            assert _same(result[key], expected[key]), (inputs, key, result, expected)
+
+
+def test_ineligible_rows_are_left_for_scalar_path():
+    rows = [
+        {"psv": 100, "edv": 30},
+        {"psv": "100", "edv": 30},
+        {"psv": 100},
+        {"psv": 100, "edv": 30, "extra": 1},
+        {"psv": True, "edv": 0},
+        {"psv": float("nan"), "edv": 1.0},
+    ]
+    results = evaluate("calculate_resistive_index", rows)
+    assert results[0] == {"value": 0.7, "category": "Borderline (resistencia moderada)"}
+    assert results[1:] == [None] * 5
+
+
+def test_zero_denominator_returns_empty_value():
+    results = evaluate("calculate_nascet_stenosis", [{"d_stenosis": 2, "d_distal": 0}])
+    assert results == [{"value": None}]
+
+
+def test_evaluate_batch_mixes_columnar_and_scalar_rows():
+    from ..engine import COLUMNAR_MIN_ROWS, evaluate_batch
+
+    calls = [("calculate_resistive_index", {"psv": 100 + i, "edv": 30}) for i in range(COLUMNAR_MIN_ROWS)]
+    calls += [
+        ("calculate_resistive_index", {"psv": 100}),
+        ("unknown_formula", {}),
+        ("classify_nodule_fleischner_2017", {"tamanho_mm": 5, "tipo_nodulo": "solido", "risco_paciente": "baixo"}),
+    ]
+
+    outcomes = evaluate_batch(calls)
+
+    for (formula, inputs), (result, error, _) in zip(calls[:COLUMNAR_MIN_ROWS], outcomes):
+        assert error is None
+        assert result == FORMULAS[formula](**inputs)
+    assert outcomes[-3][0] is None and outcomes[-3][2] == "missing_input"
+    assert outcomes[-2] == (None, "Formula 'unknown_formula' not found", "unknown_formula")
+    assert outcomes[-1] == ({"value": "Follow-up 12 meses"}, None, None)
+
+
+@pytest.mark.parametrize("precision", [1, 2, 3])
+def test_round_matches_builtin_round_on_ties(precision):
+    import numpy as np
+    from ..columnar import _round
+
+    rng = random.Random(precision)
+    values = [rng.randint(-10**6, 10**6) / 10 ** (precision + 1) for _ in range(20000)]
+    values += [rng.uniform(-1e4, 1e4) for _ in range(20000)]
+    values += [0.285, 1.005, 2.675, -0.0, -0.004, 1e300, 5e-324]
+
+    rounded = _round(np.array(values), precision)
+
+    for value, result in zip(values, rounded):
+        expected = round(value, precision)
+        assert result == expected and math.copysign(1, result) == math.copysign(1, expected), value
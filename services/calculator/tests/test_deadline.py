@@ -0,0 +1,138 @@
+import json
+
+import pytest
+
+from .. import engine, metrics
+from ..validation import DEADLINE_EXCEEDED
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache(monkeypatch):
+    monkeypatch.setattr(engine.RESULTS, "max_entries", 0)
+
+
+class Clock:
+    """Stands in for monotonic() and perf_counter(): time moves only when a slow formula runs."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(engine, "monotonic", clock)
+    monkeypatch.setattr(engine, "perf_counter", clock)
+    return clock
+
+
+def _slow(engine, monkeypatch, clock, name, seconds):
+    fn = engine.FORMULAS[name]
+
+    def slow(**inputs):
+        clock.now += seconds
+        return fn(**inputs)
+
+    monkeypatch.setattr(engine.VALIDATORS[name], "fn", slow)
+
+
+def _calls(count):
+    return [("calculate_resistive_index", {"psv": 100, "edv": i}) for i in range(count)]
+
+
+def test_no_deadline_evaluates_every_row():
+    assert engine.evaluate_batch(_calls(5), deadline=None) == engine.evaluate_batch(_calls(5))
+
+
+def test_rows_left_at_the_deadline_expire(monkeypatch, clock):
+    _slow(engine, monkeypatch, clock, "calculate_resistive_index", 0.02)
+    calls = _calls(50) + [("nope", {}), ("calculate_resistive_index", {"psv": 1})]
+    sample = metrics.Sample()
+    outcomes = engine.evaluate_batch(calls, sample, deadline=clock.now + 0.05)
+    # Rows start at 0, 20 and 40 ms; the fourth would start at 60 ms.
+    assert [outcome[2] for outcome in outcomes[:50]] == [None] * 3 + [DEADLINE_EXCEEDED] * 47
+    # Rejected rows are reported as such, not as expired.
+    assert outcomes[50][2] == "unknown_formula"
+    assert outcomes[51][2] == "missing_input"
+    assert sample.errors[("calculate_resistive_index", DEADLINE_EXCEEDED)] == 47
+    assert metrics.cause(DEADLINE_EXCEEDED) == DEADLINE_EXCEEDED
+
+
+def test_past_deadline_expires_columnar_groups_and_duplicates(monkeypatch):
+    monkeypatch.setattr(engine, "COLUMNAR_MIN_ROWS", 4)
+    calls = _calls(10) + _calls(2)
+    sample = metrics.Sample()
+    outcomes = engine.evaluate_batch(calls, sample, deadline=float("-inf"))
+    assert {outcome[2] for outcome in outcomes} == {DEADLINE_EXCEEDED}
+    assert sum(sample.errors.values()) == 12
+
+
+def test_compute_honours_the_deadline_header(monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from .. import main
+    from ..main import app, engine as app_engine, metrics as app_metrics
+
+    # main imports engine by bare name: a different module object from ..engine.
+    clock = Clock()
+    for module, name in ((main, "monotonic"), (app_engine, "monotonic"), (app_engine, "perf_counter")):
+        monkeypatch.setattr(module, name, clock)
+    monkeypatch.setattr(app_engine.RESULTS, "max_entries", 0)
+    _slow(app_engine, monkeypatch, clock, "calculate_resistive_index", 0.02)
+    before = app_metrics.DEADLINES.value("compute")
+    requests = [{"formula": "calculate_resistive_index", "inputs": {"psv": 90, "edv": i}} for i in range(40)]
+    response = TestClient(app).post("/compute", json={"requests": requests}, headers={"X-Calc-Deadline-Ms": "60"})
+    assert response.status_code == 200
+    codes = [row["error_code"] for row in response.json()]
+    assert codes == [None] * 3 + [DEADLINE_EXCEEDED] * 37
+    assert response.headers["X-Calc-Deadline-Exceeded"] == "37"
+    assert app_metrics.DEADLINES.value("compute") == before + 1
+
+
+def test_compute_rejects_bad_deadlines():
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import app
+
+    client = TestClient(app)
+    body = {"requests": [{"formula": "calculate_resistive_index", "inputs": {"psv": 90, "edv": 10}}]}
+    assert client.post("/compute", json=body, headers={"X-Calc-Deadline-Ms": "soon"}).status_code == 422
+    assert client.post("/compute", json={**body, "deadline_ms": 0}).status_code == 422
+    response = client.post("/compute", json={**body, "deadline_ms": 60_000})
+    assert response.status_code == 200
+    assert response.headers["X-Calc-Deadline-Exceeded"] == "0"
+    assert "X-Calc-Deadline-Exceeded" not in client.post("/compute", json=body).headers
+
+
+def test_stream_honours_the_deadline(monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from .. import main
+    from ..main import app, engine as app_engine, metrics as app_metrics
+
+    clock = Clock()
+    for module, name in ((main, "monotonic"), (app_engine, "monotonic"), (app_engine, "perf_counter")):
+        monkeypatch.setattr(module, name, clock)
+    monkeypatch.setattr(app_engine.RESULTS, "max_entries", 0)
+    _slow(app_engine, monkeypatch, clock, "calculate_resistive_index", 0.02)
+    client = TestClient(app)
+    requests = [{"formula": "calculate_resistive_index", "inputs": {"psv": 90, "edv": i}} for i in range(10)]
+    before = app_metrics.DEADLINES.value("compute_stream")
+
+    response = client.post("/compute/stream", json={"requests": requests, "deadline_ms": 50})
+    codes = [json.loads(line)["error_code"] for line in response.text.splitlines()]
+    assert codes == [None] * 3 + [DEADLINE_EXCEEDED] * 7
+    assert app_metrics.DEADLINES.value("compute_stream") == before + 1
+
+    ndjson = "\n".join(json.dumps(row) for row in requests)
+    response = client.post(
+        "/compute/stream", content=ndjson, headers={"Content-Type": "application/x-ndjson", "X-Calc-Deadline-Ms": "1"},
+    )
+    codes = [json.loads(line)["error_code"] for line in response.text.splitlines()]
+    assert codes == [None] + [DEADLINE_EXCEEDED] * 9
@@ -0,0 +1,255 @@
+import math
+import random
+from itertools import product
+from typing import Optional
+
+import pytest
+
+from ..formulas import FORMULAS, _as_bool, _normalize_text
+from ..formulas import _decisions
+from ..formulas._common import _result
+from ..formulas._decisions import BOSNIAK_2019, BOSNIAK_FEATURES, DecisionTable, tuned_order
+
+FORMULA = "classify_renal_cyst_bosniak_2019"
+
+
+# The chain the decision table replaces, as it was written in formulas/abdomen.py.
+
+def _chain(
+    realce_hu: Optional[float] = None,
+    componentes_solidos: Optional[bool] = None,
+    septos: Optional[bool] = None,
+    calcificacao: Optional[bool] = None,
+    numero_septos: Optional[float] = None,
+    modalidade: Optional[str] = None,
+    tamanho_lesao_mm: Optional[float] = None,
+    parede_espessura_mm: Optional[float] = None,
+    septos_espessura_mm: Optional[float] = None,
+    parede_irregular: Optional[bool] = None,
+    septos_irregulares: Optional[bool] = None,
+    parede_realce: Optional[bool] = None,
+    septos_realce: Optional[bool] = None,
+    nodulo_realce: Optional[bool] = None,
+    nodulo_tamanho_mm: Optional[float] = None,
+    nodulo_margem: Optional[str] = None,
+    atenuacao_hu_pre: Optional[float] = None,
+    atenuacao_hu_portal: Optional[float] = None,
+    homogeneo: Optional[bool] = None,
+    hiperintenso_t2_csf: Optional[bool] = None,
+    hiperintenso_t1_marcado: Optional[bool] = None,
+    hiperintenso_t1_heterogeneo_fs: Optional[bool] = None,
+    muito_pequeno_caracterizar: Optional[bool] = None,
+    fluido_simples: Optional[bool] = None,
+):
+    modality = _normalize_text(modalidade)
+    is_mri = modality in {"rm", "mri", "ressonancia", "ressonancia_magnetica"}
+    is_ct = not is_mri
+
+    enhancement_ct = realce_hu is not None and realce_hu >= 20
+    wall_enh = _as_bool(parede_realce)
+    septa_enh = _as_bool(septos_realce)
+    nodule_enh = _as_bool(nodulo_realce)
+    enhancement = enhancement_ct or wall_enh or septa_enh or nodule_enh
+
+    nodule_margin = _normalize_text(nodulo_margem)
+    nodule_size = nodulo_tamanho_mm or 0
+
+    solids = _as_bool(componentes_solidos)
+    septa = _as_bool(septos)
+    calc = _as_bool(calcificacao)
+    sept_count = int(round(numero_septos)) if numero_septos is not None else 0
+    wall_thick = parede_espessura_mm or 0
+    septa_thick = septos_espessura_mm or 0
+    wall_irreg = _as_bool(parede_irregular)
+    septa_irreg = _as_bool(septos_irregulares)
+    t2_csf = _as_bool(hiperintenso_t2_csf)
+    t1_marked = _as_bool(hiperintenso_t1_marcado)
+    t1_hetero = _as_bool(hiperintenso_t1_heterogeneo_fs)
+    too_small = _as_bool(muito_pequeno_caracterizar)
+    simple_fluid = _as_bool(fluido_simples)
+    homogeneous = _as_bool(homogeneo)
+
+    # Bosniak IV: enhancing nodules or enhancing solid components.
+    if nodule_enh:
+        if nodule_size >= 4 or nodule_margin in {"aguda", "agudo", "acute"}:
+            return _result("IV")
+        if nodule_size > 0:
+            return _result("IV")
+        if solids:
+            return _result("IV")
+    if solids and enhancement:
+        return _result("IV")
+
+    # Bosniak III: thick (>=4 mm) or irregular enhancing wall/septa.
+    if enhancement and (wall_irreg or septa_irreg or wall_thick >= 4 or septa_thick >= 4):
+        return _result("III")
+
+    # Bosniak IIF: minimally thick (3 mm) enhancing wall/septa or many thin enhancing septa.
+    if enhancement and ((3 <= wall_thick < 4) or (3 <= septa_thick < 4) or sept_count >= 4):
+        return _result("IIF")
+
+    # Bosniak I: simple cyst.
+    if simple_fluid or (not septa and not calc and not solids and (
+        (is_ct and homogeneous and atenuacao_hu_pre is not None and -9 <= atenuacao_hu_pre <= 20)
+        or (is_mri and t2_csf)
+    )):
+        return _result("I")
+
+    # MRI-specific Bosniak II/IIF.
+    if is_mri:
+        if t1_hetero:
+            return _result("IIF")
+        if t2_csf or t1_marked:
+            return _result("II")
+
+    # CT-specific Bosniak II.
+    if is_ct:
+        if too_small:
+            return _result("II")
+        if homogeneous and not enhancement:
+            if atenuacao_hu_pre is not None:
+                if atenuacao_hu_pre >= 70:
+                    return _result("II")
+                if atenuacao_hu_pre > 20:
+                    return _result("II")
+                if -9 <= atenuacao_hu_pre <= 20:
+                    return _result("II")
+            if atenuacao_hu_portal is not None and 21 <= atenuacao_hu_portal <= 30:
+                return _result("II")
+        if septa or calc:
+            if sept_count >= 4:
+                return _result("IIF" if enhancement else "II")
+            if (wall_thick <= 2 or wall_thick == 0) and (septa_thick <= 2 or septa_thick == 0):
+                return _result("II")
+
+    # Fallback: if enhancement without clear category.
+    if enhancement:
+        return _result("IIF")
+
+    return _result(None, "Indeterminado")
+
+
+FLAGS = (
+    "componentes_solidos", "septos", "calcificacao", "parede_irregular", "septos_irregulares", "parede_realce",
+    "septos_realce", "nodulo_realce", "homogeneo", "hiperintenso_t2_csf", "hiperintenso_t1_marcado",
+    "hiperintenso_t1_heterogeneo_fs", "muito_pequeno_caracterizar", "fluido_simples",
+)
+
+# One value per case the chain tells apart, and the boundaries between them.
+MEASURES = {
+    "modalidade": ["TC", "RM"],
+    "realce_hu": [19.9, 20],
+    "numero_septos": [None, 3, 3.5, 4],
+    "parede_espessura_mm": [None, 2, 2.5, 3.99, 4],
+    "septos_espessura_mm": [None, 2, 2.5, 3, 4],
+    "nodulo_tamanho_mm": [None, 0.5],
+    "nodulo_margem": [None, "aguda"],
+    "atenuacao_hu_pre": [None, -10, -9, 20, 20.5],
+    "atenuacao_hu_portal": [None, 20.5, 21, 30],
+}
+
+
+def _same(inputs: dict) -> bool:
+    return FORMULAS[FORMULA](**inputs) == _chain(**inputs)
+
+
+def test_bosniak_matches_its_chain_for_every_flag_combination():
+    # Measurements cycle through their combinations alongside.
+    measures = list(product(*MEASURES.values()))
+    random.Random(0).shuffle(measures)
+    for i, flags in enumerate(product((False, True), repeat=len(FLAGS))):
+        for modality in ("TC", "RM"):
+            inputs = dict(zip(MEASURES, measures[(2 * i + (modality == "RM")) % len(measures)]))
+            inputs.update(zip(FLAGS, flags), modalidade=modality)
+            assert _same(inputs), inputs
+
+
+def test_bosniak_matches_its_chain_for_every_measurement_combination():
+    # Flags cycle through their combinations alongside.
+    flags = list(product((False, True), repeat=len(FLAGS)))
+    random.Random(1).shuffle(flags)
+    for i, measures in enumerate(product(*MEASURES.values())):
+        inputs = {**dict(zip(FLAGS, flags[i % len(flags)])), **dict(zip(MEASURES, measures))}
+        assert _same(inputs), inputs
+
+
+def _random_inputs(rng: random.Random) -> dict:
+    # Numbers stay numbers (or None), as the validator leaves them; flags and
+    # texts take anything a caller might send.
+    numbers = [None, 0, -0.0, 2, 3, 4, 20, 21, 30, 70, -9, math.nan, math.inf, -math.inf, True, 2 ** 60]
+    flags = [None, True, False, 0, 1, 2.5, "sim", " Não ", "true", "yes", "1", "", "x", [1]]
+    texts = [None, "rm", " RESSONÂNCIA_MAGNETICA ", "MRI", "tc", "aguda", "Agudo", "acute", "obtusa", 1, True]
+    inputs = {}
+    for name in BOSNIAK_FEATURES.params:
+        if rng.random() < 0.4:
+            continue
+        if name in BOSNIAK_FEATURES.flags:
+            inputs[name] = rng.choice(flags)
+        elif name in BOSNIAK_FEATURES.texts:
+            inputs[name] = rng.choice(texts)
+        else:
+            inputs[name] = rng.choice(numbers) if rng.random() < 0.6 else round(rng.uniform(-20, 90), rng.choice([0, 1]))
+    return inputs
+
+
+def _outcome(inputs: dict, formula) -> tuple:
+    try:
+        return "ok", formula(**inputs)
+    except Exception as e:
+        return "error", type(e)
+
+
+def test_bosniak_matches_its_chain_on_random_lesions():
+    rng = random.Random(2019)
+    for _ in range(20_000):
+        inputs = _random_inputs(rng)
+        assert _outcome(inputs, FORMULAS[FORMULA]) == _outcome(inputs, _chain), inputs
+
+
+def test_decision_kernel_matches_scalar_formula():
+    pytest.importorskip("numpy")
+    from ..columnar import DECISION_KERNELS, evaluate
+
+    assert FORMULA in DECISION_KERNELS
+    rng = random.Random(25)
+    rows = [_random_inputs(rng) for _ in range(3000)]
+    rows += [{}, {"other": 1}, {"septos": True, "extra": 1}, {"numero_septos": math.nan}, {"realce_hu": "30"}]
+
+    results = evaluate(FORMULA, rows)
+
+    assert results[-5:-1] == [_chain(), None, None, None] and results[-1] is None
+    taken = 0
+    for inputs, result in zip(rows[:-5], results):
+        if result is not None:
+            taken += 1
+            assert result == FORMULAS[FORMULA](**inputs), inputs
+        else:
+            assert _outcome(inputs, FORMULAS[FORMULA])[0] == "error" or 2 ** 60 in inputs.values(), inputs
+    assert taken > len(rows) // 2
+
+
+def test_tuned_order_only_swaps_rules_that_commute():
+    rules = ((0b001, 0, "a"), (0b010, 0b001, "b"), (0b100, 0, "a"), (0b010, 0, "c"))
+    # "b" excludes the first rule; the third overlaps "b" with another outcome, but shares the first's.
+    assert tuned_order(rules, (0, 9, 0, 0)) == [1, 0, 2, 3]
+    assert tuned_order(rules, (0, 0, 9, 0)) == [0, 1, 2, 3]
+    assert tuned_order(rules, (0, 9, 5, 0)) == [1, 2, 0, 3]
+    assert tuned_order(rules, (0, 0, 0, 9)) == [0, 1, 2, 3]
+    with pytest.raises(ValueError):
+        DecisionTable((0b11, 0b10, "a"), default=None)
+
+    chain_order = DecisionTable(*BOSNIAK_2019.rules, default=None)
+    assert BOSNIAK_2019.order != chain_order.order
+    rng = random.Random(7)
+    masks = [rng.getrandbits(31) & rng.getrandbits(31) for _ in range(50_000)]
+    assert [BOSNIAK_2019.evaluate(mask) for mask in masks] == [chain_order.evaluate(mask) for mask in masks]
+
+
+def test_select_matches_evaluate_and_counts_hits():
+    np = pytest.importorskip("numpy")
+    rng = random.Random(8)
+    masks = [rng.getrandbits(31) & rng.getrandbits(31) & rng.getrandbits(31) for _ in range(20_000)]
+    outcomes, hits = BOSNIAK_2019.select(np.array(masks, dtype=np.int64))
+    assert outcomes == [BOSNIAK_2019.evaluate(mask) for mask in masks]
+    assert sum(hits) == sum(outcome is not None for outcome in outcomes)
+    assert len(_decisions.BOSNIAK_WEIGHTS) == len(BOSNIAK_2019.rules)
@@ -0,0 +1,90 @@
+import pytest
+
+from .. import engine, metrics
+from ..formulas import _common
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache(monkeypatch):
+    monkeypatch.setattr(engine.RESULTS, "max_entries", 0)
+
+
+def _count_calls(monkeypatch, name):
+    counted = []
+    fn = engine.FORMULAS[name]
+
+    def counting(**inputs):
+        counted.append(inputs)
+        return fn(**inputs)
+
+    monkeypatch.setattr(engine.VALIDATORS[name], "fn", counting)
+    return counted
+
+
+def test_identical_rows_are_evaluated_once(monkeypatch):
+    counted = _count_calls(monkeypatch, "calculate_nascet_stenosis")
+    calls = [("calculate_nascet_stenosis", {"d_stenosis": 3, "d_distal": 10})] * 4
+    calls += [("calculate_nascet_stenosis", {"d_distal": 10, "d_stenosis": 3})]
+    calls += [("calculate_nascet_stenosis", {"d_stenosis": 3.0, "d_distal": 10})]
+    sample = metrics.Sample()
+    outcomes = engine.evaluate_batch(calls, sample)
+    assert len(counted) == 2  # int and float inputs serialize differently
+    assert outcomes[:5] == [outcomes[0]] * 5
+    assert sample.deduplicated == 4
+    assert sample.calls == {"calculate_nascet_stenosis": 6}
+
+
+def test_duplicate_errors_fan_out_and_are_counted():
+    calls = [("nope", {})] * 3 + [("calculate_resistive_index", {"psv": 1})] * 2
+    sample = metrics.Sample()
+    outcomes = engine.evaluate_batch(calls, sample)
+    assert [outcome[2] for outcome in outcomes] == ["unknown_formula"] * 3 + ["missing_input"] * 2
+    assert sample.errors == {("", "unknown_formula"): 3, ("calculate_resistive_index", "missing_input"): 2}
+
+
+def test_dedup_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(engine, "BATCH_DEDUP", False)
+    counted = _count_calls(monkeypatch, "calculate_nascet_stenosis")
+    engine.evaluate_batch([("calculate_nascet_stenosis", {"d_stenosis": 3, "d_distal": 10})] * 3)
+    assert len(counted) == 3
+
+
+def test_sibling_formulas_share_helper_results():
+    calls = [
+        ("calculate_hepatic_artery_ri", {"psv": 80, "edv": 20}),
+        ("calculate_renal_transplant_ri", {"psv": 80, "edv": 20}),
+        ("calculate_splenic_artery_ri", {"psv": 80, "edv": 20}),
+        ("calculate_splenic_artery_ri", {"psv": 90, "edv": 20}),
+    ]
+    sample = metrics.Sample()
+    outcomes = engine.evaluate_batch(calls, sample)
+    assert sample.shared_helpers == 2
+    assert outcomes == [engine.evaluate(formula, inputs) for formula, inputs in calls]
+
+
+def test_single_formula_batches_skip_the_memo():
+    sample = metrics.Sample()
+    engine.evaluate_batch([("calculate_resistive_index", {"psv": 80 + i, "edv": 20}) for i in range(5)], sample)
+    assert sample.shared_helpers == 0
+
+
+def test_helpers_run_directly_outside_a_batch():
+    assert _common.HELPER_MEMO.get() is None
+    assert _common._ri_value(100, 40) == 0.6
+
+
+def test_pool_dedupes_across_chunks(monkeypatch):
+    import asyncio
+    from .. import pool
+
+    monkeypatch.setattr(pool, "POOL_WORKERS", 2)
+    monkeypatch.setattr(pool, "POOL_MIN_ROWS", 10)
+    monkeypatch.setattr(pool, "POOL_CHUNK_ROWS", 4)
+    calls = [("calculate_nascet_stenosis", {"d_stenosis": i % 3, "d_distal": 10}) for i in range(20)]
+    sample = metrics.Sample()
+    try:
+        outcomes = asyncio.run(pool.evaluate_batch_async(calls, sample))
+    finally:
+        pool.shutdown()
+    assert outcomes == engine.evaluate_batch(calls)
+    assert sample.deduplicated == 17
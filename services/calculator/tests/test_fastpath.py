@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from .. import fastpath
+from ..engine import evaluate_batch
+from ..main import app
+from ..schemas import CalcBatch, CalcResult
+
+# /compute as it was written before fastpath: FastAPI parses CalcBatch and
+# serializes list[CalcResult] itself.
+reference = FastAPI()
+
+
+@reference.post("/compute", response_model=list[CalcResult])
+def reference_compute(batch: CalcBatch) -> list[CalcResult]:
+    outcomes = evaluate_batch([(req.formula, req.inputs) for req in batch.requests])
+    return [
+        CalcResult(ref_id=req.ref_id, formula=req.formula, result=result, error=error, error_code=code)
+        for req, (result, error, code) in zip(batch.requests, outcomes)
+    ]
+
+
+BATCH = {"requests": [
+    {"formula": "calculate_rv_lv_ratio", "inputs": {"d_rv": 50, "d_lv": 40}, "ref_id": "acentuação"},
+    {"formula": "measure_bile_duct_diameter", "inputs": {"d_ducto_biliar": 8}},
+    {"formula": "measure_bile_duct_diameter", "inputs": {"d_ducto_biliar": 1e17}, "ref_id": "big"},
+    {"formula": "measure_bile_duct_diameter", "inputs": {"d_ducto_biliar": 0.00001234}, "ref_id": "tiny"},
+    {"formula": "calculate_aaa_growth_rate", "inputs": {"d_atual": 50, "d_anterior": 45, "intervalo_anos": 1}},
+    {"formula": "measure_aortic_diameter", "inputs": {"d_aorta": 42.25, "localizacao": "Raíz"}, "ref_id": "r"},
+    {"formula": "calculate_nascet_stenosis", "inputs": {"d_stenosis": 1, "d_distal": 0}, "ref_id": "zero"},
+    {"formula": "calculate_nascet_stenosis", "inputs": {"d_stenosis": 1}, "ref_id": "missing"},
+    {"formula": "nope", "inputs": {}, "ref_id": " quote\"back\\slash\x1f"},
+    {"formula": "classify_ovarian_lesion_orads_us", "inputs": {
+        "tamanho_mm": 30, "composicao": "mista", "vascularizacao": "presente", "achados_adicionais": "ascite",
+    }, "ref_id": "orads"},
+]}
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_compute_bytes_match_fastapi_response_model(monkeypatch, fast):
+    monkeypatch.setattr(fastpath, "FAST_PATH", fast)
+    expected = TestClient(reference).post("/compute", json=BATCH)
+    actual = TestClient(app).post("/compute", json=BATCH)
+    assert actual.status_code == expected.status_code == 200
+    assert actual.content == expected.content
+    assert actual.headers["content-type"] == expected.headers["content-type"]
+
+
+@pytest.mark.parametrize("body", [
+    b'{"requests": [{"inputs": {}}, {"formula": 3, "inputs": []}]}',
+    b'{"requests": [',
+    b'[]',
+    b'',
+])
+def test_validation_errors_match_fastapi(body):
+    headers = {"Content-Type": "application/json"}
+    expected = TestClient(reference).post("/compute", content=body, headers=headers)
+    actual = TestClient(app).post("/compute", content=body, headers=headers)
+    assert actual.status_code == expected.status_code == 422
+    assert actual.json() == expected.json()
+
+
+def test_dumps_falls_back_for_exponent_floats():
+    assert fastpath.dumps([1e16, 1e-05, 0.5]) == b"[1e+16,1e-05,0.5]"
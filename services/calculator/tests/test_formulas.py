@@ -92,3 +92,22 @@ def test_classify_bosniak_nodule():
         nodulo_tamanho_mm=5,
     )
     assert result["value"] == "IV"
+
+
+def test_normalize_text_matches_nfkd():
+    import random
+    import unicodedata
+
+    from ..formulas._common import _normalize_text
+
+    def reference(value):
+        normalized = unicodedata.normalize("NFKD", str(value))
+        return "".join(ch for ch in normalized if not unicodedata.combining(ch)).lower().strip()
+
+    rng = random.Random(7)
+    alphabet = [chr(code) for code in range(0x300)] + ["́", "ẞ", "Ⅳ", "Ａ", "½"]
+    values = [chr(code) for code in range(0x300)] + [" Sólida ", "ÉSPONGIFORME", "Ⅳ", True, 1, 1.0, 0]
+    values += ["".join(rng.choices(alphabet, k=rng.randint(1, 12))) for _ in range(5000)]
+    for value in values:
+        assert _normalize_text(value) == reference(value), repr(value)
+    assert _normalize_text(None) == ""
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from .. import graph, metrics
+from ..engine import evaluate_batch
+
+VOLUME = {
+    "formula": "calculate_prostate_volume_ellipsoid",
+    "inputs": {"comprimento": 5, "largura": 4, "altura": 4},
+    "ref_id": "vol1",
+}
+
+
+def _density(ref="vol1.value", ref_id="psad"):
+    return {"formula": "calculate_prostate_psa_density", "inputs": {"psa": 6, "volume_prostata": {"$ref": ref}},
+            "ref_id": ref_id}
+
+
+def _evaluate(requests):
+    sample = metrics.Sample()
+    return asyncio.run(graph.evaluate(requests, sample)), sample
+
+
+def test_reference_feeds_a_later_row_regardless_of_order():
+    outcomes, _ = _evaluate([_density(), VOLUME])
+    volume = outcomes[1][0]["value"]
+    assert outcomes[0] == evaluate_batch([("calculate_prostate_psa_density", {"psa": 6, "volume_prostata": volume})])[0]
+
+
+def test_chains_run_level_by_level(monkeypatch):
+    levels = []
+    real = graph.pool.evaluate_batch_async
+
+    async def recording(calls, sample, deadline):
+        levels.append([formula for formula, _ in calls])
+        return await real(calls, sample, deadline)
+
+    monkeypatch.setattr(graph.pool, "evaluate_batch_async", recording)
+    requests = [
+        VOLUME,
+        _density(),
+        {"formula": "calculate_resistive_index", "inputs": {"psv": 100, "edv": 40}, "ref_id": "ri"},
+        {"formula": "calculate_prostate_psa_density",
+         "inputs": {"psa": {"$ref": "psad.value"}, "volume_prostata": 1}, "ref_id": "chained"},
+    ]
+    outcomes, sample = _evaluate(requests)
+    assert [outcome[2] for outcome in outcomes] == [None] * 4
+    assert levels == [
+        ["calculate_prostate_volume_ellipsoid", "calculate_resistive_index"],
+        ["calculate_prostate_psa_density"],
+        ["calculate_prostate_psa_density"],
+    ]
+    assert sample.calls["calculate_prostate_psa_density"] == 2
+
+
+def test_unresolved_references_and_upstream_errors():
+    requests = [
+        dict(VOLUME, inputs={"comprimento": 5}),
+        _density(),
+        _density(ref="nope.value", ref_id="a"),
+        _density(ref="vol1.missing", ref_id="b"),
+        {"formula": "calculate_resistive_index", "inputs": {"psv": 1, "edv": 0}, "ref_id": "dup"},
+        {"formula": "calculate_resistive_index", "inputs": {"psv": 1, "edv": 0}, "ref_id": "dup"},
+        _density(ref="dup.value", ref_id="c"),
+    ]
+    outcomes, sample = _evaluate(requests)
+    codes = [outcome[2] for outcome in outcomes]
+    assert codes == [
+        "missing_input", graph.UPSTREAM_ERROR, graph.UNRESOLVED_REFERENCE, graph.UPSTREAM_ERROR,
+        None, None, graph.UNRESOLVED_REFERENCE,
+    ]
+    assert "depends on 'vol1', which failed" in outcomes[1][1]
+    assert "matches several rows" in outcomes[6][1]
+    assert sample.errors[("calculate_prostate_psa_density", graph.UPSTREAM_ERROR)] == 2
+
+
+def test_cycles_and_their_dependents_are_reported():
+    requests = [
+        _density(ref="b.value", ref_id="a"),
+        _density(ref="a.value", ref_id="b"),
+        _density(ref="b.value", ref_id="c"),
+        _density(ref="self.value", ref_id="self"),
+        VOLUME,
+    ]
+    outcomes, _ = _evaluate(requests)
+    assert [outcome[2] for outcome in outcomes] == [graph.DEPENDENCY_CYCLE] * 4 + [None]
+
+
+def test_compute_resolves_references_in_one_call():
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import app
+
+    response = TestClient(app).post("/compute", json={"requests": [VOLUME, _density()]})
+    assert response.status_code == 200
+    volume, density = response.json()
+    assert density["error"] is None
+    assert density["result"]["value"] == round(6 / volume["result"]["value"], 3)
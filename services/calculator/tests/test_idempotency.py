@@ -0,0 +1,127 @@
+import asyncio
+import uuid
+
+import pytest
+from starlette.responses import Response
+
+from ..idempotency import IdempotencyStore, KeyReused, fingerprint
+
+
+def _body(edv):
+    return {"requests": [{"formula": "calculate_resistive_index", "inputs": {"psv": 100, "edv": edv}}]}
+
+
+def test_retries_replay_the_stored_response():
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import app, metrics
+
+    client = TestClient(app)
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    first = client.post("/compute", json=_body(40), headers=headers)
+    before = metrics.FORMULA_CALLS.value("calculate_resistive_index")
+    again = client.post("/compute", json=_body(40), headers=headers)
+    assert again.status_code == 200
+    assert again.content == first.content
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert metrics.FORMULA_CALLS.value("calculate_resistive_index") == before
+    assert client.post("/compute", json=_body(41), headers=headers).status_code == 422
+    assert client.post("/compute", json=_body(40), headers={"Idempotency-Key": ""}).status_code == 422
+
+
+def test_failed_requests_are_not_stored():
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import app
+
+    client = TestClient(app)
+    headers = {"Idempotency-Key": str(uuid.uuid4()), "Content-Type": "application/json"}
+    assert client.post("/compute", content=b"{", headers=headers).status_code == 422
+    assert client.post("/compute", content=b"{", headers=headers).status_code == 422
+    response = client.post("/compute", json=_body(40), headers={"Idempotency-Key": headers["Idempotency-Key"]})
+    assert response.status_code == 200
+
+
+def test_concurrent_duplicates_join_the_running_computation():
+    async def scenario():
+        store = IdempotencyStore(ttl_seconds=60, max_bytes=1 << 20)
+        runs = []
+        release = asyncio.Event()
+
+        async def compute():
+            runs.append(1)
+            await release.wait()
+            return Response(b"[1]", media_type="application/json")
+
+        key, fp = "k", fingerprint("application/json", b"body")
+        tasks = [asyncio.create_task(store.run(key, fp, compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        with pytest.raises(KeyReused):
+            await store.run(key, fingerprint("application/json", b"other"), compute)
+        release.set()
+        responses = await asyncio.gather(*tasks)
+        assert len(runs) == 1
+        assert [response.body for response in responses] == [b"[1]"] * 3
+        assert [response.headers.get("idempotent-replayed") for response in responses] == [None, "true", "true"]
+        assert (await store.run(key, fp, compute)).body == b"[1]"
+        assert len(runs) == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_leader_hands_over_and_errors_propagate():
+    async def scenario():
+        store = IdempotencyStore(ttl_seconds=60, max_bytes=1 << 20)
+        started = asyncio.Event()
+        runs = []
+
+        async def slow():
+            runs.append("slow")
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fast():
+            runs.append("fast")
+            return Response(b"ok")
+
+        fp = fingerprint("application/json", b"body")
+        leader = asyncio.create_task(store.run("k", fp, slow))
+        await started.wait()
+        follower = asyncio.create_task(store.run("k", fp, fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert (await follower).body == b"ok"
+        assert runs == ["slow", "fast"]
+
+        async def broken():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            await store.run("e", fp, broken)
+        assert "e" not in store._stored
+
+    asyncio.run(scenario())
+
+
+def test_store_is_bounded_by_bytes_and_ttl():
+    async def scenario():
+        store = IdempotencyStore(ttl_seconds=60, max_bytes=10)
+
+        def make(body):
+            async def compute():
+                return Response(body)
+            return compute
+
+        for key in "abc":
+            await store.run(key, b"fp", make(b"1234"))
+        assert list(store._stored) == ["b", "c"] and store.bytes == 8
+        await store.run("big", b"fp", make(b"x" * 11))
+        assert "big" not in store._stored
+        store.ttl_seconds = 0
+        await store.run("d", b"fp", make(b"1"))
+        assert store._get("d") is None
+
+    asyncio.run(scenario())
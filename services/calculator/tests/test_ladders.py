@@ -0,0 +1,642 @@
+import math
+
+import pytest
+
+from ..formulas import _ladders
+from ..formulas._ladders import Ladder
+
+LADDERS = {name: value for name, value in vars(_ladders).items() if isinstance(value, Ladder)}
+
+
+# The chains the ladders replace, as they were written in the formula modules.
+
+def _resistive_index(ri):
+    if ri < 0.55:
+        return "Normal (baixa resistencia vascular)"
+    elif ri <= 0.70:
+        return "Borderline (resistencia moderada)"
+    else:
+        return "Aumentado (alta resistencia)"
+
+
+def _pulsatility_index(pi):
+    if pi < 1.0:
+        return "Baixo (fluxo pouco pulsatil)"
+    elif pi <= 2.0:
+        return "Normal (pulsatilidade normal)"
+    else:
+        return "Aumentado (alta pulsatilidade)"
+
+
+def _carotid_stenosis(percent):
+    if percent < 30:
+        return "Sem estenose significativa"
+    elif percent <= 69:
+        return "Estenose moderada (30-69%)"
+    else:
+        return "Estenose grave (>=70%)"
+
+
+def _aaa_diameter(d_atual):
+    if d_atual < 28:
+        return "AAA pequeno; sem follow-up necessario"
+    elif d_atual < 40:
+        return "AAA moderado; follow-up anual"
+    elif d_atual < 45:
+        return "AAA grande; follow-up cada 3 meses"
+    elif d_atual < 55:
+        return "AAA muito grande; considerar cirurgia"
+    else:
+        return "AAA critico; cirurgia recomendada"
+
+
+def _ivc_collapsibility(ci):
+    if ci > 50:
+        return "PVC baixa; colapsabilidade normal"
+    elif ci >= 25:
+        return "PVC normal; colapsabilidade intermediaria"
+    else:
+        return "PVC elevada; colapsabilidade reduzida"
+
+
+def _portal_congestion(ci):
+    if ci < 0.4:
+        return "Normal; sem congestao portal"
+    elif ci <= 0.6:
+        return "Borderline; possivel congestao leve"
+    else:
+        return "Congestao portal; sugerir hipertensao portal"
+
+
+def _carotid_imt(imt_mm):
+    if imt_mm < 0.7:
+        return "Normal"
+    elif imt_mm <= 0.9:
+        return "Borderline"
+    else:
+        return "Aumentado"
+
+
+def _ankle_brachial(abi):
+    if abi >= 1.0:
+        return "Normal"
+    elif abi >= 0.91:
+        return "Borderline"
+    elif abi >= 0.71:
+        return "PAD leve-moderada"
+    elif abi >= 0.41:
+        return "PAD moderada-grave"
+    else:
+        return "PAD grave/critica"
+
+
+def _aortic_root(d_aorta):
+    if d_aorta < 40:
+        return "Normal"
+    elif d_aorta <= 50:
+        return "Borderline"
+    else:
+        return "Aneurisma aortico"
+
+
+def _aortic_abdominal(d_aorta):
+    if d_aorta < 30:
+        return "Normal"
+    elif d_aorta <= 50:
+        return "Aneurisma abdominal"
+    else:
+        return "AAA grande; cirurgia recomendada"
+
+
+def _pleural_effusion(volume):
+    if volume < 500:
+        return "Pequeno derrame (<500 mL)"
+    elif volume <= 1000:
+        return "Derrame moderado (500-1000 mL)"
+    else:
+        return "Derrame volumoso (>1000 mL)"
+
+
+def _rv_lv_ratio(ratio):
+    if ratio < 0.9:
+        return "Normal"
+    elif ratio <= 1.0:
+        return "Borderline"
+    else:
+        return "Dilatação RV"
+
+
+def _pa_aorta_ratio(ratio):
+    if ratio < 0.9:
+        return "Normal"
+    elif ratio <= 1.0:
+        return "Borderline"
+    else:
+        return "Sugestivo de hipertensao pulmonar"
+
+
+def _emphysema_laa(percentage):
+    if percentage < 5:
+        return "Normal"
+    elif percentage < 25:
+        return "Enfisema leve"
+    elif percentage < 50:
+        return "Enfisema moderado"
+    else:
+        return "Enfisema grave"
+
+
+def _pesi(score):
+    if score <= 65:
+        return "Classe I"
+    elif score <= 85:
+        return "Classe II"
+    elif score <= 105:
+        return "Classe III"
+    elif score <= 125:
+        return "Classe IV"
+    else:
+        return "Classe V"
+
+
+def _hepatorenal_index(hri):
+    if hri < 0.5:
+        return "Sem esteatose significativa"
+    elif hri < 1.5:
+        return "Esteatose leve"
+    elif hri < 2.5:
+        return "Esteatose moderada"
+    else:
+        return "Esteatose grave"
+
+
+def _nephrometry_radius(radius_cm):
+    if radius_cm < 4:
+        return 1
+    elif radius_cm <= 7:
+        return 2
+    else:
+        return 3
+
+
+def _nephrometry_exophytic(exophytic_percent):
+    if exophytic_percent <= 25:
+        return 1
+    elif exophytic_percent <= 50:
+        return 2
+    else:
+        return 3
+
+
+def _nephrometry_nearness(nearness_mm):
+    if nearness_mm >= 7:
+        return 1
+    elif nearness_mm >= 4:
+        return 2
+    else:
+        return 3
+
+
+def _nephrometry_total(total):
+    if total <= 6:
+        return "Baixa complexidade"
+    elif total <= 9:
+        return "Complexidade intermediaria"
+    else:
+        return "Alta complexidade"
+
+
+def _height_adjusted_tkv(ht_tkv):
+    if ht_tkv < 1.5:
+        return "Mayo Class 1A"
+    elif ht_tkv < 2.2:
+        return "Mayo Class 1B"
+    elif ht_tkv < 2.6:
+        return "Mayo Class 2"
+    elif ht_tkv < 3.1:
+        return "Mayo Class 3"
+    else:
+        return "Mayo Class 4"
+
+
+def _adrenal_washout(washout):
+    if washout > 60:
+        return "Adenoma"
+    elif washout >= 40:
+        return "Borderline"
+    else:
+        return "Sugestivo nao-adenoma"
+
+
+def _adrenal_signal_index(sii):
+    if sii > 16.5:
+        return "Adenoma"
+    elif sii >= 10:
+        return "Borderline"
+    else:
+        return "Sugestivo nao-adenoma"
+
+
+def _ctsi_necrosis_points(percentual_necrose):
+    if percentual_necrose <= 0:
+        return 0
+    elif percentual_necrose <= 30:
+        return 2
+    else:
+        return 4
+
+
+def _ctsi_score(score):
+    if score <= 2:
+        return "Pancreatite leve"
+    elif score <= 6:
+        return "Pancreatite moderada"
+    else:
+        return "Pancreatite grave"
+
+
+def _splenic_volume(volume):
+    if volume < 150:
+        return "Normal"
+    elif volume <= 200:
+        return "Borderline"
+    elif volume <= 400:
+        return "Esplenomegalia leve"
+    else:
+        return "Esplenomegalia moderada-grave"
+
+
+def _bile_duct_diameter(value):
+    if value < 6:
+        return "Normal"
+    elif value <= 7:
+        return "Borderline"
+    elif value <= 10:
+        return "Dilatado leve"
+    else:
+        return "Dilatado moderado-grave"
+
+
+def _gallbladder_wall(value):
+    if value < 3:
+        return "Normal"
+    elif value <= 3.5:
+        return "Borderline"
+    elif value <= 5:
+        return "Espessado"
+    else:
+        return "Muito espessado"
+
+
+def _steatosis_us_grade(grade):
+    if grade == 0:
+        return "Sem esteatose"
+    elif grade == 1:
+        return "Esteatose leve"
+    elif grade == 2:
+        return "Esteatose moderada"
+    else:
+        return "Esteatose grave"
+
+
+def _visceral_fat_area(value):
+    if value < 100:
+        return "Normal"
+    elif value <= 150:
+        return "Aumentado"
+    else:
+        return "Muito aumentado"
+
+
+def _aorta_calcification(score):
+    if score <= 0:
+        return "Sem calcificacao"
+    elif score == 1:
+        return "Calcificacao leve"
+    elif score == 2:
+        return "Calcificacao moderada"
+    else:
+        return "Calcificacao grave"
+
+
+def _bowel_wall(value):
+    if value < 2:
+        return "Normal"
+    elif value <= 3:
+        return "Borderline"
+    elif value <= 5:
+        return "Espessado"
+    else:
+        return "Muito espessado"
+
+
+def _visceral_artery_ri(ri):
+    if ri < 0.55:
+        return "Normal"
+    elif ri <= 0.70:
+        return "Borderline"
+    else:
+        return "Aumentado"
+
+
+def _renal_artery_psv(value):
+    if value < 180:
+        return "Normal"
+    elif value <= 200:
+        return "Borderline"
+    else:
+        return "Aumentado"
+
+
+def _renal_artery_edv(value):
+    if value > 45:
+        return "Normal"
+    elif value >= 20:
+        return "Borderline"
+    else:
+        return "Reduzido"
+
+
+def _renal_transplant_ri(ri):
+    if ri < 0.70:
+        return "Normal"
+    elif ri <= 0.80:
+        return "Borderline"
+    else:
+        return "Aumentado"
+
+
+def _adrenal_size(value):
+    if value < 10:
+        return "Normal"
+    elif value <= 12:
+        return "Borderline"
+    elif value <= 15:
+        return "Aumentado"
+    else:
+        return "Muito aumentado"
+
+
+def _adrenal_lipid_index(lipid_index):
+    if lipid_index < -10:
+        return "Muito lipidico"
+    elif lipid_index <= 10:
+        return "Borderline"
+    else:
+        return "Pouco lipidico"
+
+
+def _bile_duct_stone(value):
+    if value < 5:
+        return "Pequeno"
+    elif value <= 10:
+        return "Moderado"
+    else:
+        return "Grande"
+
+
+def _steatosis_ct(diferenca):
+    if diferenca > -10:
+        return "Sem esteatose"
+    elif diferenca > -20:
+        return "Esteatose leve"
+    elif diferenca > -30:
+        return "Esteatose moderada"
+    else:
+        return "Esteatose grave"
+
+
+def _prostate_volume(volume):
+    if volume < 25:
+        return "Normal"
+    elif volume <= 50:
+        return "Hiperplasia leve"
+    elif volume <= 100:
+        return "Hiperplasia moderada"
+    else:
+        return "Hiperplasia grave"
+
+
+def _psa_density(psad):
+    if psad < 0.15:
+        return "Normal"
+    elif psad <= 0.25:
+        return "Borderline"
+    else:
+        return "Aumentado"
+
+
+def _tz_psa_density(tz_psad):
+    if tz_psad < 0.10:
+        return "Normal"
+    elif tz_psad <= 0.20:
+        return "Borderline"
+    else:
+        return "Aumentado"
+
+
+def _gleason_group(score):
+    if score <= 6:
+        return "Grupo 1"
+    elif score == 7:
+        return "Grupo 2-3"
+    elif score == 8:
+        return "Grupo 4"
+    else:
+        return "Grupo 5"
+
+
+def _bladder_outlet_obstruction(boo_index):
+    if boo_index < 20:
+        return "Sem obstrucao"
+    elif boo_index <= 40:
+        return "Borderline"
+    else:
+        return "Obstruido"
+
+
+def _post_void_residual(value):
+    if value < 50:
+        return "Normal"
+    elif value <= 100:
+        return "Borderline"
+    else:
+        return "Retencao"
+
+
+def _ovarian_volume(volume):
+    if volume < 9:
+        return "Normal"
+    elif volume <= 12:
+        return "Borderline"
+    else:
+        return "Aumentado"
+
+
+def _ovarian_reserve_amh(amh_ng_ml):
+    if amh_ng_ml >= 1.0:
+        return "Normal"
+    elif amh_ng_ml >= 0.5:
+        return "Reduzido"
+    else:
+        return "Muito reduzido"
+
+
+def _fibroid_volume(volume):
+    if volume < 100:
+        return "Pequeno"
+    elif volume <= 500:
+        return "Moderado"
+    else:
+        return "Grande"
+
+
+def _rectal_wall(value):
+    if value < 5:
+        return "T1 (submucosa)"
+    elif value <= 10:
+        return "T2 (muscular propria)"
+    else:
+        return "T3-T4"
+
+
+def _resection_margin(value):
+    if value >= 2:
+        return "Negativo"
+    elif value >= 1:
+        return "Borderline"
+    else:
+        return "Positivo"
+
+
+def _rectal_cancer_depth(value):
+    if value <= 5:
+        return "T3a"
+    elif value <= 10:
+        return "T3b"
+    elif value <= 15:
+        return "T3c"
+    else:
+        return "T3d/T4"
+
+
+def _tirads_level(score):
+    if score <= 1:
+        return "TR1"
+    elif score == 2:
+        return "TR2"
+    elif score == 3:
+        return "TR3"
+    elif score <= 6:
+        return "TR4"
+    else:
+        return "TR5"
+
+
+CHAINS = {
+    "RESISTIVE_INDEX": _resistive_index,
+    "PULSATILITY_INDEX": _pulsatility_index,
+    "CAROTID_STENOSIS": _carotid_stenosis,
+    "AAA_DIAMETER": _aaa_diameter,
+    "IVC_COLLAPSIBILITY": _ivc_collapsibility,
+    "PORTAL_CONGESTION": _portal_congestion,
+    "CAROTID_IMT": _carotid_imt,
+    "ANKLE_BRACHIAL": _ankle_brachial,
+    "AORTIC_ROOT": _aortic_root,
+    "AORTIC_ABDOMINAL": _aortic_abdominal,
+    "PLEURAL_EFFUSION": _pleural_effusion,
+    "RV_LV_RATIO": _rv_lv_ratio,
+    "PA_AORTA_RATIO": _pa_aorta_ratio,
+    "EMPHYSEMA_LAA": _emphysema_laa,
+    "PESI": _pesi,
+    "HEPATORENAL_INDEX": _hepatorenal_index,
+    "NEPHROMETRY_RADIUS": _nephrometry_radius,
+    "NEPHROMETRY_EXOPHYTIC": _nephrometry_exophytic,
+    "NEPHROMETRY_NEARNESS": _nephrometry_nearness,
+    "NEPHROMETRY_TOTAL": _nephrometry_total,
+    "HEIGHT_ADJUSTED_TKV": _height_adjusted_tkv,
+    "ADRENAL_WASHOUT": _adrenal_washout,
+    "ADRENAL_SIGNAL_INDEX": _adrenal_signal_index,
+    "CTSI_NECROSIS_POINTS": _ctsi_necrosis_points,
+    "CTSI_SCORE": _ctsi_score,
+    "SPLENIC_VOLUME": _splenic_volume,
+    "BILE_DUCT_DIAMETER": _bile_duct_diameter,
+    "GALLBLADDER_WALL": _gallbladder_wall,
+    "STEATOSIS_US_GRADE": _steatosis_us_grade,
+    "VISCERAL_FAT_AREA": _visceral_fat_area,
+    "AORTA_CALCIFICATION": _aorta_calcification,
+    "BOWEL_WALL": _bowel_wall,
+    "VISCERAL_ARTERY_RI": _visceral_artery_ri,
+    "RENAL_ARTERY_PSV": _renal_artery_psv,
+    "RENAL_ARTERY_EDV": _renal_artery_edv,
+    "RENAL_TRANSPLANT_RI": _renal_transplant_ri,
+    "ADRENAL_SIZE": _adrenal_size,
+    "ADRENAL_LIPID_INDEX": _adrenal_lipid_index,
+    "BILE_DUCT_STONE": _bile_duct_stone,
+    "STEATOSIS_CT": _steatosis_ct,
+    "PROSTATE_VOLUME": _prostate_volume,
+    "PSA_DENSITY": _psa_density,
+    "TZ_PSA_DENSITY": _tz_psa_density,
+    "GLEASON_GROUP": _gleason_group,
+    "BLADDER_OUTLET_OBSTRUCTION": _bladder_outlet_obstruction,
+    "POST_VOID_RESIDUAL": _post_void_residual,
+    "OVARIAN_VOLUME": _ovarian_volume,
+    "OVARIAN_RESERVE_AMH": _ovarian_reserve_amh,
+    "FIBROID_VOLUME": _fibroid_volume,
+    "RECTAL_WALL": _rectal_wall,
+    "RESECTION_MARGIN": _resection_margin,
+    "RECTAL_CANCER_DEPTH": _rectal_cancer_depth,
+    "TIRADS_LEVEL": _tirads_level,
+}
+
+# Scores that the formulas only ever compute as integers, and that the chains
+# tested with ==; the ladders agree with them on those values only.
+INTEGER_SCORES = {
+    "STEATOSIS_US_GRADE": lambda v: v >= 0,  # max of non-negative points
+    "AORTA_CALCIFICATION": lambda v: True,
+    "GLEASON_GROUP": lambda v: True,
+    "TIRADS_LEVEL": lambda v: True,
+}
+
+
+def _probes(name: str) -> list:
+    ladder = LADDERS[name]
+    values = [math.nan, math.inf, -math.inf, 0, 0.0, -0.0]
+    for _, cutoff, _ in ladder.rungs:
+        values += [cutoff, float(cutoff), math.nextafter(cutoff, math.inf), math.nextafter(cutoff, -math.inf)]
+        if float(cutoff).is_integer():
+            values += [int(cutoff) - 1, int(cutoff), int(cutoff) + 1]
+        values += [round(cutoff - 0.1, 1), round(cutoff + 0.1, 1), round(cutoff - 0.01, 2), round(cutoff + 0.01, 2)]
+    if name in INTEGER_SCORES:
+        values = [int(v) for v in values if float(v).is_integer() and INTEGER_SCORES[name](v)]
+    return values
+
+
+def test_every_ladder_has_its_chain():
+    assert CHAINS.keys() == LADDERS.keys()
+
+
+@pytest.mark.parametrize("name", sorted(LADDERS))
+def test_ladder_matches_its_chain_at_every_boundary(name):
+    ladder, chain = LADDERS[name], CHAINS[name]
+    for value in _probes(name):
+        assert ladder.lookup(value) == chain(value), (name, value)
+
+
+@pytest.mark.parametrize("name", sorted(LADDERS))
+def test_select_matches_its_chain(name):
+    np = pytest.importorskip("numpy")
+    ladder, chain = LADDERS[name], CHAINS[name]
+    values = [float(value) for value in _probes(name)]
+    assert ladder.select(np.array(values, dtype=np.float64)) == [chain(value) for value in values]
+
+
+def test_rungs_must_point_one_way_in_order():
+    with pytest.raises(ValueError):
+        Ladder(("<", 1, "a"), (">", 2, "b"), default="c")
+    with pytest.raises(ValueError):
+        Ladder(("<", 2, "a"), ("<", 1, "b"), default="c")
+    with pytest.raises(ValueError):
+        Ladder((">=", 1, "a"), (">", 2, "b"), default="c")
+    tie = Ladder(("<", 1, "a"), ("<=", 1, "b"), default="c")
+    assert [tie.lookup(0.5), tie.lookup(1), tie.lookup(1.5)] == ["a", "b", "c"]
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=SERVICE_DIR, capture_output=True, text=True, check=True,
+    ).stdout.strip()
+
+
+def test_area_modules_load_on_first_use():
+    out = _run(
+        "import sys, formulas\n"
+        "loaded = lambda: sorted(m for m in sys.modules if m.startswith('formulas.'))\n"
+        "print(len(formulas.FORMULAS), loaded())\n"
+        "formulas.FORMULAS['calculate_resistive_index'](100, 40)\n"
+        "print(loaded())\n"
+    )
+    assert out.splitlines() == [
+        "78 []",
+        "['formulas._common', 'formulas._ladders', 'formulas._tables', 'formulas.vascular']",
+    ]
+
+
+def test_service_startup_does_not_load_formulas_or_numpy():
+    out = _run("import sys, main; print(sorted(m for m in sys.modules if m.startswith(('formulas.', 'numpy'))))")
+    assert out == "[]"
+
+
+def test_module_attributes_resolve_lazily():
+    from .. import formulas
+
+    assert formulas.calculate_thyroid_volume_ellipsoid is formulas.FORMULAS["calculate_thyroid_volume_ellipsoid"]
+    assert formulas._normalize_text(" Sólida ") == "solida"
+    assert "calculate_resistive_index" in dir(formulas)
+    names = {os.path.basename(path) for path in formulas.source_files()}
+    assert {"__init__.py", "_common.py", "vascular.py", "thyroid.py"} <= names
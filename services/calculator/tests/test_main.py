@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from ..main import app
+
+client = TestClient(app)
+
+
+def _requests(count):
+    return [
+        {"formula": "calculate_resistive_index", "inputs": {"psv": 100, "edv": i}, "ref_id": f"r{i}"}
+        for i in range(count)
+    ]
+
+
+def test_compute_returns_results_in_request_order():
+    response = client.post("/compute", json={"requests": _requests(3) + [{"formula": "nope", "inputs": {}}]})
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["ref_id"] for item in body] == ["r0", "r1", "r2", None]
+    assert body[1]["result"] == {"value": 0.99, "category": "Aumentado (alta resistencia)"}
+    assert body[3]["error_code"] == "unknown_formula"
+
+
+def test_stream_accepts_a_calc_batch():
+    response = client.post("/compute/stream", json={"requests": _requests(150)})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["ref_id"] for line in lines] == [f"r{i}" for i in range(150)]
+    assert lines == client.post("/compute", json={"requests": _requests(150)}).json()
+
+
+def test_stream_accepts_ndjson_and_reports_bad_lines():
+    body = "\n".join(json.dumps(item) for item in _requests(2)) + "\n{not json}\n" + json.dumps(_requests(3)[2])
+    response = client.post(
+        "/compute/stream",
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["ref_id"] for line in lines] == ["r0", "r1", None, "r2"]
+    assert lines[2]["error_code"] == "invalid_request"
+    assert "line 3" in lines[2]["error"]
+
+
+def leave_after_first_lines(body: bytes, content_type: str) -> list[bytes]:
+    """Drive /compute/stream as a client that disconnects once the first lines arrive."""
+
+    async def run():
+        sent, left = [], asyncio.Event()
+        pending = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            if pending:
+                return pending.pop()
+            await left.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                sent.append(message["body"])
+                left.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+            "path": "/compute/stream", "raw_path": b"/compute/stream", "query_string": b"", "root_path": "",
+            "headers": [(b"content-type", content_type.encode())], "client": ("test", 1), "server": ("test", 80),
+        }
+        await app(scope, receive, send)
+        return sent
+
+    return asyncio.run(run())
+
+
+def test_stream_stops_when_the_client_leaves():
+    from ..main import streaming as app_streaming
+
+    chunk = app_streaming.STREAM_CHUNK_ROWS
+    requests = _requests(chunk * 10)
+    sent = leave_after_first_lines(json.dumps({"requests": requests}).encode(), "application/json")
+    assert b"".join(sent).count(b"\n") == chunk
+    ndjson = "\n".join(json.dumps(item) for item in requests).encode()
+    sent = leave_after_first_lines(ndjson, "application/x-ndjson")
+    assert b"".join(sent).count(b"\n") == chunk
+
+
+def test_stream_rejects_malformed_batches():
+    response = client.post("/compute/stream", json={"requests": [{"inputs": {}}]})
+    assert response.status_code == 422
+
+
+def test_compute_reports_saved_evaluations():
+    requests = [
+        {"formula": "calculate_hepatic_artery_ri", "inputs": {"psv": 70, "edv": 21}, "ref_id": "a"},
+        {"formula": "calculate_hepatic_artery_ri", "inputs": {"psv": 70, "edv": 21}, "ref_id": "b"},
+        {"formula": "calculate_splenic_artery_ri", "inputs": {"psv": 70, "edv": 21}, "ref_id": "c"},
+    ]
+    response = client.post("/compute", json={"requests": requests})
+    assert [item["ref_id"] for item in response.json()] == ["a", "b", "c"]
+    assert response.headers["x-calc-deduplicated"] == "1"
+    assert "x-calc-shared-helpers" in response.headers
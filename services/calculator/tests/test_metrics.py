@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+# The modules the app itself imported, not the calculator.* copies.
+from ..main import app, engine, metrics, pool
+
+client = TestClient(app)
+
+
+def _value(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_histogram_text_is_cumulative():
+    histogram = metrics.Histogram("h", "help", (1, 10))
+    histogram.observe(value=0.5)
+    histogram.observe(value=5, count=2)
+    histogram.observe(value=50)
+    assert list(histogram.samples()) == [
+        'h_bucket{le="1"} 1', 'h_bucket{le="10"} 3', 'h_bucket{le="+Inf"} 4', "h_sum 60.5", "h_count 4",
+    ]
+
+
+def test_batch_records_calls_errors_and_latency():
+    sample = metrics.Sample()
+    engine.evaluate_batch([
+        ("calculate_resistive_index", {"psv": 123.4567, "edv": 40.1234}),
+        ("calculate_resistive_index", {"psv": 100}),
+        ("calculate_resistive_index", {"psv": "x", "edv": 1}),
+        ("whatever_name", {}),
+    ], sample)
+    assert sample.calls == {"calculate_resistive_index": 3}
+    assert sample.errors == {
+        ("calculate_resistive_index", "missing_input"): 1,
+        ("calculate_resistive_index", "invalid_input"): 1,
+        ("", "unknown_formula"): 1,
+    }
+    assert sum(sample.latency["calculate_resistive_index"][:-1]) == 1
+
+
+def test_pool_workers_report_their_metrics(monkeypatch):
+    monkeypatch.setattr(pool, "POOL_WORKERS", 2)
+    monkeypatch.setattr(pool, "POOL_MIN_ROWS", 10)
+    monkeypatch.setattr(pool, "POOL_CHUNK_ROWS", 7)
+    before = metrics.FORMULA_CALLS.value("calculate_nascet_stenosis")
+    try:
+        asyncio.run(pool.evaluate_batch_async([
+            ("calculate_nascet_stenosis", {"d_stenosis": i % 9, "d_distal": 10}) for i in range(30)
+        ]))
+    finally:
+        pool.shutdown()
+    assert metrics.FORMULA_CALLS.value("calculate_nascet_stenosis") - before == 30
+
+
+def test_metrics_endpoint():
+    before = client.get("/metrics").text
+    client.post("/compute", json={"requests": [
+        {"formula": "calculate_nascet_stenosis", "inputs": {"d_stenosis": 3, "d_distal": 0}},
+        {"formula": "nope", "inputs": {}},
+    ]})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert "# TYPE calc_formula_latency_seconds histogram" in text
+    assert 'calc_requests_in_flight{endpoint="compute"} 0' in text
+    assert "calc_cache_hits_total" in text
+    for series in (
+        'calc_formula_calls_total{formula="calculate_nascet_stenosis"}',
+        'calc_formula_errors_total{formula="",cause="unknown_formula",error_code="unknown_formula"}',
+        'calc_batch_rows_count{endpoint="compute"}',
+    ):
+        assert _value(text, series) - _value(before, series) == 1
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("starlette")
+
+from .. import pool
+from ..engine import evaluate_batch
+
+
+def _calls(count):
+    calls = []
+    for i in range(count):
+        if i % 7 == 0:
+            calls.append(("unknown_formula", {}))
+        elif i % 5 == 0:
+            calls.append(("calculate_resistive_index", {"psv": 0, "edv": i}))
+        else:
+            calls.append(("calculate_nascet_stenosis", {"d_stenosis": i % 9, "d_distal": 10}))
+    return calls
+
+
+def test_chunk_keeps_order_and_covers_every_row():
+    parts = pool.chunk(list(range(10)), 4)
+    assert parts == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+def test_small_batches_run_inline(monkeypatch):
+    monkeypatch.setattr(pool, "POOL_MIN_ROWS", 1000)
+    monkeypatch.setattr(pool, "get_executor", lambda: pytest.fail("pool used for a small batch"))
+    calls = _calls(10)
+    assert asyncio.run(pool.evaluate_batch_async(calls)) == evaluate_batch(calls)
+
+
+def test_large_batches_come_back_in_request_order(monkeypatch):
+    monkeypatch.setattr(pool, "POOL_WORKERS", 2)
+    monkeypatch.setattr(pool, "POOL_MIN_ROWS", 10)
+    monkeypatch.setattr(pool, "POOL_CHUNK_ROWS", 7)
+    calls = _calls(60)
+    try:
+        assert asyncio.run(pool.evaluate_batch_async(calls)) == evaluate_batch(calls)
+    finally:
+        pool.shutdown()
+
+
+def test_broken_pool_is_shut_down_and_replaced(monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+
+    class Broken:
+        shut_down = None
+
+        def submit(self, *args, **kwargs):
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = (wait, cancel_futures)
+
+    broken = Broken()
+    monkeypatch.setattr(pool, "_executor", broken)
+    monkeypatch.setattr(pool, "POOL_WORKERS", 2)
+    monkeypatch.setattr(pool, "POOL_MIN_ROWS", 10)
+    calls = _calls(30)
+
+    assert asyncio.run(pool.evaluate_batch_async(calls)) == evaluate_batch(calls)
+    assert broken.shut_down == (False, True)
+    assert pool._executor is None
@@ -0,0 +1,121 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from .. import rules
+from ..catalog import CALC_BLOCKS_FILE, load_blocks
+
+
+def _block(*lines):
+    return {"interpretation": {"raw": ["rules:", *lines]}}
+
+
+def test_conditions_compile_to_python():
+    assert rules.Rule("0.55 <= RI <= 0.70", "x").source == "0.55 <= values['RI'] <= 0.7"
+    assert rules.Rule("-10 >= diferenca > -20", "x").source == "-10 >= values['diferenca'] > -20"
+    assert rules.Rule('(t_stage in ["T2","T3"]) AND m_stage != "M0"', "x").source == (
+        "(_normalize_text(values['t_stage']) in ('t2', 't3',)) and _normalize_text(values['m_stage']) != 'm0'"
+    )
+    assert rules.Rule("x < 8 AND NOT flag OR y = 3", "x").source == (
+        "values['x'] < 8 and not _as_bool(values['flag']) or values['y'] == 3"
+    )
+    rule = rules.Rule("(275 <= PSV <= 400) OR (2 <= RAR <= 3)", "x")
+    assert rule.names == {"PSV", "RAR"}
+    assert rule.cutoffs == {"PSV": {275, 400}, "RAR": {2, 3}}
+    for text in ("pmi >= 8.4 (homem)", 'x < "a"', "x <", "3", "x in [1, \"a\"]"):
+        with pytest.raises(rules.RuleError):
+            rules.Rule(text, "x")
+
+
+def test_classifiers_come_from_the_build_or_memory():
+    # compiled_rules.py is an untracked build output; without it the rules are compiled in memory.
+    namespace = rules._generated(CALC_BLOCKS_FILE) or rules._namespace()
+    assert rules.classifiers() is namespace["CLASSIFIERS"]
+    assert set(rules.unsupported()) == {"calculate_psoas_muscle_index"}
+
+
+def test_classify_takes_the_first_rule_that_holds():
+    assert rules.classify("calculate_resistive_index", {"RI": 0.70}) == "Borderline (resistência moderada)"
+    assert rules.classify("calculate_resistive_index", {"RI": float("nan")}) is None
+    assert rules.classify("calculate_splenic_volume_ellipsoid", {"splenic_volume": 200}) == "Borderline"
+    tnm = {"t_stage": "t3", "n_stage": "N0", "m_stage": " M0 "}
+    assert rules.classify("classify_rectal_cancer_tnm", tnm) == "Stage II; prognóstico intermediário"
+    assert rules.classify("classify_hepatic_vein_doppler", {"padrão_fluxo": "Normal_Trifasico"}).startswith("Normal")
+    jz = {"espessura_jz": 10, "irregularidade_jz": "sim"}
+    assert rules.classify("measure_adenomyosis_junctional_zone", jz) == "Adenomiose leve"
+
+
+def test_cross_check_compares_outcome_and_decision_tables():
+    report = rules.cross_check()
+    agreed = {entry["formula"]: entry for entry in report["agree"]}
+    # Rules on the formula's inputs: probed through the formula, compared by grouping.
+    stranding = agreed["grade_mesenteric_fat_stranding"]
+    assert stranding["table"] == "MESENTERIC_STRANDING" and stranding["gaps"] == ["grau_stranding=(other)"]
+    assert len(stranding["compendium"]) == 4
+    assert agreed["classify_rectal_cancer_tnm"]["compendium"] == agreed["classify_rectal_cancer_tnm"]["formulas"]
+    # Rules on the formula's output: compared with what the table returns.
+    assert agreed["classify_renal_cyst_bosniak_2019"]["formulas"] == ["I", "II", "IIF", "III", "IV"]
+    assert agreed["classify_thyroid_nodule_tirads"]["table"] == "TIRADS"
+    stanford = report["disagree"][2]
+    assert stanford["gaps"] == ["Type B (limitada descendente)"]
+
+    renamed = _block(
+        '- if: padrão_fluxo in ["normal_trifásico", "bifásico"]', 'then: "a"',
+        '- if: padrão_fluxo = "monofásico"', 'then: "b"',
+    )
+    entry = rules.cross_check({"classify_hepatic_vein_doppler": renamed})["disagree"][0]
+    assert entry["compendium"] == ["padrão_fluxo=bifásico | padrão_fluxo=normal_trifásico", "padrão_fluxo=monofásico"]
+    assert len(entry["formulas"]) == 3
+
+
+def test_the_service_does_not_import_the_rules():
+    code = "import sys, main; print(sorted({'rules', 'compiled_rules'} & set(sys.modules)))"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=os.path.dirname(rules.GENERATED_FILE), capture_output=True, text=True,
+        check=True,
+    ).stdout.strip()
+    assert out == "[]"
+
+
+def test_stale_compendium_is_compiled_in_memory(tmp_path):
+    path = tmp_path / "calc_blocks.json"
+    path.write_text(json.dumps({"x": {
+        "FunctionName": "calculate_resistive_index",
+        "interpretation": {"raw": ["- if: RI < 0.6", 'then: "Normal"', "- if: RI >= 0.6", 'then: "Alto"']},
+    }}))
+    assert rules._generated(str(path)) is None
+    classify = rules._in_memory(str(path))["CLASSIFIERS"]["calculate_resistive_index"]
+    assert [classify({"RI": ri}) for ri in (0.59, 0.6)] == ["Normal", "Alto"]
+
+
+def test_build_writes_source_and_bytecode(tmp_path):
+    path = str(tmp_path / "compiled_rules.py")
+    rules.build(path)
+    assert importlib.util.source_from_cache(importlib.util.cache_from_source(path)) == path
+    assert (tmp_path / "__pycache__").is_dir()
+
+
+def test_cross_check_lists_threshold_disagreements():
+    report = rules.cross_check()
+    assert [entry["formula"] for entry in report["disagree"]] == [
+        "calculate_ankle_brachial_index", "calculate_modified_ct_severity_index", "classify_aortic_dissection_stanford",
+    ]
+    agreed = {entry["formula"]: entry for entry in report["agree"]}
+    assert agreed["calculate_resistive_index"]["compendium"] == ["< 0.55", "<= 0.7"]
+    # Whole-number cutoffs: <= 69 and >= 70 describe the same split.
+    assert agreed["calculate_nascet_stenosis"]["gaps"] == []
+    mctsi = report["disagree"][1]
+    assert mctsi["formulas"] == ["<= 2", "<= 6"] and mctsi["gaps"] == ["2..4", "6..8"]
+    skipped = {entry["formula"]: entry["reason"] for entry in report["skipped"]}
+    assert len(report["disagree"]) + len(report["agree"]) + len(skipped) == len(load_blocks())
+    assert skipped["measure_aortic_diameter"] == (
+        "category from more than one ladder or table (AORTIC_ROOT, AORTIC_ABDOMINAL)"
+    )
+
+    moved = _block("- if: RI < 0.55", 'then: "a"', "- if: 0.55 <= RI < 0.70", 'then: "b"', "- if: RI >= 0.70", 'then: "c"')
+    entry = rules.cross_check({"calculate_resistive_index": moved})["disagree"][0]
+    assert (entry["compendium"], entry["formulas"]) == (["< 0.55", "< 0.7"], ["< 0.55", "<= 0.7"])
@@ -0,0 +1,120 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="serve.py forks its workers")
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url: str, timeout: float = 20.0):
+    start = time.monotonic()
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                return json.load(response)
+        except OSError:
+            if time.monotonic() - start > timeout:
+                raise
+            time.sleep(0.05)
+
+
+def test_preload_builds_shared_state_before_forking():
+    out = subprocess.run(
+        [sys.executable, "-c", (
+            "import sys, serve, validation, pool\n"
+            "serve.preload()\n"
+            "print(len(validation.VALIDATORS), 'numpy' in sys.modules, pool.POOL_WORKERS)\n"
+        )],
+        cwd=SERVICE_DIR, capture_output=True, text=True, check=True,
+        env={k: v for k, v in os.environ.items() if k != "CALC_POOL_WORKERS"},
+    ).stdout.split()
+    assert out == ["78", "True", "1"]
+
+
+def test_workers_answer_and_are_replaced():
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "2",
+         "--log-level", "warning"],
+        cwd=SERVICE_DIR, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        assert _get(f"http://127.0.0.1:{port}/health")["status"] == "ok"
+        workers = subprocess.run(
+            ["pgrep", "-P", str(server.pid)], capture_output=True, text=True,
+        ).stdout.split()
+        if not workers:
+            pytest.skip("pgrep not available")
+        assert len(workers) == 2
+        os.kill(int(workers[0]), signal.SIGKILL)
+        assert server.stderr.readline().startswith(f"worker {workers[0]} exited")
+        assert _get(f"http://127.0.0.1:{port}/health")["status"] == "ok"
+    finally:
+        server.terminate()
+        assert server.wait(timeout=20) == 0
+
+
+def test_listens_on_a_unix_socket(tmp_path):
+    path = str(tmp_path / "calc.sock")
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--uds", path, "--workers", "1", "--log-level", "warning"], cwd=SERVICE_DIR,
+    )
+    try:
+        start = time.monotonic()
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX) as sock:
+                    sock.connect(path)
+                    sock.sendall(b"GET /health HTTP/1.1\r\nHost: calc\r\nConnection: close\r\n\r\n")
+                    response = b""
+                    while chunk := sock.recv(65536):
+                        response += chunk
+                break
+            except OSError:
+                assert time.monotonic() - start < 20
+                time.sleep(0.05)
+        assert response.startswith(b"HTTP/1.1 200")
+    finally:
+        server.terminate()
+        assert server.wait(timeout=20) == 0
+    assert not os.path.exists(path)
+
+
+def test_workers_default_to_the_cpus_the_pod_may_use(tmp_path):
+    from .. import serve
+
+    affinity = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    assert serve.available_cpus(str(tmp_path)) == affinity
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert serve.available_cpus(str(tmp_path)) == affinity
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert serve.available_cpus(str(tmp_path)) == min(affinity, 2)
+    (tmp_path / "cpu.max").unlink()
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("50000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert serve.available_cpus(str(tmp_path)) == 1
+
+
+def test_pool_and_admission_size_by_the_same_cpu_count():
+    env = {k: v for k, v in os.environ.items() if k not in ("CALC_POOL_WORKERS", "CALC_MAX_CONCURRENT")}
+    code = "import admission, pool, serve; print(serve.available_cpus(), pool.POOL_WORKERS, admission.MAX_CONCURRENT)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=SERVICE_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    cpus, workers, concurrent = map(int, out.split())
+    assert (workers, concurrent) == (cpus, 2 * cpus)
@@ -0,0 +1,134 @@
+import random
+from itertools import product
+
+import pytest
+
+from ..formulas import FORMULAS, _as_bool, _normalize_text
+from ..formulas import _tables
+from ..formulas._ladders import TIRADS_LEVEL
+from ..formulas._tables import OutcomeTable
+
+TABLES = {name: value for name, value in vars(_tables).items() if isinstance(value, OutcomeTable)}
+
+
+# The chains the tables replace, as they were written in the formula modules.
+
+def _tirads(composicao, ecogenicidade, forma, margens, focos_ecogenicos):
+    comp = _normalize_text(composicao)
+    echo = _normalize_text(ecogenicidade)
+    shape = _normalize_text(forma)
+    margins = _normalize_text(margens)
+    foci = _normalize_text(focos_ecogenicos)
+    comp_points = {"cistica": 0, "quase_completamente_cistica": 0, "cistica_com_solido": 1, "solida": 2}.get(comp, 0)
+    echo_points = {"anecoica": 0, "isoecoica": 1, "hiperecoica": 1, "hipoecoica": 2}.get(echo, 0)
+    shape_points = 3 if shape == "tao_larga_quanto_alta" else 0
+    margin_points = {"bem_definidas": 0, "mal_definidas": 0, "lobuladas": 2, "espiculadas": 3}.get(margins, 0)
+    foci_points = {"ausentes": 0, "pontos_grandes": 1, "pontos_pequenos_comet_tail": 0}.get(foci, 0)
+    score = comp_points + echo_points + shape_points + margin_points + foci_points
+    return {"value": TIRADS_LEVEL.lookup(score)}
+
+
+def _rectal_tnm(t_stage, n_stage, m_stage):
+    t_val = _normalize_text(t_stage).upper()
+    n_val = _normalize_text(n_stage).upper()
+    m_val = _normalize_text(m_stage).upper()
+    if t_val == "T1" and n_val == "N0" and m_val == "M0":
+        category = "Stage I"
+    elif t_val in {"T2", "T3", "T4"} and n_val == "N0" and m_val == "M0":
+        category = "Stage II"
+    elif n_val in {"N1", "N2"} and m_val == "M0":
+        category = "Stage III"
+    elif m_val != "M0":
+        category = "Stage IV"
+    else:
+        category = "Indeterminado"
+    return {"value": f"{t_val}{n_val}{m_val}", "category": category}
+
+
+def _stanford(envolve_ascendente, localizacao_lacera_o):
+    if _as_bool(envolve_ascendente):
+        return {"value": "Type A"}
+    if _normalize_text(localizacao_lacera_o) == "descendente":
+        return {"value": "Type B"}
+    return {"value": "Type B (limitada descendente)"}
+
+
+def _hepatic_vein(padr_o_fluxo):
+    labels = {"normal_trifasico": "Normal", "bifasico": "Borderline", "monofasico": "Alterado", "reverso": "Reverso"}
+    return {"value": labels.get(_normalize_text(padr_o_fluxo), "Indeterminado")}
+
+
+def _mesenteric(grau_stranding):
+    labels = {"ausente": "Normal", "leve": "Borderline", "moderado": "Inflamacao mesenterica"}
+    return {"value": labels.get(_normalize_text(grau_stranding), "Inflamacao acentuada")}
+
+
+def _variants(*known) -> list:
+    """Every known value, spelled as callers do, plus values outside the domain."""
+    values = [None, "outro", 1]
+    for value in known:
+        values += [value, f" {value.upper()} "]
+    return values
+
+
+DOMAINS = {
+    "classify_thyroid_nodule_tirads": (_tirads, [
+        _variants("cistica", "quase_completamente_cistica", "cistica_com_solido", "sólida"),
+        _variants("anecoica", "isoecoica", "hiperecoica", "hipoecóica"),
+        _variants("tao_larga_quanto_alta", "tão_larga_quanto_alta"),
+        _variants("bem_definidas", "mal_definidas", "lobuladas", "espiculadas"),
+        _variants("ausentes", "pontos_grandes", "pontos_pequenos_comet_tail"),
+    ]),
+    "classify_rectal_cancer_tnm": (_rectal_tnm, [
+        _variants("t1", "T2", "T3", "t4", "T0"), _variants("N0", "n1", "N2", "N3"), _variants("M0", "m1"),
+    ]),
+    "classify_aortic_dissection_stanford": (_stanford, [
+        [True, False, "sim", "não", "true", 0, 1, None], _variants("descendente", "arco"),
+    ]),
+    "classify_hepatic_vein_doppler": (_hepatic_vein, [
+        _variants("normal_trifásico", "bifasico", "Monofásico", "reverso"),
+    ]),
+    "grade_mesenteric_fat_stranding": (_mesenteric, [_variants("ausente", "leve", "moderado", "acentuado")]),
+}
+
+
+@pytest.mark.parametrize("formula", sorted(DOMAINS))
+def test_table_matches_its_chain_over_the_whole_domain(formula):
+    chain, domains = DOMAINS[formula]
+    for values in product(*domains):
+        assert FORMULAS[formula](*values) == chain(*values), values
+
+
+@pytest.mark.parametrize("name", sorted(TABLES))
+def test_select_matches_lookup_for_every_code(name):
+    np = pytest.importorskip("numpy")
+    table = TABLES[name]
+    codes = list(product(*(range(len(field) + 1) for field in table.fields)))
+    keys = [(None,) + tuple(field) for field in table.fields]
+    expected = [table.lookup(*(keys[i][code] for i, code in enumerate(combo))) for combo in codes]
+    columns = [np.array(column, dtype=np.intp) for column in zip(*codes)]
+    assert table.select(*columns) == expected == table.outcomes
+
+
+@pytest.mark.parametrize("formula", sorted(DOMAINS))
+def test_coded_kernel_matches_scalar_formula(formula):
+    pytest.importorskip("numpy")
+    from ..columnar import CODED_KERNELS, evaluate
+
+    params, _ = CODED_KERNELS[formula]
+    _, domains = DOMAINS[formula]
+    rng = random.Random(formula)
+    rows = [{name: rng.choice(domain) for name, domain in zip(params, domains)} for _ in range(500)]
+    rows += [{}, {"other": "x"}, {**rows[0], "extra": 1}]
+
+    results = evaluate(formula, rows)
+
+    assert results[-3:] == [None, None, None]
+    for inputs, result in zip(rows[:-3], results):
+        assert result == FORMULAS[formula](**inputs), inputs
+
+
+def test_outcome_table_codes_unlisted_values_as_zero():
+    table = OutcomeTable(("a", "b"), ("x",), outcome=lambda first, second: f"{first}-{second}")
+    assert table.outcomes == ["None-None", "None-x", "a-None", "a-x", "b-None", "b-x"]
+    assert [table.lookup("b", "x"), table.lookup("c", "x"), table.lookup("a", None)] == ["b-x", "None-x", "a-None"]
@@ -0,0 +1,162 @@
+import json
+
+import pytest
+
+from ..tracing import FileExporter, Span, otlp
+
+
+def _traced(monkeypatch, tmp_path, ratio=1.0):
+    from ..main import tracing as app_tracing
+
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(app_tracing.EXPORTER, "path", str(path))
+    monkeypatch.setattr(app_tracing, "TRACE_SAMPLE_RATIO", ratio)
+    monkeypatch.setattr(app_tracing.EXPORTER, "flush_seconds", 0.01)
+    return app_tracing, path
+
+
+def _spans(app_tracing, path):
+    app_tracing.EXPORTER.flush()
+    spans = []
+    for line in path.read_text().splitlines():
+        for resource in json.loads(line)["resourceSpans"]:
+            for scope in resource["scopeSpans"]:
+                spans.extend(scope["spans"])
+    return spans
+
+
+def _body(edv):
+    return {"requests": [
+        {"formula": "calculate_resistive_index", "inputs": {"psv": 100, "edv": edv}},
+        {"formula": "calculate_resistive_index", "inputs": {"psv": 100, "edv": edv + 1}},
+        {"formula": "calculate_resistive_index", "inputs": {"psv": "x", "edv": 1}},
+    ]}
+
+
+def test_compute_spans_follow_the_incoming_traceparent(monkeypatch, tmp_path):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import app
+
+    app_tracing, path = _traced(monkeypatch, tmp_path)
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    response = TestClient(app).post(
+        "/compute", json=_body(17.0713), headers={"traceparent": f"00-{trace_id}-{parent_id}-01"},
+    )
+    assert response.status_code == 200
+    spans = {span["name"]: span for span in _spans(app_tracing, path)}
+
+    root = spans["POST /compute"]
+    assert root["traceId"] == trace_id
+    assert root["parentSpanId"] == parent_id
+    assert root["kind"] == 2
+    attributes = {a["key"]: a["value"] for a in root["attributes"]}
+    assert attributes["http.response.status_code"] == {"intValue": "200"}
+    assert attributes["calc.rows"] == {"intValue": "3"}
+    for phase in ("admission", "parse", "evaluate", "serialize"):
+        assert spans[phase]["parentSpanId"] == root["spanId"]
+        assert spans[phase]["traceId"] == trace_id
+    formula = spans["formula calculate_resistive_index"]
+    assert formula["parentSpanId"] == spans["evaluate"]["spanId"]
+    assert spans["validate"]["parentSpanId"] == spans["evaluate"]["spanId"]
+    assert {"key": "calc.rows", "value": {"intValue": "2"}} in formula["attributes"]
+    assert int(root["startTimeUnixNano"]) <= int(spans["parse"]["startTimeUnixNano"])
+    assert int(spans["serialize"]["endTimeUnixNano"]) <= int(root["endTimeUnixNano"])
+
+
+def test_sampling(monkeypatch, tmp_path):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import app
+
+    app_tracing, path = _traced(monkeypatch, tmp_path, ratio=0.0)
+    client = TestClient(app)
+    client.post("/compute", json=_body(18.0713))
+    # An unsampled parent wins over the ratio, and so does a sampled one.
+    client.post("/compute", json=_body(18.0713), headers={"traceparent": f"00-{'1' * 32}-{'2' * 16}-00"})
+    client.post("/compute", json=_body(18.0713), headers={"traceparent": f"00-{'3' * 32}-{'4' * 16}-01"})
+    # Malformed context starts a new trace, subject to the ratio.
+    client.post("/compute", json=_body(18.0713), headers={"traceparent": "00-zz-zz-01"})
+    traces = {span["traceId"] for span in _spans(app_tracing, path)}
+    assert traces == {"3" * 32}
+
+
+def test_validation_errors_end_the_span_with_an_error(monkeypatch, tmp_path):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import app
+
+    app_tracing, path = _traced(monkeypatch, tmp_path)
+    assert TestClient(app).post("/compute", json={"requests": "nope"}).status_code == 422
+    spans = {span["name"]: span for span in _spans(app_tracing, path)}
+    assert spans["POST /compute"]["status"]["code"] == 2
+    assert spans["parse"]["status"]["message"].startswith("RequestValidationError")
+
+
+def test_stream_is_traced_until_its_last_line(monkeypatch, tmp_path):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import app
+
+    app_tracing, path = _traced(monkeypatch, tmp_path)
+    response = TestClient(app).post("/compute/stream", json=_body(19.0713), headers={"X-Calc-Priority": "bulk"})
+    assert len(response.text.splitlines()) == 3
+    spans = {span["name"]: span for span in _spans(app_tracing, path)}
+    root = spans["POST /compute/stream"]
+    attributes = {a["key"]: a["value"] for a in root["attributes"]}
+    assert attributes["calc.rows"] == {"intValue": "3"} and attributes["calc.lane"] == {"stringValue": "bulk"}
+    for phase in ("admission", "parse"):
+        assert spans[phase]["parentSpanId"] == root["spanId"]
+
+
+def test_exporter_batches_and_drops_when_full(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = FileExporter(str(path), batch_spans=2, flush_seconds=0.01, queue_spans=100)
+    exporter._thread = object()  # queue everything before the writer starts
+    for i in range(5):
+        span = Span("a" * 32, None, f"span {i}")
+        span.end = span.start
+        exporter.export(span)
+    exporter._thread = None
+    exporter._start()
+    exporter.flush()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [len(line["resourceSpans"][0]["scopeSpans"][0]["spans"]) for line in lines] == [2, 2, 1]
+
+    full = FileExporter(str(path), batch_spans=1, flush_seconds=0, queue_spans=1)
+    full._thread = object()  # never drained
+    full.export(Span("a" * 32, None, "kept"))
+    full.export(Span("a" * 32, None, "dropped"))
+    assert full.dropped == 1
+
+
+def test_dropped_spans_are_exported_as_a_metric(monkeypatch):
+    from ..main import app, tracing as app_tracing
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(app_tracing.EXPORTER, "dropped", 7)
+    text = TestClient(app).get("/metrics").text
+    assert "# TYPE calc_trace_spans_dropped_total counter" in text
+    assert "\ncalc_trace_spans_dropped_total 7\n" in text
+
+
+def test_otlp_shape():
+    span = Span("a" * 32, "b" * 16, "work")
+    span.attributes.update({"n": 3, "x": 0.5, "ok": True, "s": "v"})
+    span.end = span.start + 10
+    encoded = otlp([span])["resourceSpans"][0]
+    assert {"key": "service.name", "value": {"stringValue": "radon-calculator"}} in encoded["resource"]["attributes"]
+    item = encoded["scopeSpans"][0]["spans"][0]
+    assert item["parentSpanId"] == "b" * 16
+    assert int(item["endTimeUnixNano"]) - int(item["startTimeUnixNano"]) == 10
+    assert item["attributes"] == [
+        {"key": "n", "value": {"intValue": "3"}},
+        {"key": "x", "value": {"doubleValue": 0.5}},
+        {"key": "ok", "value": {"boolValue": True}},
+        {"key": "s", "value": {"stringValue": "v"}},
+    ]
+    assert "status" not in item
@@ -0,0 +1,82 @@
+import pytest
+
+from ..engine import evaluate
+from ..validation import VALIDATORS
+
+
+def test_every_formula_has_a_validator():
+    from ..formulas import FORMULAS
+
+    # Validators are compiled lazily, so look each one up instead of iterating.
+    assert all(VALIDATORS[name].fn.__name__ == name for name in FORMULAS)
+    assert VALIDATORS.get("nope") is None
+
+
+def test_valid_inputs_pass_through_untouched():
+    inputs = {"psv": 100, "edv": 30}
+    checked, code, error = VALIDATORS["calculate_resistive_index"](inputs)
+    assert checked is inputs
+    assert code is None and error is None
+
+
+def test_numeric_strings_are_coerced():
+    checked, code, _ = VALIDATORS["calculate_resistive_index"]({"psv": " 100 ", "edv": "30,5"})
+    assert code is None
+    assert checked == {"psv": 100.0, "edv": 30.5}
+
+
+def test_optional_inputs_may_be_omitted_or_null():
+    validator = VALIDATORS["calculate_mesenteric_stenosis_doppler"]
+    assert validator({"psv_sma": 300})[1] is None
+    assert validator({"psv_sma": 300, "psv_celiaca": None})[1] is None
+
+
+def test_missing_input_is_rejected_before_the_call():
+    result, error, code = evaluate("calculate_resistive_index", {"psv": 100})
+    assert result is None
+    assert code == "missing_input"
+    assert "edv" in error
+
+
+def test_misspelled_input_is_rejected():
+    _, error, code = evaluate("calculate_resistive_index", {"psv": 100, "edv": 30, "edvv": 30})
+    assert code == "unexpected_input"
+    assert "edvv" in error
+
+
+def test_non_numeric_value_is_rejected():
+    _, error, code = evaluate("calculate_resistive_index", {"psv": "cem", "edv": 30})
+    assert code == "invalid_input"
+    assert "psv" in error
+    assert evaluate("calculate_resistive_index", {"psv": None, "edv": 30})[2] == "invalid_input"
+
+
+def test_non_finite_strings_are_rejected():
+    for text in ("nan", "NaN", "inf", "-Infinity", "1e400"):
+        result, error, code = evaluate("calculate_resistive_index", {"psv": text, "edv": 1})
+        assert (result, code) == (None, "invalid_input"), text
+        assert "psv" in error
+
+
+def test_unknown_formula_and_formula_errors_have_codes():
+    assert evaluate("nope", {})[2] == "unknown_formula"
+    _, error, code = evaluate("calculate_aorta_calcification_score", {"grau_calcificacao": float("nan")})
+    assert code == "formula_error"
+    assert error
+
+
+@pytest.mark.parametrize("stdlib_json", [False, True])
+def test_non_finite_strings_are_row_errors_over_http(monkeypatch, stdlib_json):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from ..main import app, fastpath as app_fastpath
+
+    if stdlib_json:
+        monkeypatch.setattr(app_fastpath, "orjson", None)
+    rows = [
+        {"formula": "calculate_resistive_index", "inputs": {"psv": text, "edv": 1}} for text in ("nan", "inf", "1e400")
+    ]
+    response = TestClient(app).post("/compute", json={"requests": rows})
+    assert response.status_code == 200
+    assert [row["error_code"] for row in response.json()] == ["invalid_input"] * 3
@@ -0,0 +1,131 @@
+import math
+
+import pytest
+
+pytest.importorskip("msgpack")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from .. import wire
+from ..main import app
+
+client = TestClient(app)
+
+BATCH = {"requests": [
+    {"formula": "calculate_resistive_index", "inputs": {"psv": 100, "edv": 40}, "ref_id": "ri"},
+    {"formula": "calculate_aaa_growth_rate", "inputs": {"d_atual": 48, "d_anterior": 40, "intervalo_anos": 1}},
+    {"formula": "classify_thyroid_nodule_tirads", "inputs": {
+        "composicao": "solida", "ecogenicidade": "hipoecoica", "forma": "tao_larga_quanto_alta",
+        "margens": "lobuladas", "focos_ecogenicos": "ausentes",
+    }},
+    {"formula": "calculate_resistive_index", "inputs": {"psv": 0, "edv": 0}},
+    {"formula": "calculate_resistive_index", "inputs": {"psv": "abc", "edv": 1}},
+    {"formula": "nope", "inputs": {}, "ref_id": "missing"},
+]}
+
+
+def test_negotiate():
+    assert wire.negotiate(None) == wire.JSON
+    assert wire.negotiate("*/*") == wire.JSON
+    assert wire.negotiate(wire.MSGPACK) == wire.MSGPACK
+    assert wire.negotiate("application/json;q=0.5, application/x-msgpack") == wire.MSGPACK
+    assert wire.negotiate("application/json, application/x-msgpack;q=0.1") == wire.JSON
+    assert wire.negotiate("text/html") == wire.JSON
+
+
+def test_dictionary_covers_formulas_and_categories():
+    strings = wire.dictionary()["strings"]
+    assert "calculate_resistive_index" in strings
+    assert "Estenose moderada (30-69%)" in strings
+    assert len(strings) == len(set(strings))
+
+
+def test_every_error_code_is_in_the_dictionary():
+    import msgpack
+
+    from .. import graph, validation
+
+    codes = [*validation.ERROR_CODES, *graph.ERROR_CODES]
+    assert {"deadline_exceeded", "invalid_request", "dependency_cycle", "unresolved_reference"} <= set(codes)
+    assert set(codes) <= set(wire.dictionary()["strings"])
+    rows = [
+        {"ref_id": None, "formula": "calculate_resistive_index", "result": None, "error": "x", "error_code": code}
+        for code in codes
+    ]
+    assert msgpack.unpackb(wire.encode(rows))["strings"] == []
+    assert wire.decode(wire.encode(rows)) == rows
+
+
+def test_graph_errors_travel_as_dictionary_codes():
+    batch = {"requests": [
+        {"formula": "calculate_resistive_index", "inputs": {"psv": {"$ref": "b"}, "edv": 1}, "ref_id": "a"},
+        {"formula": "calculate_resistive_index", "inputs": {"psv": {"$ref": "a"}, "edv": 1}, "ref_id": "b"},
+    ]}
+    import msgpack
+
+    expected = client.post("/compute", json=batch).json()
+    assert {row["error_code"] for row in expected} == {"dependency_cycle"}
+    response = client.post("/compute", json=batch, headers={"Accept": wire.MSGPACK})
+    assert msgpack.unpackb(response.content)["strings"] == []
+    assert wire.decode(response.content) == expected
+
+
+def test_tables_register_their_labels():
+    from ..formulas import _decisions, _ladders, _tables
+
+    assert "Estenose moderada (30-69%)" in _ladders.LABELS
+    assert "Type B (limitada descendente)" in _tables.LABELS
+    assert {"I", "II", "IIF", "III", "IV"} <= _decisions.LABELS
+    _ladders.Ladder(("<", 1, "built later"), default="not registered")
+    assert "built later" not in _ladders.LABELS
+    assert set(wire.dictionary()["strings"]) >= _ladders.LABELS | _tables.LABELS | _decisions.LABELS
+
+
+def test_msgpack_round_trips_the_json_response():
+    expected = client.post("/compute", json=BATCH).json()
+    response = client.post("/compute", json=BATCH, headers={"Accept": wire.MSGPACK})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == wire.MSGPACK
+    assert wire.decode(response.content) == expected
+    assert wire.decode(response.content, client.get("/compute/dictionary").json()) == expected
+
+
+def test_decode_refuses_another_dictionary_version():
+    response = client.post("/compute", json=BATCH, headers={"Accept": wire.MSGPACK})
+    stale = {**wire.dictionary(), "version": "0" * 16}
+    with pytest.raises(wire.DictionaryMismatch):
+        wire.decode(response.content, stale)
+
+
+def test_too_many_strings_falls_back_to_json(monkeypatch):
+    from ..main import wire as app_wire
+
+    monkeypatch.setattr(app_wire, "MAX_STRINGS", len(wire.dictionary()["strings"]) + 2)
+    batch = {"requests": [{"formula": f"nope_{i}", "inputs": {}} for i in range(3)]}
+    response = client.post("/compute", json=batch, headers={"Accept": wire.MSGPACK})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == client.post("/compute", json=batch).json()
+
+
+def test_encode_keeps_value_types_and_unknown_strings():
+    rows = [
+        {"ref_id": None, "formula": "f", "result": {"value": value, "category": "novo", "extra": [1]},
+         "error": None, "error_code": None}
+        for value in (1, 1.5, True, None, "texto livre", 2 ** 60, math.inf)
+    ]
+    decoded = wire.decode(wire.encode(rows))
+    assert decoded == rows
+    assert [type(row["result"]["value"]) for row in decoded] == [
+        int, float, bool, type(None), str, int, float,
+    ]
+
+
+def test_compact_body_is_smaller():
+    batch = {"requests": [
+        {"formula": "calculate_resistive_index", "inputs": {"psv": 100, "edv": i % 90}} for i in range(500)
+    ]}
+    json_size = len(client.post("/compute", json=batch).content)
+    compact_size = len(client.post("/compute", json=batch, headers={"Accept": wire.MSGPACK}).content)
+    assert compact_size * 4 < json_size
@@ -0,0 +1,254 @@
+"""
+Opt-in tracing for /compute and /compute/stream, written as OTLP/JSON without a collector.
+
+Set CALC_TRACE_FILE to turn it on. Each sampled request gets a server span
+with one child per phase (admission, parse, evaluate, serialize). Under
+evaluate there is a validate span and one span per formula, built from the
+batch's metrics Sample: a formula span lasts as long as that formula's total
+evaluation time in the batch, and the spans are laid end to end. A
+/compute/stream span has admission and parse children and ends with the
+stream's last line. A W3C
+`traceparent` header makes the request span a child of the caller's span
+and decides sampling. Requests without one are sampled at
+CALC_TRACE_SAMPLE_RATIO, by trace id.
+
+Finished spans go into a bounded queue and the request moves on. A daemon
+thread writes them to the file in batches, one ExportTraceServiceRequest per
+line, the format of the collector's file exporter. If the queue is full,
+spans are dropped and counted in calc_trace_spans_dropped_total.
+"""
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+TRACE_FILE = os.getenv("CALC_TRACE_FILE")
+TRACE_SAMPLE_RATIO = float(os.getenv("CALC_TRACE_SAMPLE_RATIO", "1.0"))
+TRACE_BATCH_SPANS = int(os.getenv("CALC_TRACE_BATCH_SPANS", "512"))
+TRACE_FLUSH_SECONDS = float(os.getenv("CALC_TRACE_FLUSH_SECONDS", "1.0"))
+TRACE_QUEUE_SPANS = int(os.getenv("CALC_TRACE_QUEUE_SPANS", "8192"))
+SERVICE_NAME = os.getenv("CALC_SERVICE_NAME", "radon-calculator")
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_INVALID_TRACE = "0" * 32
+_INVALID_SPAN = "0" * 16
+
+TRACEPARENT = "traceparent"
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start", "end", "attributes", "error")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, kind: int = SPAN_KIND_INTERNAL):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = 0
+        self.attributes: dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    def child(self, name: str) -> "Span":
+        return Span(self.trace_id, self.span_id, name)
+
+    def finish(self, end: Optional[int] = None):
+        self.end = end or time.time_ns()
+        EXPORTER.export(self)
+
+
+def _value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes: dict) -> list[dict]:
+    return [{"key": key, "value": _value(value)} for key, value in attributes.items()]
+
+
+def otlp(spans: list[Span]) -> dict:
+    """An OTLP/JSON ExportTraceServiceRequest holding `spans`."""
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start),
+            "endTimeUnixNano": str(span.end),
+            "attributes": _attributes(span.attributes),
+        }
+        if span.parent_id:
+            item["parentSpanId"] = span.parent_id
+        if span.error is not None:
+            item["status"] = {"code": STATUS_ERROR, "message": span.error}
+        encoded.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": _attributes({"service.name": SERVICE_NAME, "process.pid": os.getpid()})},
+        "scopeSpans": [{"scope": {"name": "calculator"}, "spans": encoded}],
+    }]}
+
+
+class FileExporter:
+    """Batches finished spans onto a file from a background thread."""
+
+    def __init__(self, path: Optional[str], batch_spans: int, flush_seconds: float, queue_spans: int):
+        self.path = path
+        self.batch_spans = batch_spans
+        self.flush_seconds = flush_seconds
+        self.queue: queue.Queue = queue.Queue(queue_spans)
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def export(self, span: Span):
+        if self._thread is None:
+            self._start()
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        # Started on first use, so serve.py forks before any thread exists.
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            flush_at = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_spans:
+                timeout = flush_at - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except OSError:
+                self.dropped += len(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _write(self, spans: list[Span]):
+        # One write per line; O_APPEND keeps lines from several workers whole.
+        line = json.dumps(otlp(spans), separators=(",", ":")) + "\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def flush(self):
+        """Block until every span exported so far is written."""
+        self.queue.join()
+
+
+EXPORTER = FileExporter(TRACE_FILE, TRACE_BATCH_SPANS, TRACE_FLUSH_SECONDS, TRACE_QUEUE_SPANS)
+
+
+def _sampled(trace_id: str) -> bool:
+    # The lower 64 bits of the trace id, as in OpenTelemetry's TraceIdRatioBased.
+    return int(trace_id[16:], 16) < TRACE_SAMPLE_RATIO * 2 ** 64
+
+
+def start(name: str, traceparent: Optional[str]) -> Optional[Span]:
+    """The server span for a request, or None when tracing is off or the request is not sampled."""
+    if not EXPORTER.enabled:
+        return None
+    match = _TRACEPARENT.match((traceparent or "").strip().lower())
+    if match and match.group(1) != _INVALID_TRACE and match.group(2) != _INVALID_SPAN:
+        trace_id, parent_id, flags = match.groups()
+        if not int(flags, 16) & 1:
+            return None
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+        if not _sampled(trace_id):
+            return None
+    return Span(trace_id, parent_id, name, SPAN_KIND_SERVER)
+
+
+@contextmanager
+def _finishing(span: Span) -> Iterator[Span]:
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.finish()
+
+
+@contextmanager
+def request(name: str, traceparent: Optional[str]) -> Iterator[Optional[Span]]:
+    """The server span around a request; yields None when it is not traced."""
+    root = start(name, traceparent)
+    if root is None:
+        yield None
+        return
+    with _finishing(root):
+        yield root
+
+
+@contextmanager
+def span(parent: Optional[Span], name: str) -> Iterator[Optional[Span]]:
+    """A child span of `parent` around the block; a no-op when `parent` is None."""
+    if parent is None:
+        yield None
+        return
+    with _finishing(parent.child(name)) as child:
+        yield child
+
+
+def since(parent: Optional[Span], name: str, start_ns: int):
+    """A child span of `parent` from `start_ns` (a time.time_ns() reading) until now."""
+    if parent is not None:
+        child = parent.child(name)
+        child.start = start_ns
+        child.finish()
+
+
+def formula_spans(parent: Optional[Span], sample) -> None:
+    """Validation and per-formula evaluation spans under `parent`, from a metrics Sample.
+
+    Rows of different formulas are interleaved and pool chunks run side by
+    side, so these are totals laid end to end from `parent`'s start, not the
+    moments each row ran.
+    """
+    if parent is None:
+        return
+    cursor = parent.start
+    validate = parent.child("validate")
+    validate.start = cursor
+    cursor += int(sample.validation * 1e9)
+    validate.finish(cursor)
+    for formula, series in sorted(sample.latency.items()):
+        child = parent.child(f"formula {formula}")
+        child.start = cursor
+        cursor += int(series[-1] * 1e9)
+        child.attributes["calc.formula"] = formula
+        child.attributes["calc.rows"] = sum(series[:-1])
+        child.finish(cursor)
@@ -0,0 +1,117 @@
+"""
+Input validators compiled once per formula from its signature.
+
+A malformed row (missing, misspelled or non-numeric input) is rejected with a
+structured error code before it reaches the formula, instead of surfacing as a
+TypeError from inside the call.
+"""
+import inspect
+import math
+import typing
+from typing import Any, Callable, Optional
+
+from formulas import FORMULAS
+
+UNKNOWN_FORMULA = "unknown_formula"
+MISSING_INPUT = "missing_input"
+UNEXPECTED_INPUT = "unexpected_input"
+INVALID_INPUT = "invalid_input"
+FORMULA_ERROR = "formula_error"
+DEADLINE_EXCEEDED = "deadline_exceeded"
+# An NDJSON line that is not a CalcRequest (streaming.py).
+INVALID_REQUEST = "invalid_request"
+
+ERROR_CODES = (
+    UNKNOWN_FORMULA, MISSING_INPUT, UNEXPECTED_INPUT, INVALID_INPUT, FORMULA_ERROR, DEADLINE_EXCEEDED, INVALID_REQUEST,
+)
+
+_NUMERIC = (int, float)
+
+# (inputs, error_code, error): inputs is None when the row is rejected.
+Checked = tuple[Optional[dict], Optional[str], Optional[str]]
+
+
+def _is_numeric(annotation) -> bool:
+    if annotation in _NUMERIC:
+        return True
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    return bool(args) and all(arg in _NUMERIC for arg in args)
+
+
+def _to_number(value: str) -> Optional[float]:
+    """The finite number a string spells, or None ("nan", "inf" and "1e400" are not one)."""
+    text = value.strip()
+    if "," in text and "." not in text:
+        text = text.replace(",", ".")
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+class Validator:
+    __slots__ = ("formula", "fn", "params", "required", "allowed", "numeric")
+
+    def __init__(self, formula: str, fn: Callable):
+        signature = inspect.signature(fn)
+        self.formula = formula
+        self.fn = fn
+        self.params = tuple(signature.parameters)
+        self.required = frozenset(
+            name for name, param in signature.parameters.items()
+            if param.default is inspect.Parameter.empty
+        )
+        self.allowed = frozenset(self.params)
+        self.numeric = tuple(
+            (name, name in self.required)
+            for name, param in signature.parameters.items()
+            if _is_numeric(param.annotation)
+        )
+
+    def __call__(self, inputs: dict[str, Any]) -> Checked:
+        keys = inputs.keys()
+        if not self.required <= keys:
+            missing = ", ".join(sorted(self.required - keys))
+            return None, MISSING_INPUT, f"Missing input(s) for '{self.formula}': {missing}"
+        if not keys <= self.allowed:
+            unexpected = ", ".join(sorted(keys - self.allowed))
+            return None, UNEXPECTED_INPUT, f"Unexpected input(s) for '{self.formula}': {unexpected}"
+
+        coerced = None
+        for name, required in self.numeric:
+            value = inputs.get(name)
+            kind = type(value)
+            if kind is float or kind is int or kind is bool:
+                continue
+            if value is None:
+                if required:
+                    return None, INVALID_INPUT, f"Input '{name}' for '{self.formula}' must be a number"
+                continue
+            number = _to_number(value) if kind is str else None
+            if number is None:
+                return None, INVALID_INPUT, f"Input '{name}' for '{self.formula}' must be a number, got {value!r}"
+            if coerced is None:
+                coerced = dict(inputs)
+            coerced[name] = number
+        return (inputs if coerced is None else coerced), None, None
+
+
+class _Validators(dict):
+    """Validators are compiled on first use, which also loads the formula's module."""
+
+    def __missing__(self, formula: str) -> Validator:
+        if formula not in FORMULAS:
+            raise KeyError(formula)
+        validator = self[formula] = Validator(formula, FORMULAS[formula])
+        return validator
+
+    def get(self, formula: str, default=None):
+        validator = dict.get(self, formula)
+        if validator is None and formula in FORMULAS:
+            return self[formula]
+        return validator if validator is not None else default
+
+
+VALIDATORS: dict[str, Validator] = _Validators()
+
@@ -0,0 +1,306 @@
+"""
+Compact binary encoding of /compute results (MessagePack, columnar).
+
+Clients opt in with `Accept: application/x-msgpack`; JSON stays the default.
+Formula names, categories, string values and error codes are sent as uint16
+indices into a string table. The fixed part of that table (every formula name,
+every category/label literal in the formulas package and every error code in
+validation.py and graph.py) is served once by
+GET /compute/dictionary and built on first use; strings outside it travel
+with the response, which names the dictionary version it was coded against.
+A response with more distinct strings than uint16 codes raises
+TooManyStrings, and /compute answers in JSON instead. Numeric values are
+packed little-endian float64, with a per-row kind byte so ints, bools and
+None come back exactly.
+"""
+import array
+import ast
+import hashlib
+import sys
+from functools import cache
+from typing import Any, Optional
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+import formulas
+from formulas import FORMULAS
+
+MSGPACK = "application/x-msgpack"
+JSON = "application/json"
+
+_ACCEPTED = {
+    JSON: JSON,
+    "application/*": JSON,
+    "*/*": JSON,
+    MSGPACK: MSGPACK,
+    "application/msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+
+NO_STRING = 0xFFFF
+# Codes below NO_STRING, dictionary and per-response strings together.
+MAX_STRINGS = NO_STRING
+
+KIND_NONE = 0
+KIND_FLOAT = 1
+KIND_INT = 2
+KIND_BOOL = 3
+KIND_STRING = 4
+KIND_OTHER = 5
+KIND_NO_RESULT = 255
+
+_LABEL_NAMES = {"category", "label", "level"}
+_MAX_EXACT_INT = 2 ** 53
+
+
+class TooManyStrings(ValueError):
+    """The response has more distinct strings than the compact encoding can code."""
+
+
+class DictionaryMismatch(ValueError):
+    """The response was coded against another version of the dictionary."""
+
+
+def _formula_literals() -> list[str]:
+    """Category / label literals assigned or passed to _result() in the formulas, and ladder and table outcomes."""
+    from formulas import _decisions as decisions, _ladders as ladders, _tables as tables
+
+    nodes = []
+    for path in formulas.source_files():
+        with open(path, encoding="utf-8") as f:
+            nodes.extend(ast.walk(ast.parse(f.read())))
+    literals = set()
+    for node in nodes:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id in _LABEL_NAMES for target in node.targets
+        ):
+            values = [node.value.body, node.value.orelse] if isinstance(node.value, ast.IfExp) else [node.value]
+        elif isinstance(node, ast.Call) and getattr(node.func, "id", None) == "_result":
+            values = node.args[:2]
+        else:
+            continue
+        for value in values:
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                literals.add(value.value)
+    literals.update(ladders.LABELS, tables.LABELS, decisions.LABELS)
+    return sorted(literals)
+
+
+def _version(strings: list[str]) -> str:
+    return hashlib.sha256("\n".join(strings).encode("utf-8")).hexdigest()[:16]
+
+
+@cache
+def _dictionary() -> tuple[list[str], str, dict[str, int]]:
+    import graph
+    import validation
+
+    codes = [*validation.ERROR_CODES, *graph.ERROR_CODES]
+    strings = list(dict.fromkeys(sorted(FORMULAS) + _formula_literals() + codes))
+    return strings, _version(strings), {text: i for i, text in enumerate(strings)}
+
+
+def dictionary() -> dict:
+    strings, version, _ = _dictionary()
+    return {"version": version, "strings": strings}
+
+
+def available() -> bool:
+    return msgpack is not None
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """Pick JSON or MSGPACK from an Accept header; None if neither is acceptable."""
+    if not accept:
+        return JSON
+    best, best_q = None, 0.0
+    for part in accept.split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        chosen = _ACCEPTED.get(media_type.lower())
+        if chosen == MSGPACK and msgpack is None:
+            continue
+        if chosen is not None and q > best_q:
+            best, best_q = chosen, q
+    if best is None and msgpack is None and MSGPACK in accept:
+        return None
+    return best or JSON
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings, self.version, self._index = _dictionary()
+        self.extra: list[str] = []
+        self._extra_index: dict[str, int] = {}
+
+    def code(self, text: Optional[str]) -> int:
+        if text is None:
+            return NO_STRING
+        index = self._index.get(text)
+        if index is not None:
+            return index
+        index = self._extra_index.get(text)
+        if index is None:
+            index = len(self.strings) + len(self.extra)
+            if index >= MAX_STRINGS:
+                raise TooManyStrings(f"more than {MAX_STRINGS} distinct strings")
+            self._extra_index[text] = index
+            self.extra.append(text)
+        return index
+
+
+def _packed(typecode: str, values) -> bytes:
+    packed = array.array(typecode, values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpacked(typecode: str, data: bytes) -> list:
+    unpacked = array.array(typecode)
+    unpacked.frombytes(data)
+    if sys.byteorder != "little":
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+
+def encode(rows: list[dict]) -> bytes:
+    """Encode CalcResult-shaped dicts (see fastpath.result_row); TooManyStrings if they cannot be coded."""
+    table = _StringTable()
+    formula_codes, category_codes, error_codes, string_values = [], [], [], []
+    kinds, numbers, ref_ids, errors, extras = [], [], [], [], []
+    has_extras = has_errors = False
+
+    for row in rows:
+        ref_ids.append(row["ref_id"])
+        formula_codes.append(table.code(row["formula"]))
+        error_codes.append(table.code(row["error_code"]))
+        errors.append(row["error"])
+        has_errors = has_errors or row["error"] is not None
+
+        result = row["result"]
+        number = 0.0
+        extra = None
+        if result is None:
+            kind = KIND_NO_RESULT
+            category_codes.append(NO_STRING)
+        else:
+            if isinstance(result, dict):
+                value = result.get("value")
+                category = result.get("category")
+                rest = {k: v for k, v in result.items() if k not in ("value", "category")}
+                if not isinstance(category, (str, type(None))):
+                    rest["category"] = category
+                    category = None
+                extra = rest or None
+            else:
+                value, category, extra = None, None, {"__result__": result}
+            category_codes.append(table.code(category))
+            value_type = type(value)
+            if value is None:
+                kind = KIND_NONE
+            elif value_type is bool:
+                kind, number = KIND_BOOL, float(value)
+            elif value_type is float:
+                kind, number = KIND_FLOAT, value
+            elif value_type is int and -_MAX_EXACT_INT < value < _MAX_EXACT_INT:
+                kind, number = KIND_INT, float(value)
+            elif value_type is str:
+                kind = KIND_STRING
+                string_values.append(table.code(value))
+            else:
+                kind = KIND_OTHER
+                extra = {**(extra or {}), "value": value}
+        kinds.append(kind)
+        numbers.append(number)
+        extras.append(extra)
+        has_extras = has_extras or extra is not None
+
+    payload = {
+        "v": 1,
+        "dictionary": table.version,
+        "strings": table.extra,
+        "n": len(rows),
+        "ref_id": ref_ids,
+        "formula": _packed("H", formula_codes),
+        "kind": bytes(kinds),
+        "value": _packed("d", numbers),
+        "value_string": _packed("H", string_values),
+        "category": _packed("H", category_codes),
+        "error_code": _packed("H", error_codes),
+        "error": errors if has_errors else None,
+        "extras": extras if has_extras else None,
+    }
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def decode(data: bytes, dictionary: Optional[dict] = None) -> list[dict]:
+    """Inverse of encode(); `dictionary` is the GET /compute/dictionary body the client holds.
+
+    Raises DictionaryMismatch if the response was coded against another
+    version, e.g. a server with other formulas; fetch the dictionary again.
+    """
+    payload = msgpack.unpackb(data, raw=False)
+    if dictionary is None:
+        dictionary = {"version": _dictionary()[1], "strings": _dictionary()[0]}
+    if payload["dictionary"] != dictionary["version"]:
+        raise DictionaryMismatch(f"response uses dictionary {payload['dictionary']}, not {dictionary['version']}")
+    table = dictionary["strings"] + payload["strings"]
+
+    def text(code: int) -> Optional[str]:
+        return None if code == NO_STRING else table[code]
+
+    size = payload["n"]
+    formula_codes = _unpacked("H", payload["formula"])
+    category_codes = _unpacked("H", payload["category"])
+    error_codes = _unpacked("H", payload["error_code"])
+    numbers = _unpacked("d", payload["value"])
+    string_values = iter(_unpacked("H", payload["value_string"]))
+    kinds = payload["kind"]
+    errors = payload["error"] or [None] * size
+    extras = payload["extras"] or [None] * size
+
+    rows = []
+    for i in range(size):
+        kind = kinds[i]
+        extra = extras[i] or {}
+        result: Any
+        if kind == KIND_NO_RESULT:
+            result = None
+        elif "__result__" in extra:
+            result = extra["__result__"]
+        else:
+            if kind == KIND_FLOAT:
+                value = numbers[i]
+            elif kind == KIND_INT:
+                value = int(numbers[i])
+            elif kind == KIND_BOOL:
+                value = bool(numbers[i])
+            elif kind == KIND_STRING:
+                value = table[next(string_values)]
+            elif kind == KIND_OTHER:
+                value = extra["value"]
+            else:
+                value = None
+            result = {"value": value}
+            category = text(category_codes[i])
+            if category is not None:
+                result["category"] = category
+            result.update((k, v) for k, v in extra.items() if k != "value")
+        rows.append({
+            "ref_id": payload["ref_id"][i],
+            "formula": text(formula_codes[i]),
+            "result": result,
+            "error": errors[i],
+            "error_code": text(error_codes[i]),
+        })
+    return rows
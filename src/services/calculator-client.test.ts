@@ -6,8 +6,10 @@ import {
 } from '../generated/formula-registry';
 import {
   attachComputeResults,
+  isCalculatorRef,
   mapRequestsToCalculator,
   normalizeCalculatorResults,
+  splitNdjson,
   validateComputeRequests,
 } from './calculator-client';
 import type { ComputeResult, ComputeRequest } from '../types/compute-request';
@@ -153,4 +155,24 @@ describe('Calculator client wiring', () => {
       'Formula(s) not wired in calculator service'
     );
   });
+
+  it('accepts inputs that reference another request by ref_id', () => {
+    const requests = [
+      {
+        formula: 'PEL-0001',
+        inputs: { psa: 6, volume_prostata: { $ref: 'vol1.value' } },
+        ref_id: 'psad',
+      },
+    ] as ComputeRequest[];
+    expect(isCalculatorRef(requests[0].inputs.volume_prostata)).toBe(true);
+    expect(validateComputeRequests(requests)).toHaveLength(1);
+    requests[0].inputs.psa = 'high';
+    expect(() => validateComputeRequests(requests)).toThrow('Inputs invalid for PEL-0001');
+  });
+
+  it('splits streamed NDJSON results and keeps the partial tail', () => {
+    const { lines, rest } = splitNdjson('{"ref_id":"a"}\n\n{"ref_id":"b"}\n{"ref_');
+    expect(lines).toEqual(['{"ref_id":"a"}', '{"ref_id":"b"}']);
+    expect(rest).toBe('{"ref_');
+  });
 });
@@ -1,3 +1,4 @@
+import type { z } from 'zod';
 import {
   FormulaFunctionNameMap,
   FormulaIdSchema,
@@ -11,6 +12,20 @@ const CALC_URL = process.env.CALCULATOR_URL || process.env.VITE_CALC_URL || DEFA
 
 export type CalculatorComputeRequest = Omit<ComputeRequest, 'formula'> & { formula: string };
 
+/** An input taken from another request's result, e.g. `{ $ref: 'vol1.value' }`. */
+export interface CalculatorRef {
+  $ref: string;
+}
+
+export function isCalculatorRef(value: unknown): value is CalculatorRef {
+  return (
+    typeof value === 'object' &&
+    value !== null &&
+    Object.keys(value).length === 1 &&
+    typeof (value as CalculatorRef).$ref === 'string'
+  );
+}
+
 export function validateComputeRequests(requests: ComputeRequest[]): ComputeRequest[] {
   const errors: string[] = [];
   const validated: ComputeRequest[] = [];
@@ -22,7 +37,13 @@ export function validateComputeRequests(requests: ComputeRequest[]): ComputeRequ
       continue;
     }
 
-    const inputSchema = FormulaInputSchemaMap[req.formula];
+    // Referenced inputs are resolved by the service, so only the literal ones are checked here.
+    const refKeys = Object.keys(req.inputs).filter((key) => isCalculatorRef(req.inputs[key]));
+    const inputSchema = refKeys.length
+      ? (FormulaInputSchemaMap[req.formula] as z.AnyZodObject).omit(
+          Object.fromEntries(refKeys.map((key) => [key, true])),
+        )
+      : FormulaInputSchemaMap[req.formula];
     const inputCheck = inputSchema.safeParse(req.inputs);
     if (!inputCheck.success) {
       errors.push(`Inputs invalid for ${req.formula}`);
@@ -78,15 +99,42 @@ export function normalizeCalculatorResults(
   }));
 }
 
-export async function computeFormulas(requests: ComputeRequest[]): Promise<ComputeResult[]> {
+export interface ComputeOptions {
+  /** Latency budget; rows not evaluated in time come back as deadline_exceeded. */
+  deadlineMs?: number;
+  /** Admission lane; bulk requests may be turned away with 429 under load. */
+  priority?: 'urgent' | 'routine' | 'bulk';
+  /** Retries after network errors; they reuse one Idempotency-Key, so the batch is computed once. */
+  retries?: number;
+}
+
+export async function computeFormulas(
+  requests: ComputeRequest[],
+  options: ComputeOptions = {},
+): Promise<ComputeResult[]> {
   const validated = validateComputeRequests(requests);
   const { requests: mapped, refIdFormulaMap } = mapRequestsToCalculator(validated);
 
-  const response = await fetch(`${CALC_URL}/compute`, {
-    method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ requests: mapped }),
-  });
+  const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+  if (options.deadlineMs !== undefined) {
+    headers['X-Calc-Deadline-Ms'] = String(options.deadlineMs);
+  }
+  if (options.priority !== undefined) {
+    headers['X-Calc-Priority'] = options.priority;
+  }
+  headers['Idempotency-Key'] = globalThis.crypto.randomUUID();
+  const body = JSON.stringify({ requests: mapped });
+  const retries = options.retries ?? 2;
+
+  let response: Response;
+  for (let attempt = 0; ; attempt++) {
+    try {
+      response = await fetch(`${CALC_URL}/compute`, { method: 'POST', headers, body });
+      break;
+    } catch (error) {
+      if (attempt >= retries) throw error;
+    }
+  }
 
   if (!response.ok) {
     const errorText = await response.text();
@@ -97,6 +145,93 @@ export async function computeFormulas(requests: ComputeRequest[]): Promise<Compu
   return normalizeCalculatorResults(rawResults, refIdFormulaMap);
 }
 
+export function splitNdjson(buffer: string): { lines: string[]; rest: string } {
+  const parts = buffer.split('\n');
+  const rest = parts.pop() ?? '';
+  return { lines: parts.filter((line) => line.trim().length > 0), rest };
+}
+
+export async function computeFormulasStream(
+  requests: ComputeRequest[],
+  onResult?: (result: ComputeResult) => void
+): Promise<ComputeResult[]> {
+  const validated = validateComputeRequests(requests);
+  const { requests: mapped, refIdFormulaMap } = mapRequestsToCalculator(validated);
+
+  const response = await fetch(`${CALC_URL}/compute/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/x-ndjson' },
+    body: mapped.map((req) => JSON.stringify(req)).join('\n'),
+  });
+
+  if (!response.ok || !response.body) {
+    const errorText = await response.text();
+    throw new Error(`Calculator error: ${response.status} ${errorText}`);
+  }
+
+  const results: ComputeResult[] = [];
+  const emit = (line: string) => {
+    const [result] = normalizeCalculatorResults([JSON.parse(line) as ComputeResult], refIdFormulaMap);
+    results.push(result);
+    onResult?.(result);
+  };
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    const { lines, rest } = splitNdjson(buffer + decoder.decode(value, { stream: true }));
+    buffer = rest;
+    lines.forEach(emit);
+  }
+  const tail = buffer + decoder.decode();
+  if (tail.trim()) emit(tail);
+
+  return results;
+}
+
+export interface FormulaCatalogParameter {
+  name: string;
+  type: string;
+  nullable: boolean;
+  required: boolean;
+  default?: unknown;
+  label?: string;
+  unit?: string;
+  valid_range?: string;
+  notes?: string;
+}
+
+export interface FormulaCatalogEntry {
+  name: string;
+  item_id: string | null;
+  parameters: FormulaCatalogParameter[];
+  interpretation?: { if: string; then?: string }[];
+  evidence?: Record<string, string>;
+}
+
+let catalogCache: { etag: string; formulas: FormulaCatalogEntry[] } | null = null;
+
+export async function fetchFormulaCatalog(): Promise<FormulaCatalogEntry[]> {
+  const headers: Record<string, string> = catalogCache ? { 'If-None-Match': catalogCache.etag } : {};
+  const response = await fetch(`${CALC_URL}/formulas`, { headers });
+
+  if (response.status === 304 && catalogCache) {
+    return catalogCache.formulas;
+  }
+  if (!response.ok) {
+    const errorText = await response.text();
+    throw new Error(`Calculator error: ${response.status} ${errorText}`);
+  }
+
+  const { formulas } = (await response.json()) as { formulas: FormulaCatalogEntry[] };
+  const etag = response.headers.get('ETag');
+  catalogCache = etag ? { etag, formulas } : null;
+  return formulas;
+}
+
 export async function healthCheck(): Promise<boolean> {
   try {
     const response = await fetch(`${CALC_URL}/health`);
@@ -12,6 +12,7 @@ export const ComputeResultSchema = z.object({
   formula: z.string(),
   result: z.any().optional(),
   error: z.string().optional(),
+  error_code: z.string().optional(),
 });
 
 export type ComputeRequest = z.infer<typeof ComputeRequestSchema>;